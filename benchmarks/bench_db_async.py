@@ -0,0 +1,120 @@
+# benchmarks/bench_db_async.py
+# مقایسه تاخیر هندلرها: کوئری همزمان روی حلقه asyncio در برابر repository غیرهمزمان
+# (users هندلر با دیتابیس + همین تعداد هندلر بدون دیتابیس از کاربران دیگر)
+#
+#   python -m benchmarks.bench_db_async --users 500
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import config
+import db
+import repository
+
+PAYLOAD = json.dumps({"coin_account": "245000", "platform": "پلی استیشن - کامل"}, ensure_ascii=False)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+async def handler_sync(user_id, network_delay):
+    # مشابه confirm_final_submit قبل از تغییر: کوئری‌ها مستقیم روی حلقه
+    await asyncio.sleep(network_delay)
+    db.get_user_row(user_id)
+    db.set_user_free_used(user_id)
+    db.record_listing(user_id, PAYLOAD)
+    await asyncio.sleep(network_delay)
+
+
+async def handler_async(user_id, network_delay):
+    await asyncio.sleep(network_delay)
+    await repository.users.get(user_id)
+    await repository.users.mark_free_used(user_id)
+    await repository.listings.create(user_id, PAYLOAD)
+    await asyncio.sleep(network_delay)
+
+
+async def loop_lag_probe(stop, samples, interval=0.001):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - t0 - interval)
+
+
+async def handler_no_db(user_id, network_delay):
+    # مشابه «📖 راهنما»: بدون دیتابیس، فقط رفت و برگشت Bot API
+    await asyncio.sleep(network_delay)
+    await asyncio.sleep(network_delay)
+
+
+async def run_round(handler, users, network_delay, offset):
+    latencies = []
+    bystanders = []
+    lag = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(stop, lag))
+
+    async def one(fn, uid, out):
+        t0 = time.perf_counter()
+        await fn(uid, network_delay)
+        out.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        *(one(handler, offset + i, latencies) for i in range(users)),
+        *(one(handler_no_db, offset + i, bystanders) for i in range(users)),
+    )
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+    return latencies, bystanders, lag, elapsed
+
+
+def report(name, latencies, bystanders, lag, elapsed):
+    ms = [x * 1000 for x in latencies]
+    other = [x * 1000 for x in bystanders]
+    lag_ms = [x * 1000 for x in lag] or [0.0]
+    print(
+        f"{name:<6} db-handlers={len(ms)}  wall={elapsed:5.2f}s  "
+        f"p50={percentile(ms, 50):6.1f}ms  p99={percentile(ms, 99):6.1f}ms  mean={statistics.fmean(ms):6.1f}ms | "
+        f"other users p99={percentile(other, 99):6.1f}ms | "
+        f"loop-lag p99={percentile(lag_ms, 99):6.1f}ms"
+    )
+
+
+async def main(args):
+    for name, handler in (("sync", handler_sync), ("async", handler_async)):
+        all_lat, all_other, all_lag, total = [], [], [], 0.0
+        for r in range(args.rounds):
+            lat, other, lag, elapsed = await run_round(handler, args.users, args.network_delay / 1000, r * args.users)
+            all_lat += lat
+            all_other += other
+            all_lag += lag
+            total += elapsed
+        report(name, all_lat, all_other, all_lag, total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p99 handler latency: sync sqlite vs async repository")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--network-delay", type=float, default=5.0, help="simulated Bot API round trip (ms)")
+    parser.add_argument("--synchronous", default="FULL", help="PRAGMA synchronous for the run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = os.path.join(tmp, "bench.sqlite3")
+        config.DB_SYNCHRONOUS = args.synchronous
+        db.init_db()
+        try:
+            asyncio.run(main(args))
+        finally:
+            repository.shutdown_executor()
+            db.close_pool()
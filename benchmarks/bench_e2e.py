@@ -0,0 +1,187 @@
+# benchmarks/bench_e2e.py
+# آزمون بار end-to-end: ربات واقعی (build_application، polling) در برابر FakeBotAPI محلی.
+# هر کاربر مجازی مسیر کامل «💰 فروش اکانت» -> bot_form -> همه فیلدها -> confirm_final_submit را
+# طی می‌کند؛ تاخیر از گذاشتن آپدیت تا اولین پاسخ ربات به همان چت، به تفکیک هندلر گزارش می‌شود
+#
+#   python -m benchmarks.bench_e2e --users 1000 --ramp 5 --api-latency 20 60
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.fake_bot_api import BOT_USER, FakeBotAPI
+
+TOKEN = "123456:FAKE-TOKEN"
+ADMIN_ID = 999999999
+
+# مسیر کامل فرم ربات (همان ترتیبی که کاربر واقعی دکمه‌ها را می‌زند)
+SALE_FLOW = [
+    ("text", "💰 فروش اکانت"),
+    ("callback", "bot_form"),
+    ("callback", "platform"), ("callback", "platform_ps"), ("callback", "subplatform_ps3"),
+    ("callback", "continue_to_form"),
+    ("callback", "email_type"), ("callback", "email_gmail"),
+    ("callback", "web_app"), ("callback", "web_open"),
+    ("callback", "coin_account"), ("text", "245000"),
+    ("callback", "trade_players"), ("text", "Mbappé Pedri"), ("text", "400000"),
+    ("callback", "non_trade_players"), ("text", "دیونگ"), ("text", "100000"),
+    ("callback", "match_earning"), ("text", "25000"),
+    ("callback", "season_level"), ("text", "35"),
+    ("callback", "division_rivals"), ("text", "Elite"),
+    ("callback", "price"), ("text", "5000000"),
+    ("callback", "sale_method"), ("callback", "accept_rules"), ("callback", "sale_method_self"),
+    ("callback", "team_photo"), ("photo", "P1"), ("photo", "P2"), ("photo", "P3"),
+    ("callback", "final_submit"), ("callback", "confirm_final_submit"),
+]
+
+
+def configure_env(args, db_path: str, base_url: str):
+    """config هنگام import خوانده می‌شود، پس محیط قبل از import test_bot تنظیم می‌شود"""
+    os.environ.update({
+        "BOT_TOKEN": TOKEN,
+        "BOT_API_BASE_URL": base_url,
+        "DB_PATH": db_path,
+        "ADMIN_USER_ID": str(ADMIN_ID),
+        "CHANNEL_USERNAME": "@fake_channel",
+    })
+    if not args.telegram_limits:
+        # سقف‌های Telegram برای سرور ساختگی معنی ندارند؛ فقط خود ربات اندازه‌گیری می‌شود
+        os.environ.update({
+            "OUTBOUND_GLOBAL_RATE": "1000000", "OUTBOUND_CHAT_RATE": "1000000",
+            "OUTBOUND_CHAT_BURST": "1000000", "OUTBOUND_MAX_IN_FLIGHT": "256",
+        })
+
+
+def user_json(uid: int) -> dict:
+    return {"id": uid, "is_bot": False, "first_name": f"U{uid}", "username": f"user{uid}"}
+
+
+def make_update(kind: str, payload: str, uid: int, message_id: int) -> dict:
+    chat = {"id": uid, "type": "private"}
+    if kind == "callback":
+        return {"callback_query": {
+            "id": f"{uid}-{message_id}", "from": user_json(uid), "chat_instance": str(uid), "data": payload,
+            "message": {"message_id": message_id, "date": int(time.time()), "chat": chat,
+                        "from": BOT_USER, "text": "."},
+        }}
+    message = {"message_id": message_id, "date": int(time.time()), "chat": chat, "from": user_json(uid)}
+    if kind == "photo":
+        message["photo"] = [{"file_id": f"{payload}-{uid}", "file_unique_id": f"{payload}{uid}",
+                             "width": 1280, "height": 720}]
+    else:
+        message["text"] = payload
+    return {"message": message}
+
+
+def handler_name(bot, kind: str, payload: str, uid: int) -> str:
+    """همان مسیریابی ربات: CallbackRouter برای دکمه‌ها و هندلر مرحله فعلی نشست برای متن"""
+    if kind == "photo":
+        return "photo_handler"
+    if kind == "callback":
+        if payload in ("bot_form", "manual_form"):
+            return "handle_main_sale_callbacks"
+        handler = bot.callback_router.resolve(payload)
+        return handler.__name__ if handler else "callback_query_handler"
+    session = bot.sale_sessions.get(uid)
+    handler = bot.STEP_TEXT_HANDLERS.get(session.step) if session else None
+    return handler.__name__ if handler else "text_message_handler"
+
+
+def pct(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+
+async def virtual_user(uid, api, bot, args, latencies, errors):
+    inbox = api.subscribe(uid)
+    message_id = 0
+    for kind, payload in SALE_FLOW:
+        name = handler_name(bot, kind, payload, uid)
+        message_id += 1
+        sent = time.perf_counter()
+        api.push_update(make_update(kind, payload, uid, message_id))
+        try:
+            _, _, answered = await asyncio.wait_for(inbox.get(), args.step_timeout)
+        except asyncio.TimeoutError:
+            errors[name] += 1
+            continue
+        latencies[name].append(answered - sent)
+        # پیام‌های بیشتر همین مرحله (مثلاً ویرایش + پیام جدید) قبل از قدم بعدی خالی می‌شوند
+        while True:
+            try:
+                await asyncio.wait_for(inbox.get(), args.settle / 1000)
+            except asyncio.TimeoutError:
+                break
+        if args.think:
+            await asyncio.sleep(args.think / 1000)
+
+
+async def run(args):
+    api = FakeBotAPI(TOKEN, latency=(args.api_latency[0] / 1000, args.api_latency[1] / 1000))
+    await api.start()
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    configure_env(args, os.path.join(workdir, "bot.sqlite3"), api.base_url)
+
+    import test_bot as bot
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    bot.init_db()
+    app = bot.build_application()
+    await app.initialize()
+    await app.post_init(app)
+    await app.updater.start_polling(poll_interval=0, timeout=1)
+    await app.start()
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    async def start_user(index):
+        await asyncio.sleep(args.ramp * index / max(1, args.users))
+        await virtual_user(100000 + index, api, bot, args, latencies, errors)
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(start_user(i) for i in range(args.users)))
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    await app.updater.stop()
+    await app.stop()
+    await app.post_stop(app)
+    stats = bot.collect_stats()
+    await app.shutdown()
+    await app.post_shutdown(app)
+    await api.stop()
+
+    import sqlite3
+    with sqlite3.connect(os.environ["DB_PATH"]) as conn:
+        listings = conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{args.users} users x {len(SALE_FLOW)} steps: {total} answered updates in {elapsed:.1f}s "
+          f"({total / elapsed:,.0f} updates/s), {sum(errors.values())} timeouts, "
+          f"{listings} listings submitted; process CPU {cpu / elapsed:.0%} of one core")
+    print(f"{'handler':<36} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'timeouts':>8}")
+    for name in sorted(latencies, key=lambda n: -pct(latencies[n], 95)):
+        values = latencies[name]
+        print(f"{name:<36} {len(values):>6} {pct(values, 50):>8.1f} {pct(values, 95):>8.1f} "
+              f"{pct(values, 99):>8.1f} {max(values) * 1000:>8.1f} {errors.get(name, 0):>8}")
+    print("Bot API calls:", dict(api.calls.most_common()))
+    print("updates:", stats["updates"])
+    print("outbound:", stats["outbound"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="end-to-end sale flow load test against a fake Bot API")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which users start")
+    parser.add_argument("--api-latency", type=float, nargs=2, default=[20, 60], metavar=("MIN", "MAX"),
+                        help="fake Bot API round trip, ms")
+    parser.add_argument("--settle", type=float, default=30, help="ms of quiet before the next step")
+    parser.add_argument("--think", type=float, default=0, help="ms a user waits between steps")
+    parser.add_argument("--step-timeout", type=float, default=15, help="seconds")
+    parser.add_argument("--telegram-limits", action="store_true",
+                        help="keep the real outbound rate limits (30 msg/s global, 1 msg/s per chat)")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,66 @@
+# benchmarks/bench_form_render.py
+# نمایش فرم کامل (show_entered_data، final_submit، تأیید پلتفرم): رندر کامل از dict ساده در برابر
+# کش SaleForm، هم برای نمایش دوباره فرم تغییرنکرده و هم بعد از ویرایش یک فیلد
+#
+#   python -m benchmarks.bench_form_render --renders 200000
+import argparse
+import os
+import time
+
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+from test_bot import FORM, generate_complete_form_display, generate_temp_form_text  # noqa: E402
+from session import SaleForm  # noqa: E402
+
+# فرم کاملاً پر شده (همه فیلدهای اسکیما)
+FULL_FORM = {
+    "platform": "پلی استیشن - ظرفیت 3",
+    "email_type": "Gmail",
+    "web_app": "وب باز",
+    "coin_account": "245.000",
+    "trade_players": "Mbappé Pedri Bellingham",
+    "trade_players_value": "400.000",
+    "non_trade_players": "دیونگ",
+    "non_trade_players_value": "100.000",
+    "match_earning": "25.000",
+    "season_level": "35",
+    "division_rivals": "Elite",
+    "sale_method": "ثبت آیدی خودم",
+    "user_contact": "@seller_username",
+    "purchase_link": "https://t.me/rank1ac_bot?start=buy_123456789",
+    "price": "5.000.000",
+    "team_photos": ["P1", "P2", "P3"],
+}
+
+
+def measure(name, renders, render, form, edit=None):
+    started = time.perf_counter()
+    for i in range(renders):
+        if edit is not None:
+            edit(form, i)
+        render(form)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<44} {renders / elapsed:12,.0f} renders/s  {elapsed / renders * 1e6:7.2f} µs/render")
+
+
+def edit_price(form, i):
+    form["price"] = f"{5_000_000 + i:,}".replace(",", ".")
+
+
+def main(args):
+    missing = [f.key for f in FORM.order if f.key not in FULL_FORM]
+    assert not missing, f"FULL_FORM is missing schema fields: {missing}"
+    for render in (generate_temp_form_text, generate_complete_form_display):
+        assert render(SaleForm(FULL_FORM)) == render(dict(FULL_FORM)), render.__name__
+
+    for label, render in (("temp", generate_temp_form_text), ("complete", generate_complete_form_display)):
+        measure(f"{label}: full render (dict)", args.renders, render, dict(FULL_FORM))
+        measure(f"{label}: cached, unchanged form", args.renders, render, SaleForm(FULL_FORM))
+        measure(f"{label}: full render + 1 field edit (dict)", args.renders, render, dict(FULL_FORM), edit_price)
+        measure(f"{label}: cached + 1 field edit", args.renders, render, SaleForm(FULL_FORM), edit_price)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="form display rendering: full rebuild vs SaleForm cache")
+    parser.add_argument("--renders", type=int, default=200000)
+    main(parser.parse_args())
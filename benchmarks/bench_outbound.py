@@ -0,0 +1,86 @@
+# benchmarks/bench_outbound.py
+# صف خروجی در برابر یک Bot API ساختگی: انفجار پیام از چند اولویت، بررسی سقف سراسری و هر چت،
+# تاخیر هر اولویت و بازیابی از RetryAfter
+#
+#   python -m benchmarks.bench_outbound --messages 300 --chats 60 --retry-after-every 100
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from telegram.error import RetryAfter
+
+from outbound import OutboundQueue, PRIORITY_ADMIN, PRIORITY_BROADCAST, PRIORITY_NAMES, PRIORITY_REPLY
+
+
+def max_in_window(times, window):
+    times = sorted(times)
+    best = start = 0
+    for end, t in enumerate(times):
+        while t - times[start] >= window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+async def run(args):
+    rnd = random.Random(3)
+    queue = OutboundQueue(global_rate=args.global_rate, chat_rate=args.chat_rate, chat_burst=args.chat_burst,
+                          max_in_flight=args.in_flight)
+    await queue.initialize()
+    sent_at = defaultdict(list)
+    calls = 0
+
+    async def fake_send(chat_id):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(rnd.uniform(0.02, 0.08))  # تاخیر شبکه
+        if args.retry_after_every and calls % args.retry_after_every == 0:
+            raise RetryAfter(1)
+        sent_at[chat_id].append(time.monotonic())
+        return True
+
+    latencies = defaultdict(list)
+
+    async def submit(chat_id, priority):
+        t = time.monotonic()
+        await queue.process_request(fake_send, (chat_id,), {}, "sendMessage", {"chat_id": chat_id}, priority)
+        latencies[priority].append(time.monotonic() - t)
+
+    # همه با هم: اکثراً ارسال انبوه، بعد اعلان‌های ادمین، و پاسخ‌های کاربر که دیرتر می‌رسند
+    jobs = []
+    for i in range(args.messages):
+        priority = rnd.choices([PRIORITY_BROADCAST, PRIORITY_ADMIN, PRIORITY_REPLY], [7, 1, 2])[0]
+        chat_id = 999 if priority == PRIORITY_ADMIN else rnd.randint(1, args.chats)
+        jobs.append(submit(chat_id, priority))
+    started = time.monotonic()
+    await asyncio.gather(*jobs)
+    elapsed = time.monotonic() - started
+    stats = queue.stats()
+    await queue.shutdown()
+
+    all_sent = [t for times in sent_at.values() for t in times]
+    print(f"{len(all_sent)} messages in {elapsed:.1f}s ({len(all_sent) / elapsed:.1f} msg/s), "
+          f"{queue.retry_after} RetryAfter, {queue.failed} failed")
+    print(f"max sends in any 1s window: global {max_in_window(all_sent, 1.0)} (limit {args.global_rate:g}), "
+          f"per chat {max(max_in_window(times, 1.0) for times in sent_at.values())} "
+          f"(limit {args.chat_rate:g}/s, burst {args.chat_burst:g})")
+    for priority, name in PRIORITY_NAMES.items():
+        values = latencies[priority]
+        if values:
+            print(f"  {name:<10} n={len(values):4d}  mean={statistics.fmean(values):6.2f}s  max={max(values):6.2f}s")
+    print(stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="outbound queue against a fake Bot API")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--chats", type=int, default=60)
+    parser.add_argument("--global-rate", type=float, default=30)
+    parser.add_argument("--chat-rate", type=float, default=1)
+    parser.add_argument("--chat-burst", type=float, default=3)
+    parser.add_argument("--in-flight", type=int, default=16)
+    parser.add_argument("--retry-after-every", type=int, default=100, help="fake a 429 every N calls (0: never)")
+    asyncio.run(run(parser.parse_args()))
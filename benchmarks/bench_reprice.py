@@ -0,0 +1,72 @@
+# benchmarks/bench_reprice.py
+# توان عملیاتی قیمت‌گذاری دوباره روی جدول بزرگ listings + اوج حافظه پایتون
+#
+#   python -m benchmarks.bench_reprice --rows 1000000 --batch-size 5000
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import config
+import db
+import reprice
+
+
+def fill(rows, seed=1):
+    rnd = random.Random(seed)
+    divisions = ["Elite", "1", "3", "5", "8", "10", ""]
+    now = "2026-01-01T00:00:00"
+
+    def gen():
+        for i in range(rows):
+            form = {
+                "platform": "پلی استیشن - کامل",
+                "web_app": rnd.choice(["وب باز", "وب بسته"]),
+                "coin_account": str(rnd.randint(0, 5_000_000)),
+                "trade_players": "Mbappe Pedri",
+                "trade_players_value": str(rnd.randint(0, 3_000_000)),
+                "non_trade_players_value": str(rnd.randint(0, 1_000_000)),
+                "match_earning": str(rnd.randint(0, 60000)),
+                "season_level": str(rnd.randint(0, 60)),
+                "division_rivals": rnd.choice(divisions),
+                "team_photos": ["AgACAgQAAxkBAAI" + "x" * 60] * 3,
+            }
+            status = "active" if i % 10 else "rejected"
+            data_json = json.dumps(form, ensure_ascii=False)
+            yield (i % 50000, now, now, data_json, None, status, None, None, None) + db.listing_columns(data_json)
+
+    with db.get_pool().transaction() as conn:
+        conn.executemany(db.SQL_INSERT_LISTING, gen())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bulk repricing throughput")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=reprice.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = os.path.join(tmp, "bench.sqlite3")
+        db.init_db()
+        try:
+            t0 = time.perf_counter()
+            fill(args.rows)
+            print(f"filled {args.rows} listings in {time.perf_counter() - t0:.1f}s")
+
+            print(reprice.reprice_listings(args.batch_size))
+
+            # اجرای دوم با tracemalloc (کندتر) فقط برای اوج حافظه
+            tracemalloc.start()
+            reprice.reprice_listings(args.batch_size)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"python heap peak during reprice: {peak / 2**20:.1f} MiB (batch size {args.batch_size})")
+
+            with db.get_pool().connection() as conn:
+                priced = conn.execute("SELECT COUNT(*) FROM listings WHERE priced_at IS NOT NULL").fetchone()[0]
+            print(f"rows with priced_at: {priced}")
+        finally:
+            db.close_pool()
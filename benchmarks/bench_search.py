@@ -0,0 +1,181 @@
+# benchmarks/bench_search.py
+# تاخیر جستجوی خریدار روی جدول مصنوعی listings (پیش‌فرض 500 هزار آگهی)
+# صفحه اول و صفحه‌های عمیق keyset با ایندکس‌های پوششی، در برابر اسکن data_json قدیمی
+# و جستجوی نام بازیکن با FTS5 در برابر LIKE
+#
+#   python -m benchmarks.bench_search --rows 500000 --queries 2000
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import config
+import db
+
+DIVISIONS = ["elite"] + [str(i) for i in range(1, 11)]
+PLAYERS = [
+    "Mbappé", "Pedri", "De Jong", "Vinicius", "Haaland", "Messi", "Ronaldo", "Bellingham", "Salah", "Kane",
+    "امباپه", "پدری", "دیونگ", "وینیسیوس", "هالند", "مسی", "رونالدو", "بلینگهام", "صلاح", "کین",
+]
+PLAYER_QUERIES = ["mbappe", "امباپه", "halan", "رونالد", "bellingham", "مسی", "vini", "de jong", "صلاح", "kane"]
+
+
+def fill(rows, seed=1):
+    rnd = random.Random(seed)
+    platforms = [(main, sub, name) for main, subs in config.PLATFORM_CONFIG.items() for sub, name in subs.items()]
+    now = "2026-01-01T00:00:00"
+
+    def gen():
+        for i in range(rows):
+            main, sub, name = rnd.choice(platforms)
+            form = {
+                "platform": name,
+                "platform_details": {"main_platform": main, "sub_platform": sub},
+                "email_type": rnd.choice(list(config.EMAIL_TYPES.values())),
+                "web_app": rnd.choice(list(config.WEB_APP_TYPES.values())),
+                "coin_account": str(rnd.randint(0, 5_000_000)),
+                "division_rivals": rnd.choice(DIVISIONS).title(),
+                "season_level": str(rnd.randint(0, 60)),
+                "price": str(rnd.randint(1, 400) * 100_000),
+                "trade_players": " ".join(rnd.sample(PLAYERS, 2)),
+                "non_trade_players": rnd.choice(PLAYERS),
+            }
+            status = "active" if i % 5 else rnd.choice(["rejected", "expired"])
+            data_json = json.dumps(form, ensure_ascii=False)
+            yield (i % 50000, now, now, data_json, None, status, None, None, None) + db.listing_columns(data_json)
+
+    with db.get_pool().transaction() as conn:
+        conn.executemany(db.SQL_INSERT_LISTING, gen())
+
+
+def random_filters(rnd):
+    filters = {}
+    if rnd.random() < 0.6:
+        main = rnd.choice(list(config.PLATFORM_CONFIG))
+        filters["platform_main"] = main
+        if rnd.random() < 0.7:
+            filters["platform_sub"] = rnd.choice(list(config.PLATFORM_CONFIG[main]))
+    if rnd.random() < 0.5:
+        low, high = rnd.choice(config.SEARCH_PRICE_RANGES)
+        filters["min_price"], filters["max_price"] = low, high
+    if rnd.random() < 0.3:
+        filters["division"] = rnd.choice(DIVISIONS)
+    if rnd.random() < 0.3:
+        filters["web_app"] = rnd.choice(list(config.WEB_APP_TYPES.values()))
+    if rnd.random() < 0.3:
+        filters["email_type"] = rnd.choice(list(config.EMAIL_TYPES.values()))
+    return filters
+
+
+def legacy_scan(conn, filters, limit):
+    """مسیر بدون ستون ساخت‌یافته: خواندن همه آگهی‌های فعال و json.loads هر ردیف"""
+    out = []
+    for listing_id, data_json in conn.execute("SELECT id, data_json FROM listings WHERE +status = 'active'"):
+        form = json.loads(data_json)
+        details = form.get("platform_details", {})
+        price = int(form.get("price", 0))
+        if filters.get("platform_main") and details.get("main_platform") != filters["platform_main"]:
+            continue
+        if filters.get("platform_sub") and details.get("sub_platform") != filters["platform_sub"]:
+            continue
+        if filters.get("min_price") is not None and price < filters["min_price"]:
+            continue
+        if filters.get("max_price") is not None and price >= filters["max_price"]:
+            continue
+        if filters.get("division") and form.get("division_rivals", "").lower() != filters["division"]:
+            continue
+        if filters.get("web_app") and form.get("web_app") != filters["web_app"]:
+            continue
+        if filters.get("email_type") and form.get("email_type") != filters["email_type"]:
+            continue
+        out.append((price, listing_id))
+    out.sort()
+    return out[:limit]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, int(round(p / 100 * (len(values) - 1)))))]
+
+
+def report(name, samples):
+    ms = [x * 1000 for x in samples]
+    print(f"{name:<22} n={len(ms):5d}  p50={percentile(ms, 50):7.3f}ms  p99={percentile(ms, 99):7.3f}ms  "
+          f"mean={statistics.fmean(ms):7.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="buyer search latency on a synthetic listings table")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=20, help="keyset pages walked per deep query")
+    parser.add_argument("--legacy-queries", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=config.SEARCH_PAGE_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = os.path.join(tmp, "bench.sqlite3")
+        db.init_db()
+        try:
+            t0 = time.perf_counter()
+            fill(args.rows)
+            print(f"filled {args.rows} listings in {time.perf_counter() - t0:.1f}s")
+            rnd = random.Random(7)
+            limit = args.page_size + 1
+
+            with db.get_pool().connection() as conn:
+                plans = set()
+                for _ in range(200):
+                    sql, params = db.build_search_query(**random_filters(rnd), limit=limit)
+                    plans.update(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+                print("query plans seen:")
+                for plan in sorted(plans):
+                    print("  ", plan)
+
+            first, deep = [], []
+            for _ in range(args.queries):
+                filters = random_filters(rnd)
+                t = time.perf_counter()
+                rows = db.search_listings(**filters, limit=limit)
+                first.append(time.perf_counter() - t)
+                for _ in range(args.pages):
+                    if len(rows) < limit:
+                        break
+                    last = rows[args.page_size - 1]
+                    t = time.perf_counter()
+                    rows = db.search_listings(**filters, after=(last[1], last[0]), limit=limit)
+                    deep.append(time.perf_counter() - t)
+            report("indexed first page", first)
+            report("indexed next pages", deep)
+
+            legacy = []
+            with db.get_pool().connection() as conn:
+                for _ in range(args.legacy_queries):
+                    filters = random_filters(rnd)
+                    t = time.perf_counter()
+                    legacy_scan(conn, filters, limit)
+                    legacy.append(time.perf_counter() - t)
+            report("data_json scan", legacy)
+
+            fts = []
+            for _ in range(args.queries):
+                text = rnd.choice(PLAYER_QUERIES)
+                t = time.perf_counter()
+                db.search_players(text, limit=limit)
+                fts.append(time.perf_counter() - t)
+            report("player FTS (bm25)", fts)
+
+            like = []
+            with db.get_pool().connection() as conn:
+                for _ in range(args.legacy_queries):
+                    text = rnd.choice(PLAYER_QUERIES)
+                    t = time.perf_counter()
+                    conn.execute("SELECT id FROM listings WHERE status = 'active' AND data_json LIKE ? LIMIT ?",
+                                 (f"%{text}%", limit)).fetchall()
+                    like.append(time.perf_counter() - t)
+            report("player LIKE scan", like)
+        finally:
+            db.close_pool()
@@ -0,0 +1,72 @@
+# benchmarks/bench_session_memory.py
+# حافظه هر نشست فروش: هفت dict قدیمی در برابر SaleSession با __slots__
+#
+#   python -m benchmarks.bench_session_memory --sessions 100000
+import argparse
+import gc
+import tracemalloc
+
+from session import SaleSession, STEP_NUMBER
+
+
+def make_form(i):
+    return {
+        'platform': "پلی استیشن - ظرفیت 3",
+        'platform_details': {'main_platform': 'ps', 'sub_platform': 'ps3'},
+        'email_type': "Gmail",
+        'web_app': "وب باز",
+        'coin_account': str(200000 + i),
+        'trade_players': "Mbappe Pedri",
+        'trade_players_value': str(400000 + i),
+        'match_earning': str(1200 + i),
+    }
+
+
+def build_legacy(n):
+    # چیدمان قبل از SaleSession: وضعیت یک کاربر در چند dict پخش شده بود
+    user_form_state, platform_states, number_states = {}, {}, {}
+    char_states, division_states, photo_states, player_value_states = {}, {}, {}, {}
+    for uid in range(n):
+        user_form_state[uid] = {"awaiting_field": None, "form": make_form(uid), "pending_listing_id": None}
+        platform_states[uid] = {'step': 'select_subplatform', 'platform': 'ps'}
+        number_states[uid] = {'field': 'coin_account', 'max_digits': 8, 'only_numbers': True}
+    return (user_form_state, platform_states, char_states, number_states,
+            division_states, photo_states, player_value_states)
+
+
+def build_sessions(n):
+    sessions = {}
+    for uid in range(n):
+        sessions[uid] = SaleSession(form=make_form(uid), step=STEP_NUMBER,
+                                    pending_field='coin_account', platform='ps')
+    return sessions
+
+
+def build_forms_only(n):
+    return {uid: make_form(uid) for uid in range(n)}
+
+
+def measure(builder, n):
+    gc.collect()
+    tracemalloc.start()
+    obj = builder(n)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    gc.collect()
+    return size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="per-session memory: legacy dicts vs SaleSession")
+    parser.add_argument("--sessions", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.sessions
+
+    forms = measure(build_forms_only, n)
+    legacy = measure(build_legacy, n)
+    slotted = measure(build_sessions, n)
+    print(f"sessions: {n}")
+    print(f"legacy dicts : {legacy / n:7.1f} B/session total, {(legacy - forms) / n:6.1f} B/session state overhead")
+    print(f"SaleSession  : {slotted / n:7.1f} B/session total, {(slotted - forms) / n:6.1f} B/session state overhead")
+    print(f"saved        : {(legacy - slotted) / n:7.1f} B/session ({(legacy - slotted) / 2**20:.1f} MiB for {n})")
@@ -0,0 +1,225 @@
+# benchmarks/bench_startup.py
+# زمان شروع سرد (مثل بیدار شدن سرویس خوابیده Render): هر اجرا یک پروسه پایتون تازه است.
+# - مراحل: import config، import test_bot، init_db (دیتابیس به‌روز و دیتابیس تازه)، build_application
+# - اولین آپدیت: اجرای واقعی ربات با buildCommand/startCommand همان نسخه در render.yaml (polling و
+#   webhook) در برابر FakeBotAPI تا اولین پاسخ ربات به یک /start که از قبل منتظر است
+# با --record نتیجه همراه نسخه git در startup_history.jsonl (فایل محلی همین ماشین، خارج از git) اضافه می‌شود
+# تا نسخه‌ها روی یک ماشین مقایسه شوند.
+#
+#   python -m benchmarks.bench_startup --runs 7 --record
+#   python -m benchmarks.bench_startup --tree /tmp/old_checkout --record   # نسخه قبلی (git worktree)
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_bot_api import FakeBotAPI
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY = os.path.join(REPO, "benchmarks", "startup_history.jsonl")
+TOKEN = "123456:FAKE-TOKEN"
+USER_ID = 424242
+
+# هر مرحله در پروسه تازه؛ خروجی JSON با زمان (ms) از شروع مفسر
+PHASES_SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {tree!r})
+import config
+t1 = time.perf_counter()
+import test_bot
+t2 = time.perf_counter()
+test_bot.init_db()
+t3 = time.perf_counter()
+test_bot.build_application()
+t4 = time.perf_counter()
+print(json.dumps({{"import_config": (t1 - t0) * 1000, "import_test_bot": (t2 - t1) * 1000,
+                  "init_db": (t3 - t2) * 1000, "build_application": (t4 - t3) * 1000}}))
+"""
+
+
+def child_env(db_path: str, **extra) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": TOKEN,
+        "DB_PATH": db_path,
+        "ADMIN_USER_ID": "999999999",
+        "CHANNEL_USERNAME": "@fake_channel",
+        "CONFIG_FILE": "",
+        # هر شروع سرد روی Render یک container تازه از خروجی build است: bytecode جدیدی باقی نمی‌ماند
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    env.update(extra)
+    return env
+
+
+def render_commands(tree: str):
+    """(start command، آیا build مرحله compileall دارد) از render.yaml همان نسخه"""
+    start, build = "python test_bot.py", ""
+    with open(os.path.join(tree, "render.yaml"), encoding="utf-8") as f:
+        for line in f:
+            key, _, value = line.strip().partition(":")
+            if key == "startCommand":
+                start = value.strip()
+            elif key == "buildCommand":
+                build = value.strip()
+    argv = shlex.split(start)
+    if argv[0].startswith("python"):
+        argv[0] = sys.executable
+    return argv, "compileall" in build
+
+
+def run_phases(tree: str, db_path: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", PHASES_SCRIPT.format(tree=tree)], cwd=tree,
+                         env=child_env(db_path), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def start_update(message_id: int) -> dict:
+    user = {"id": USER_ID, "is_bot": False, "first_name": "Cold", "username": "cold_start"}
+    return {"message": {"message_id": message_id, "date": int(time.time()), "text": "/start",
+                        "chat": {"id": USER_ID, "type": "private"}, "from": user,
+                        "entities": [{"type": "bot_command", "offset": 0, "length": 6}]}}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def post_update(port: int, path: str, secret: str, update: dict, deadline: float):
+    """مثل Telegram: تا وقتی webhook جواب 200 ندهد دوباره می‌فرستد"""
+    body = json.dumps(update).encode()
+    request = (f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+               f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\nContent-Length: {len(body)}\r\n"
+               f"Connection: close\r\n\r\n").encode() + body
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.002)
+            continue
+        writer.write(request)
+        await writer.drain()
+        status = await reader.readline()
+        writer.close()
+        if b" 200 " in status:
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError("webhook never accepted the update")
+
+
+async def first_update(tree: str, start_argv: list, db_path: str, mode: str, timeout: float) -> float:
+    """ms از اجرای startCommand تا اولین پیام ربات به کاربر"""
+    api = FakeBotAPI(TOKEN)
+    await api.start()
+    inbox = api.subscribe(USER_ID)
+    extra = {"BOT_API_BASE_URL": api.base_url, "BOT_MODE": mode}
+    port = secret = None
+    if mode == "polling":
+        api.push_update(start_update(1))
+    else:
+        port, secret = free_port(), "bench-secret"
+        extra.update({"WEBHOOK_URL": f"http://127.0.0.1:{port}", "PORT": str(port), "WEBHOOK_SECRET": secret,
+                      "WEBHOOK_LISTEN": "127.0.0.1", "WEBHOOK_PATH": "/telegram"})
+    started = time.perf_counter()
+    proc = subprocess.Popen(start_argv, cwd=tree, env=child_env(db_path, **extra),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if mode == "webhook":
+            # Telegram آپدیت را به webhook ثبت‌شده از اجرای قبلی می‌فرستد
+            await post_update(port, "/telegram", secret, dict(start_update(1), update_id=1), started + timeout)
+        await asyncio.wait_for(inbox.get(), timeout - (time.perf_counter() - started))
+        return (time.perf_counter() - started) * 1000
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            await asyncio.to_thread(proc.wait, 15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        await api.stop()
+
+
+def git_version(tree: str) -> str:
+    try:
+        head = subprocess.run(["git", "log", "-1", "--format=%h %s"], cwd=tree, capture_output=True,
+                              text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=tree,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{head} (modified)" if dirty else head
+
+
+def median(values):
+    return statistics.median(values) if values else 0.0
+
+
+async def main(args):
+    tree = os.path.abspath(args.tree)
+    start_argv, compiled = render_commands(tree)
+    # مثل build روی Render: bytecode ماژول‌ها از قبل ساخته شده یا نه
+    shutil.rmtree(os.path.join(tree, "__pycache__"), ignore_errors=True)
+    if compiled:
+        subprocess.run([sys.executable, "-m", "compileall", "-q", tree], check=True)
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    ready_db = os.path.join(workdir, "ready.sqlite3")
+    run_phases(tree, ready_db)   # دیتابیس با schema به‌روز برای اجراهای بعدی
+
+    samples = {}
+
+    def add(name, value):
+        samples.setdefault(name, []).append(value)
+
+    for i in range(args.runs):
+        db_path = os.path.join(workdir, f"run{i}.sqlite3")
+        shutil.copy(ready_db, db_path)
+        for name, value in run_phases(tree, db_path).items():
+            add(name, value)
+        fresh = run_phases(tree, os.path.join(workdir, f"fresh{i}.sqlite3"))
+        add("init_db_fresh", fresh["init_db"])
+        for mode in args.modes:
+            shutil.copy(ready_db, db_path)
+            add(f"first_update_{mode}", await first_update(tree, start_argv, db_path, mode, args.timeout))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {name: round(median(values), 1) for name, values in samples.items()}
+    print(f"{git_version(tree)}  (median of {args.runs} cold starts, ms; start: {shlex.join(start_argv[1:])})")
+    for name, value in result.items():
+        print(f"  {name:<22} {value:8.1f}   [{min(samples[name]):.1f} .. {max(samples[name]):.1f}]")
+
+    if args.record:
+        entry = {"version": git_version(tree), "date": time.strftime("%Y-%m-%d"),
+                 "python": sys.version.split()[0], "runs": args.runs, "ms": result}
+        with open(HISTORY, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    if os.path.exists(HISTORY):
+        print("\nhistory (first_update / import_test_bot / build_application, ms):")
+        with open(HISTORY, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                ms = entry["ms"]
+                firsts = " ".join(f"{m}={ms[k]:.0f}" for m in ("polling", "webhook")
+                                  if (k := f"first_update_{m}") in ms)
+                print(f"  {entry['date']} {entry['version'][:48]:<48} {firsts}  "
+                      f"import={ms.get('import_test_bot', 0):.0f} build={ms.get('build_application', 0):.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="cold start time: import, init_db, build and first update")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--tree", default=REPO, help="checkout to measure (e.g. a git worktree of an older commit)")
+    parser.add_argument("--modes", nargs="+", default=["polling", "webhook"], choices=["polling", "webhook"])
+    parser.add_argument("--timeout", type=float, default=30, help="seconds until the first reply")
+    parser.add_argument("--record", action="store_true", help=f"append the result to {os.path.relpath(HISTORY, REPO)}")
+    asyncio.run(main(parser.parse_args()))
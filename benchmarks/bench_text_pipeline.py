@@ -0,0 +1,80 @@
+# benchmarks/bench_text_pipeline.py
+# پیام/ثانیه در مسیر متن: پرش مستقیم با STEP_TEXT_HANDLERS در برابر بررسی پی‌درپی شش هندلر
+# (ارسال پیام به تلگرام با یک coroutine خالی جایگزین شده تا فقط هزینه خود ربات سنجیده شود)
+#
+#   python -m benchmarks.bench_text_pipeline --messages 50000
+import argparse
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+import test_bot  # noqa: E402
+from session import STEP_CHARS, STEP_DIVISION, STEP_NUMBER, STEP_PLAYER_VALUE  # noqa: E402
+
+
+async def _noop_reply(*args, **kwargs):
+    return None
+
+
+def make_update(user_id, text):
+    message = SimpleNamespace(text=text, reply_text=_noop_reply)
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user_id), message=message)
+
+
+# ورودی‌هایی که در هر مرحله معتبر هستند؛ پس از هر پیام دوباره منتظر همان مرحله می‌شویم
+CASES = [
+    (STEP_NUMBER, "coin_account", "245000"),
+    (STEP_CHARS, "trade_players", "Mbappe Pedri"),
+    (STEP_PLAYER_VALUE, "trade_players_value", "400000"),
+    (STEP_DIVISION, "division_rivals", "Elite"),
+]
+
+
+async def legacy_dispatch(update, context):
+    """شبیه‌سازی مسیر قبلی: هر هندلر نشست و متن را دوباره می‌خواند تا بفهمد پیام مال او نیست."""
+    user_id = update.effective_user.id
+    manual_state = context.user_data.get('manual_form')
+    if manual_state and manual_state.get('step') == 'awaiting_form':
+        return
+    for step, handler in (
+        (STEP_PLAYER_VALUE, test_bot.handle_field_input),
+        (STEP_NUMBER, test_bot.handle_field_input),
+        (STEP_CHARS, test_bot.handle_field_input),
+        (STEP_DIVISION, test_bot.handle_field_input),
+        (test_bot.STEP_PHOTOS, test_bot.handle_photo_upload_message),
+    ):
+        session = await test_bot.get_session(user_id)
+        text = (update.message.text or "").strip()
+        if session and session.step == step:
+            await handler(update, context, session, text)
+            return
+
+
+async def run(dispatch, messages, users):
+    context = SimpleNamespace(user_data={}, bot=None)
+    updates = []
+    for i in range(messages):
+        step, field, text = CASES[i % len(CASES)]
+        updates.append((i % users, step, field, make_update(i % users, text)))
+    t0 = time.perf_counter()
+    for user_id, step, field, update in updates:
+        (await test_bot.open_session(user_id)).expect(step, field)
+        await dispatch(update, context)
+    return messages / (time.perf_counter() - t0)
+
+
+async def main(args):
+    for name, dispatch in (("legacy probes", legacy_dispatch), ("step dispatch", test_bot.text_message_handler)):
+        await run(dispatch, 2000, args.users)  # گرم کردن
+        rate = await run(dispatch, args.messages, args.users)
+        print(f"{name:<14} {rate:10.0f} msg/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="text path throughput: step dispatch vs sequential probes")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+# benchmarks/bench_updates.py
+# بار آزمایشی پردازش آپدیت‌ها: هر هندلر فرم کاربر را می‌خواند، منتظر یک فراخوانی شبکه ساختگی
+# (get_chat_member / send_photo) می‌ماند و فرم را می‌نویسد. پردازش ترتیبی پیش‌فرض، همزمان بدون
+# ترتیب و PerUserUpdateProcessor با چند سطح همزمانی مقایسه می‌شوند (توان عملیاتی، تداخل و ترتیب)
+#
+#   python -m benchmarks.bench_updates --updates 2000 --users 200 --taps 5
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+from telegram import Update
+from telegram.ext import SimpleUpdateProcessor
+
+from update_processor import PerUserUpdateProcessor
+
+
+def make_updates(args):
+    """هر کاربر چند کلیک پشت سر هم (taps)؛ کلیک‌های کاربران در هم تنیده"""
+    rnd = random.Random(5)
+    bursts = []
+    update_id = 0
+    for _ in range(args.updates // args.taps):
+        user_id = rnd.randint(1, args.users)
+        burst = []
+        for _ in range(args.taps):
+            update_id += 1
+            burst.append(Update.de_json({
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id), "chat_instance": "c", "data": "next_step",
+                    "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                },
+            }, None))
+        bursts.append(burst)
+    # کلیک‌های هر کاربر نزدیک هم می‌رسند ولی بین کاربران جابه‌جا می‌شوند
+    updates = []
+    while bursts:
+        index = rnd.randrange(min(len(bursts), 8))
+        updates.append(bursts[index].pop(0))
+        if not bursts[index]:
+            bursts.pop(index)
+    return updates
+
+
+async def run_case(name, processor, updates, latency):
+    forms = defaultdict(int)   # شمارنده مرحله فرم هر کاربر
+    arrival = {u.update_id: i for i, u in enumerate(updates)}
+    seen = defaultdict(list)   # ترتیب رسیدن آپدیت‌های پردازش‌شده هر کاربر
+    lost = 0
+    rnd = random.Random(7)
+
+    async def handler(update):
+        nonlocal lost
+        user_id = update.effective_user.id
+        step = forms[user_id]                           # خواندن SaleSession
+        await asyncio.sleep(rnd.uniform(*latency))      # get_chat_member / send_photo
+        if forms[user_id] != step:
+            lost += 1                                   # کلیک دیگری همزمان فرم را تغییر داده
+        forms[user_id] = step + 1
+        seen[user_id].append(arrival[update.update_id])
+
+    await processor.initialize()
+    started = time.perf_counter()
+    # مثل Application با concurrent_updates: برای هر آپدیت یک task به ترتیب رسیدن
+    await asyncio.gather(*(processor.process_update(u, handler(u)) for u in updates))
+    elapsed = time.perf_counter() - started
+    await processor.shutdown()
+
+    out_of_order = sum(1 for ids in seen.values() if ids != sorted(ids))
+    print(f"{name:<28} {elapsed:7.2f}s  {len(updates) / elapsed:8.1f} updates/s  "
+          f"lost writes={lost:<5d} users out of order={out_of_order}")
+    if isinstance(processor, PerUserUpdateProcessor):
+        print(f"{'':<28} {processor.stats()}")
+
+
+async def main(args):
+    updates = make_updates(args)
+    latency = (args.min_latency / 1000, args.max_latency / 1000)
+    # پردازش ترتیبی (پیش‌فرض ApplicationBuilder) روی همه آپدیت‌ها خیلی کند است؛ روی یک بخش اندازه‌گیری می‌شود
+    head = updates[:args.sequential_sample]
+    await run_case(f"sequential ({len(head)} upd)", SimpleUpdateProcessor(1), head, latency)
+    await run_case("concurrent, unordered (64)", SimpleUpdateProcessor(64), updates, latency)
+    for concurrency in args.concurrency:
+        await run_case(f"per-user ordered ({concurrency})", PerUserUpdateProcessor(max_concurrent=concurrency),
+                       updates, latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="update processing throughput and per-user ordering")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--taps", type=int, default=5, help="rapid taps per user burst")
+    parser.add_argument("--min-latency", type=float, default=20, help="ms")
+    parser.add_argument("--max-latency", type=float, default=80, help="ms")
+    parser.add_argument("--sequential-sample", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16, 64, 256])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+# benchmarks/bench_webhook.py
+# سرور webhook در برابر یک «Telegram» ساختگی محلی که آپدیت‌ها را با چند اتصال keep-alive پست می‌کند
+# (مثل max_connections در setWebhook). تاخیر HTTP و تاخیر تا رسیدن Update به صف پردازش
+#
+#   python -m benchmarks.bench_webhook --updates 20000 --connections 40
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from telegram import Update
+
+from webhook import WebhookServer
+
+SECRET = "bench-secret"
+PATH = "/telegram"
+
+
+def make_update(update_id: int) -> bytes:
+    user = {"id": 1000 + update_id % 500, "is_bot": False, "first_name": "U"}
+    return json.dumps({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 1700000000, "text": "💰 فروش اکانت",
+            "chat": {"id": user["id"], "type": "private"}, "from": user,
+        },
+    }).encode()
+
+
+def request(body: bytes, secret: str = SECRET, path: str = PATH, method: str = "POST") -> bytes:
+    return (f"{method} {path} HTTP/1.1\r\nHost: bot\r\nContent-Type: application/json\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def read_response(reader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    length = next(int(line.split(":")[1]) for line in lines if line.lower().startswith("content-length"))
+    if length:
+        await reader.readexactly(length)
+    return int(lines[0].split()[1])
+
+
+async def one_shot(port, data: bytes) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    status = await read_response(reader)
+    writer.close()
+    return status
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000
+
+
+async def run(args):
+    queue: asyncio.Queue = asyncio.Queue()
+    server = WebhookServer(PATH, SECRET, on_update=lambda data: queue.put_nowait(Update.de_json(data, None)),
+                           host="127.0.0.1", port=0)
+    await server.start()
+
+    # مسیرهای کمکی و رد secret اشتباه
+    checks = {
+        "healthz": await one_shot(server.port, request(b"", path="/healthz", method="GET")),
+        "readyz": await one_shot(server.port, request(b"", path="/readyz", method="GET")),
+        "bad secret": await one_shot(server.port, request(make_update(0), secret="wrong")),
+        "bad json": await one_shot(server.port, request(b"{nope")),
+    }
+    print("checks:", checks)
+
+    sent_at = {}
+    dispatch_latency = []
+
+    async def consumer():
+        for _ in range(args.updates):
+            update = await queue.get()
+            dispatch_latency.append(time.perf_counter() - sent_at[update.update_id])
+
+    bodies = [make_update(i) for i in range(1, args.updates + 1)]
+    http_latency = []
+
+    async def connection(worker: int):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        for i in range(worker, args.updates, args.connections):
+            update_id = i + 1
+            sent_at[update_id] = time.perf_counter()
+            writer.write(request(bodies[i]))
+            await writer.drain()
+            assert await read_response(reader) == 200
+            http_latency.append(time.perf_counter() - sent_at[update_id])
+        writer.close()
+
+    consuming = asyncio.create_task(consumer())
+    started = time.perf_counter()
+    await asyncio.gather(*(connection(w) for w in range(args.connections)))
+    await consuming
+    elapsed = time.perf_counter() - started
+    await server.stop()
+
+    print(f"{args.updates} updates over {args.connections} keep-alive connections in {elapsed:.2f}s "
+          f"({args.updates / elapsed:,.0f} updates/s)")
+    print(f"HTTP round trip    p50={pct(http_latency, 50):.3f}ms  p99={pct(http_latency, 99):.3f}ms  "
+          f"mean={statistics.fmean(http_latency) * 1000:.3f}ms")
+    print(f"post -> update_queue p50={pct(dispatch_latency, 50):.3f}ms  p99={pct(dispatch_latency, 99):.3f}ms")
+    print(server.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="webhook server against a local fake Telegram poster")
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=40)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,190 @@
+# benchmarks/fake_bot_api.py
+# جایگزین محلی Bot API برای آزمون بار: همان متدهایی که ربات استفاده می‌کند (getUpdates/setWebhook،
+# sendMessage، sendPhoto، sendMediaGroup، editMessageText، getChatMember، answerCallbackQuery و ...)
+# با تاخیر شبکه ساختگی. ربات با BOT_API_BASE_URL=<base_url> به آن وصل می‌شود.
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+
+class FakeBotAPI:
+    """سرور HTTP ساختگی Bot API.
+
+    - push_update آپدیت را در صف getUpdates می‌گذارد (long polling با timeout واقعی).
+    - هر فراخوانی که پیام به یک چت می‌فرستد/ویرایش می‌کند در صف subscribe(chat_id)
+      همان چت گذاشته می‌شود تا کاربر مجازی پاسخ ربات را ببیند.
+    - latency: بازه تاخیر هر فراخوانی (ثانیه)، مثل رفت‌وبرگشت واقعی به Telegram.
+    """
+
+    def __init__(self, token: str, host: str = "127.0.0.1", port: int = 0,
+                 latency: Tuple[float, float] = (0.0, 0.0), member_status: str = "member", seed: int = 1):
+        self.token = token
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.member_status = member_status
+        self._rnd = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: dict = {}
+        self._updates: List[dict] = []
+        self._update_ids = itertools.count(1)
+        self._new_update: Optional[asyncio.Event] = None
+        self._message_ids = itertools.count(1)
+        self._chats: Dict[str, asyncio.Queue] = {}
+        self.calls = Counter()
+        self.webhook_url = ""
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self._new_update = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=1024 * 1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            tasks = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    # ---------- سمت کاربر مجازی ----------
+    def push_update(self, update: dict) -> int:
+        update_id = next(self._update_ids)
+        update["update_id"] = update_id
+        self._updates.append(update)
+        self._new_update.set()
+        return update_id
+
+    def subscribe(self, chat_id) -> asyncio.Queue:
+        """صف (method, params, زمان) فراخوانی‌هایی که به این چت پیام می‌فرستند یا ویرایش می‌کنند"""
+        return self._chats.setdefault(str(chat_id), asyncio.Queue())
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, _, header_block = head.decode("latin-1").partition("\r\n")
+                target = request_line.split(" ")[1]
+                headers = {}
+                for line in header_block.split("\r\n"):
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                status, payload = await self._call(target, headers.get("content-type", ""), body)
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _call(self, target: str, content_type: str, body: bytes):
+        prefix, _, method = target.rpartition("/")
+        if prefix != f"/bot{self.token}":
+            return 401, {"ok": False, "error_code": 401, "description": "Unauthorized"}
+        params = self._parse(content_type, body)
+        self.calls[method] += 1
+        if method != "getUpdates" and self.latency[1] > 0:
+            await asyncio.sleep(self._rnd.uniform(*self.latency))
+        handler = getattr(self, f"_m_{method}", None)
+        result = await handler(params) if handler else True
+        chat_id = params.get("chat_id")
+        if chat_id is not None and str(chat_id) in self._chats:
+            self._chats[str(chat_id)].put_nowait((method, params, time.perf_counter()))
+        return 200, {"ok": True, "result": result}
+
+    @staticmethod
+    def _parse(content_type: str, body: bytes) -> dict:
+        if not body:
+            return {}
+        if content_type.startswith("application/json"):
+            return json.loads(body)
+        # PTB پارامترهای غیررشته‌ای (reply_markup، media، ...) را JSON شده و urlencoded می‌فرستد
+        params = {}
+        for key, value in parse_qsl(body.decode(), keep_blank_values=True):
+            if value[:1] in "{[":
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            params[key] = value
+        return params
+
+    def _message(self, params: dict, **fields) -> dict:
+        chat_id = params.get("chat_id", 0)
+        chat = {"id": int(chat_id), "type": "private"} if str(chat_id).lstrip("-").isdigit() \
+            else {"id": -100, "type": "channel", "username": str(chat_id).lstrip("@")}
+        message = {"message_id": int(params.get("message_id") or next(self._message_ids)),
+                   "date": int(time.time()), "chat": chat, "from": BOT_USER}
+        message.update(fields)
+        return message
+
+    # ---------- متدها ----------
+    async def _m_getMe(self, params):
+        return BOT_USER
+
+    async def _m_getUpdates(self, params):
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        timeout = float(params.get("timeout", 0) or 0)
+        # آپدیت‌های تأییدشده (کمتر از offset) حذف می‌شوند
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout > 0:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    async def _m_setWebhook(self, params):
+        self.webhook_url = params.get("url", "")
+        return True
+
+    async def _m_deleteWebhook(self, params):
+        self.webhook_url = ""
+        return True
+
+    async def _m_sendMessage(self, params):
+        return self._message(params, text=params.get("text", ""))
+
+    async def _m_editMessageText(self, params):
+        return self._message(params, text=params.get("text", ""))
+
+    async def _m_sendPhoto(self, params):
+        photo = {"file_id": str(params.get("photo")), "file_unique_id": "u", "width": 1, "height": 1}
+        return self._message(params, photo=[photo], caption=params.get("caption", ""))
+
+    async def _m_sendMediaGroup(self, params):
+        return [self._message(params, photo=[{"file_id": str(m.get("media")), "file_unique_id": "u",
+                                              "width": 1, "height": 1}])
+                for m in params.get("media", [])]
+
+    async def _m_getChatMember(self, params):
+        user = {"id": int(params.get("user_id", 0)), "is_bot": False, "first_name": "U"}
+        return {"status": self.member_status, "user": user}
+
+    async def _m_answerCallbackQuery(self, params):
+        return True
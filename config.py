@@ -1,171 +1,294 @@
-# config.py
-import os
-from dotenv import load_dotenv
-
-# بارگذاری متغیرهای محیطی
-load_dotenv()
-
-# تنظیمات اصلی ربات از محیط
-BOT_TOKEN = os.getenv('BOT_TOKEN', '8533919407:AAGOmunqGnbnJB0LGEGqG3ojtEvtSz9c4fw')
-CHANNEL_USERNAME = os.getenv('CHANNEL_USERNAME', '@rank1ac')
-ADMIN_USER_ID = os.getenv('ADMIN_USER_ID', '6583790637')
-SPECIAL_TESTER_ID = os.getenv('SPECIAL_TESTER_ID', '')
-DB_PATH = os.getenv('DB_PATH', 'bot_data.sqlite3')
-
-# بقیه تنظیمات بدون تغییر باقی می‌مانند...
-PRICE_CONFIG = {
-    # محاسبه ارزش کوین
-    "coin_value_unit": 625000,  # ارزش هر 100,000 کوین
-    "coin_divider": 100000,
-    
-    # محاسبه ارزش بازیکنان ترید
-    "trade_players_multiplier": 625000,
-    "trade_players_divider": 100000,
-    
-    # محاسبه ارزش بازیکنان آنترید
-    "nontrade_players_multiplier": 625000,
-    "nontrade_players_divider": 100000,
-    "nontrade_players_discount": 0.25,
-    
-    # وب اپ
-    "web_app_open_bonus": 1750000,  # برای 'وب باز'
-    "web_app_closed_bonus": 0,      # برای 'وب بسته'
-    
-    # تاثیر مچ ارنینگ
-    "match_earning_bonuses": {
-        (10000, 20000): 100000,
-        (20000, 40000): 150000,
-        (40000, float('inf')): 175000
-    },
-    
-    # تاثیر لول سیزن
-    "season_level_bonuses": {
-        (30, float('inf')): 150000,
-        (20, 30): 100000,
-        (0, 20): 0
-    },
-    
-    # تاثیر دیویژن رایوالز
-    "division_bonuses": {
-        'elite': 1000000,
-        '1': 600000,
-        '2': 400000,
-        '3': 400000,
-        '4': 300000,
-        '5': 250000,
-        '6': 250000,
-        '7': 250000,
-        '8': 200000,
-        '9': 200000,
-        '10': 200000
-    },
-    
-    # تنظیمات بازه قیمتی
-    "price_range_percent": 0.15,  # ±15%
-    
-    # سایر تنظیمات
-    "max_photos": 3,
-    "listing_expiry_days": 10,
-    "char_limits": {
-        "trade_players": 25,
-        "non_trade_players": 25
-    },
-    "digit_limits": {
-        "coin_account": 8,
-        "match_earning": 9,
-        "season_level": 2,
-        "price": 8
-    }
-}
-
-# تنظیمات متن‌ها (بدون تغییر)
-TEXTS = {
-    "welcome": "👋 کاربر ({}) خوش آمدید\n📖 خواهشمند است قبل از استفاده از ربات، راهنما را از منو انتخاب کرده و آن را مطالعه فرمایید.",
-    
-    "guide": """
-📖 از انتخاب شما سپاسگزاریم، هدف تیم ما ارائه یک مرجع خرید و فروش اکانت های بازی FC/FIFA با واسطه و یا بی واسطة برای کاربران است.
-1. شما می توانید یک اکانت رایگان برای فروش به مدت 10 روز ثبت کنید.
-2. می توانید با استفاده از ربات و یا فرم دستی اقدام به آگهی اکانت خود نمایید.
-3. برای استفاده از فرم دستی گزینه فروش اکانت را انتخاب کرده و سپس فرم دستی را بزنید.
-   فرم نمایش داده شده را کپی و اطلاعات آن را کامل کنید سپس برای ربات ارسال کنید.
-   بعد از آن ربات از شما می خواهد حداکثر 3 عکس از اکانت/تیم ارسال کنید.
-   در صورت اطمینان از اطلاعات ثبت شده روی گزینه ثبت نهایی کیلیک کنید.
-   اطلاعات شما برای ادمین ارسال و پس از تایید در کانال قرار خواهد گرفت.
-  
-   📌 مزایای فرم دستی:
-   • ممکن است راحت تر و سریعتر بنظر برسد.
-  
-   📌 معایب فرم دستی:
-   • عدم نمایش در فیلتر خریداران و فقط نمایش در کانال
-   • عدم وجود تخمین قیمت اکانت
-4. با استفاده از ربات اکانت شما در فیلتر خریداران قرار خواهد گرفت و گزینه تخمین قیمت قرار دارد.
-5. کاربر محترم در صورت مایل به ثبت آیدی شخصی خود هستید دقت نمایید که هرگونه سوءاستفاده و یا کلاه برداری های احتمالی بر عهده شخص شما می باشد و کانال رنک 1 هیچ مسئولیتی در این خصوص نخواهد داشت.
-6. در صورت انتخاب فروش از طریق کانال 10 درصد به مبلغ ثبت شده اکانت شما اضافه خواهد شد.
-7. در صورت انتخاب فروش از طریق کانال پس از پیدا شدن خریدار شما موظفید همه اطلاعات اکانت شما اعم از ایمیل ها پسوردها تاریخ های تولد کدهای پشتیبانی و هر آنچه نیاز باشد را در اختیار ما قرار دهید و پس از صحت اطلاعات ثبت شده توسط شما همزان با تحویل اکانت به خریدار مبلغ ثبت شده توسط شما واریز خواهد گردید.
-📞 برای اطلاعات بیشتر با پشتیبانی تماس بگیرید.
-""",
-
-    "sale_rules": """
-📋 کاربر گرامی لطفا این قوانین را مطالعه کنید:
-1. در صورت ثبت آیدی خودتان برای ارتباط مستقیم با خریداران، عواقب هر گونه سواستفاده و یا کلاه برداری های احتمالی بر عهده شما می باشد و کانال رنک 1 هیچ مسئولیتی در این موضوع ندارد.
-2. در صورت انتخاب فروش از طریق کانال، پس از واریز وجه توسط خریدار به حساب کانال، شما موظف به تحویل تمام اطلاعات اکانت اعم از ایمیل ها، پسوردها، تاریخ های تولد، کدهای پشتیبان و هر آنچه لازم باشد هستید. تیم ما پس از اطمینان از صحت اطلاعات درج شده توسط شما مبلغ ثبت شده شما را واریز خواهد کرد.
-3. به مبلغ ثبت شده شما 10 درصد مالیات بر ارزش افزوده اضافه خواهد شد.
-   مثال:
-   • مبلغ ثبت شده شما: 2,000,000 تومان
-   • مبلغی که در کانال ثبت خواهد شد: 2,200,000 تومان
-   • مبلغی که در صورت پیدا شدن خریدار برای شما واریز می شود: 2,000,000 تومان
-پس اگر قیمت شما نیاز به ویرایش دارد خواهشمند است قبل از ثبت نهایی نسبت به آن اقدام کنید.
-آیا با این شرایط موافق هستید؟
-""",
-
-    "manual_form_template": """📋 کاربر محترم:
-1. فرم را کپی کنید
-2. کامل کنید
-3. همین جا ارسال کنید
-1. پلتفرم:
-2. ظرفیت:
-3. نوع ایمیل:
-4. وب اپ:
-5. کوین اکانت:
-6. برترین بازیکنان ترید:
-7. ارزش بازیکنان ترید:
-8. برترین بازیکنان آنترید:
-9. ارزش بازیکنان آنترید:
-10. مچ ارنینگ:
-11. لول سیزن:
-12. دیویژن رایوالز:
-13. قیمت اکانت:
-14. نحوه فروش - مهم (حتما راهنما را مطالعه کنید):
-15. آیدی ارتباط (حتما راهنما را مطالعه کنید):"""
-}
-
-# بقیه تنظیمات بدون تغییر...
-PLATFORM_CONFIG = {
-    "ps": {
-        "ps3": "پلی استیشن - ظرفیت 3",
-        "ps2": "پلی استیشن - ظرفیت 2", 
-        "psfull": "پلی استیشن - کامل"
-    },
-    "xbox": {
-        "xboxhome": "ایکس باکس - هوم",
-        "xboxswitch": "ایکس باکس - سوویچ",
-        "xboxfull": "ایکس باکس - کامل"
-    },
-    "pc": {
-        "pcfull": "پی سی - بازی کامل",
-        "eaplay": "پی سی - EA Play Pro"
-    }
-}
-
-EMAIL_TYPES = {
-    "gmail": "Gmail",
-    "outlook": "Outlook", 
-    "hotmail": "Hotmail",
-    "yahoo": "Yahoo",
-    "other": "سایر"
-}
-
-WEB_APP_TYPES = {
-    "open": "وب باز",
-    "closed": "وب بسته"
-}
+# config.py
+import os
+
+# بارگذاری متغیرهای محیطی از .env (فقط اگر فایل باشد؛ python-dotenv در شروع سرد import نمی‌شود
+# و روی Render که متغیرها از داشبورد می‌آیند لازم نیست)
+if os.path.exists('.env') or os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# تنظیمات اصلی ربات از محیط
+BOT_TOKEN = os.getenv('BOT_TOKEN', '8533919407:AAGOmunqGnbnJB0LGEGqG3ojtEvtSz9c4fw')
+CHANNEL_USERNAME = os.getenv('CHANNEL_USERNAME', '@rank1ac')
+ADMIN_USER_ID = os.getenv('ADMIN_USER_ID', '6583790637')
+SPECIAL_TESTER_ID = os.getenv('SPECIAL_TESTER_ID', '')
+DB_PATH = os.getenv('DB_PATH', 'bot_data.sqlite3')
+# آدرس Bot API (برای Bot API محلی/self-hosted یا سرور ساختگی آزمون بار)
+BOT_API_BASE_URL = os.getenv('BOT_API_BASE_URL', 'https://api.telegram.org/bot')
+
+# حالت اجرا: polling یا webhook. در webhook آدرس عمومی از WEBHOOK_URL (یا RENDER_EXTERNAL_URL
+# که Render خودش می‌دهد) و پورت از PORT خوانده می‌شود؛ WEBHOOK_SECRET خالی یعنی تولید تصادفی در هر اجرا
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL') or os.getenv('RENDER_EXTERNAL_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('PORT', '8080'))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+# تنظیمات استخر اتصال دیتابیس
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+DB_TIMEOUT = float(os.getenv('DB_TIMEOUT', '5'))
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '8192'))
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))
+DB_CACHED_STATEMENTS = int(os.getenv('DB_CACHED_STATEMENTS', '256'))
+
+# حافظه وضعیت فرم‌ها (TTL بر حسب ثانیه، فاصله ذخیره در دیتابیس بر حسب ثانیه)
+STATE_MAX_ENTRIES = int(os.getenv('STATE_MAX_ENTRIES', '20000'))
+STATE_TTL_SECONDS = int(os.getenv('STATE_TTL_SECONDS', str(2 * 24 * 3600)))
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', '5'))
+
+# کش عضویت کانال (ثانیه): نتیجه «عضو» و «غیرعضو» جداگانه
+MEMBERSHIP_POSITIVE_TTL = float(os.getenv('MEMBERSHIP_POSITIVE_TTL', '600'))
+MEMBERSHIP_NEGATIVE_TTL = float(os.getenv('MEMBERSHIP_NEGATIVE_TTL', '30'))
+MEMBERSHIP_CACHE_SIZE = int(os.getenv('MEMBERSHIP_CACHE_SIZE', '50000'))
+
+# فایل تنظیمات بیرونی (JSON یا YAML) برای PRICE_CONFIG، TEXTS و PLATFORM_CONFIG که بدون ری‌استارت
+# بارگذاری می‌شود (config_reload.py): خالی یعنی غیرفعال؛ فاصله بررسی تغییر فایل (ثانیه، 0 فقط /reload_config)
+CONFIG_FILE = os.getenv('CONFIG_FILE', '')
+CONFIG_RELOAD_INTERVAL = float(os.getenv('CONFIG_RELOAD_INTERVAL', '30'))
+
+# کش تخمین قیمت (تعداد ورودی‌های متمایز قیمت‌گذاری؛ 0 یعنی بدون کش)
+PRICE_ESTIMATE_CACHE_SIZE = int(os.getenv('PRICE_ESTIMATE_CACHE_SIZE', '4096'))
+
+# صف خروجی Bot API: سقف سراسری (پیام در ثانیه)، هر چت خصوصی (در ثانیه + انفجار مجاز)،
+# هر گروه/کانال (در دقیقه)، ارسال همزمان و تعداد تلاش دوباره بعد از RetryAfter
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30'))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST', '3'))
+OUTBOUND_GROUP_PER_MINUTE = float(os.getenv('OUTBOUND_GROUP_PER_MINUTE', '20'))
+OUTBOUND_MAX_IN_FLIGHT = int(os.getenv('OUTBOUND_MAX_IN_FLIGHT', '16'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '3'))
+
+# پردازش همزمان آپدیت‌ها: حداکثر هندلر در حال اجرا و سقف آپدیت‌های پذیرفته‌شده (اجرا + منتظر)؛
+# آپدیت‌های یک کاربر همیشه یکی‌یکی و به ترتیب اجرا می‌شوند
+MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '32'))
+MAX_PENDING_UPDATES = int(os.getenv('MAX_PENDING_UPDATES', '1024'))
+
+# صف بررسی ادمین (/pending): تعداد آگهی در هر صفحه
+PENDING_PAGE_SIZE = int(os.getenv('PENDING_PAGE_SIZE', '10'))
+
+# حداکثر صبر (ثانیه) برای کامل شدن پست در حال ارسال کانال هنگام خاموش شدن ربات
+PUBLISH_STOP_TIMEOUT = float(os.getenv('PUBLISH_STOP_TIMEOUT', '30'))
+
+# منقضی کردن آگهی‌ها: فاصله اجرا (ثانیه)، اندازه و حداکثر تعداد دسته در هر اجرا،
+# و سقف پیام اطلاع‌رسانی به صاحب آگهی در ثانیه
+EXPIRY_SWEEP_INTERVAL = float(os.getenv('EXPIRY_SWEEP_INTERVAL', '600'))
+EXPIRY_SWEEP_BATCH_SIZE = int(os.getenv('EXPIRY_SWEEP_BATCH_SIZE', '500'))
+EXPIRY_SWEEP_MAX_BATCHES = int(os.getenv('EXPIRY_SWEEP_MAX_BATCHES', '10'))
+EXPIRY_NOTIFY_RATE = float(os.getenv('EXPIRY_NOTIFY_RATE', '20'))
+
+# جستجوی خریدار: تعداد آگهی در هر صفحه و بازه‌های قیمت (تومان، حد بالا باز)
+SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', '5'))
+SEARCH_PRICE_RANGES = [
+    (0, 5000000),
+    (5000000, 10000000),
+    (10000000, 20000000),
+    (20000000, None),
+]
+
+# بقیه تنظیمات بدون تغییر باقی می‌مانند...
+PRICE_CONFIG = {
+    # محاسبه ارزش کوین
+    "coin_value_unit": 625000,  # ارزش هر 100,000 کوین
+    "coin_divider": 100000,
+    
+    # محاسبه ارزش بازیکنان ترید
+    "trade_players_multiplier": 625000,
+    "trade_players_divider": 100000,
+    
+    # محاسبه ارزش بازیکنان آنترید
+    "nontrade_players_multiplier": 625000,
+    "nontrade_players_divider": 100000,
+    "nontrade_players_discount": 0.25,
+    
+    # وب اپ
+    "web_app_open_bonus": 1750000,  # برای 'وب باز'
+    "web_app_closed_bonus": 0,      # برای 'وب بسته'
+    
+    # تاثیر مچ ارنینگ
+    "match_earning_bonuses": {
+        (10000, 20000): 100000,
+        (20000, 40000): 150000,
+        (40000, float('inf')): 175000
+    },
+    
+    # تاثیر لول سیزن
+    "season_level_bonuses": {
+        (30, float('inf')): 150000,
+        (20, 30): 100000,
+        (0, 20): 0
+    },
+    
+    # تاثیر دیویژن رایوالز
+    "division_bonuses": {
+        'elite': 1000000,
+        '1': 600000,
+        '2': 400000,
+        '3': 400000,
+        '4': 300000,
+        '5': 250000,
+        '6': 250000,
+        '7': 250000,
+        '8': 200000,
+        '9': 200000,
+        '10': 200000
+    },
+    
+    # تنظیمات بازه قیمتی
+    "price_range_percent": 0.15,  # ±15%
+    
+    # سایر تنظیمات
+    "max_photos": 3,
+    "listing_expiry_days": 10
+}
+
+# =========================
+# اسکیمای فرم ربات: یک بار در شروع به کیبوردها، validatorها و قالب‌های نمایش کامپایل می‌شود
+# (form_schema.compile_form). افزودن فیلد = افزودن یک ردیف اینجا (و دکمه آن در FORM_MENU)
+# =========================
+# kind: number (فقط رقم، max_digits) | chars (متن، max_chars، followup: فیلد بعدی)
+#       player_value (عدد ارزش بازیکنان) | division (کلمه word_length حرفی یا عدد min تا max)
+#       photos | text (متن آزاد) | choice (با دکمه‌های خودش ثبت می‌شود، بدون ورودی متنی)
+# temp: در فرم موقت نمایش داده شود؛ truncate: حداکثر طول مقدار در نمایش
+FORM_FIELDS = [
+    {"key": "platform", "label": "🎮 پلتفرم", "kind": "choice"},
+    {"key": "email_type", "label": "📧 نوع ایمیل", "kind": "choice"},
+    {"key": "web_app", "label": "🌐 وب اپ", "kind": "choice"},
+    {"key": "coin_account", "label": "💰 کوین اکانت", "kind": "number", "max_digits": 8,
+     "prompt": "💰 لطفا مقدار کوین اکانت را وارد کنید.", "example": "245000",
+     "success": "مقدار کوین اکانت ثبت شد"},
+    {"key": "trade_players", "label": "⚡ بازیکنان ترید", "kind": "chars", "max_chars": 25,
+     "prompt": "❌ لطفا نام برترین بازیکنان ترید خود را وارد کنید.", "example": "امباپه دیونگ پدری",
+     "success": "نام بازیکنان ترید ثبت شد.", "followup": "trade_players_value"},
+    {"key": "trade_players_value", "label": "💰 ارزش بازیکنان ترید", "kind": "player_value",
+     "prompt": "💰 لطفا مجموع ارزش بازیکنان ترید خود را وارد کنید (به کوین)", "example": "400000",
+     "success": "ارزش بازیکنان ترید ثبت شد"},
+    {"key": "non_trade_players", "label": "❌ بازیکنان آنترید", "kind": "chars", "max_chars": 25,
+     "prompt": "❌ لطفا نام برترین بازیکنان آنترید خود را وارد کنید.", "example": "امباپه دیونگ پدری",
+     "success": "نام بازیکنان آنترید ثبت شد.", "followup": "non_trade_players_value"},
+    {"key": "non_trade_players_value", "label": "💰 ارزش بازیکنان آنترید", "kind": "player_value",
+     "prompt": "💰 لطفا مجموع ارزش بازیکنان آنترید خود را وارد کنید (به کوین)", "example": "100000",
+     "success": "ارزش بازیکنان آنترید ثبت شد"},
+    {"key": "match_earning", "label": "🏆 مچ ارنینگ", "kind": "number", "max_digits": 9,
+     "prompt": "🏆 لطفا مچ ارنینگ را وارد کنید.", "example": "1200", "success": "مچ ارنینگ ثبت شد"},
+    {"key": "season_level", "label": "⭐ لول سیزن", "kind": "number", "max_digits": 2,
+     "prompt": "⭐ لطفا لول سیزن را وارد کنید.", "example": "5", "success": "لول سیزن ثبت شد"},
+    {"key": "division_rivals", "label": "🏅 دیویژن رایوالز", "kind": "division", "word_length": 5, "min": 1, "max": 10,
+     "prompt": "🏅 لطفا دیویژن رایوالز را وارد کنید:", "example": "Elite", "success": "دیویژن رایوالز ثبت شد"},
+    {"key": "sale_method", "label": "📝 نحوه فروش", "kind": "choice"},
+    {"key": "user_contact", "label": "📱 آیدی ارتباط", "kind": "choice"},
+    {"key": "purchase_link", "label": "🛒 لینک خرید", "kind": "choice", "truncate": 25},
+    {"key": "price", "label": "💵 قیمت اکانت", "kind": "number", "max_digits": 8,
+     "prompt": "💵 قیمت اکانت خود را وارد کنید.", "example": "250000", "success": "قیمت اکانت ثبت شد"},
+    {"key": "team_photos", "label": "📸 عکس‌های تیم", "kind": "photos", "callback": "team_photo", "temp": False},
+]
+
+# دکمه‌های منوی فرم (ردیف‌های سه‌تایی): (متن دکمه، callback_data)
+FORM_MENU = [
+    [("🌐 وب اپ", "web_app"), ("📧 نوع ایمیل", "email_type"), ("🎮 انتخاب پلتفرم", "platform")],
+    [("💰 کوین اکانت", "coin_account"), ("⚡ بازیکنان ترید", "trade_players"), ("❌ بازیکنان آنترید", "non_trade_players")],
+    [("🏆 مچ ارنینگ", "match_earning"), ("⭐ لول سیزن", "season_level"), ("🏅 دیویژن رایوالز", "division_rivals")],
+    [("💵 قیمت اکانت", "price"), ("💰 تخمین قیمت", "estimate_price"), ("📝 نحوه فروش", "sale_method")],
+    [("✅ ثبت نهایی", "final_submit"), ("📋 نمایش اطلاعات ثبت شده", "show_entered_data"), ("📸 ثبت عکس تیم", "team_photo")],
+]
+
+# فیلدهای پست کانال به ترتیب نمایش: کلید فیلد یا (کلید، برچسب جایگزین)
+FORM_CHANNEL_FIELDS = [
+    "platform", "email_type", "web_app", "coin_account", "trade_players", "non_trade_players",
+    "match_earning", "season_level", "division_rivals", "sale_method", "price",
+    ("user_contact", "📱 ارتباط با فروشنده"),
+]
+
+# تنظیمات متن‌ها (بدون تغییر)
+TEXTS = {
+    "welcome": "👋 کاربر ({}) خوش آمدید\n📖 خواهشمند است قبل از استفاده از ربات، راهنما را از منو انتخاب کرده و آن را مطالعه فرمایید.",
+    
+    "guide": """
+📖 از انتخاب شما سپاسگزاریم، هدف تیم ما ارائه یک مرجع خرید و فروش اکانت های بازی FC/FIFA با واسطه و یا بی واسطة برای کاربران است.
+1. شما می توانید یک اکانت رایگان برای فروش به مدت 10 روز ثبت کنید.
+2. می توانید با استفاده از ربات و یا فرم دستی اقدام به آگهی اکانت خود نمایید.
+3. برای استفاده از فرم دستی گزینه فروش اکانت را انتخاب کرده و سپس فرم دستی را بزنید.
+   فرم نمایش داده شده را کپی و اطلاعات آن را کامل کنید سپس برای ربات ارسال کنید.
+   بعد از آن ربات از شما می خواهد حداکثر 3 عکس از اکانت/تیم ارسال کنید.
+   در صورت اطمینان از اطلاعات ثبت شده روی گزینه ثبت نهایی کیلیک کنید.
+   اطلاعات شما برای ادمین ارسال و پس از تایید در کانال قرار خواهد گرفت.
+  
+   📌 مزایای فرم دستی:
+   • ممکن است راحت تر و سریعتر بنظر برسد.
+  
+   📌 معایب فرم دستی:
+   • عدم نمایش در فیلتر خریداران و فقط نمایش در کانال
+   • عدم وجود تخمین قیمت اکانت
+4. با استفاده از ربات اکانت شما در فیلتر خریداران قرار خواهد گرفت و گزینه تخمین قیمت قرار دارد.
+5. کاربر محترم در صورت مایل به ثبت آیدی شخصی خود هستید دقت نمایید که هرگونه سوءاستفاده و یا کلاه برداری های احتمالی بر عهده شخص شما می باشد و کانال رنک 1 هیچ مسئولیتی در این خصوص نخواهد داشت.
+6. در صورت انتخاب فروش از طریق کانال 10 درصد به مبلغ ثبت شده اکانت شما اضافه خواهد شد.
+7. در صورت انتخاب فروش از طریق کانال پس از پیدا شدن خریدار شما موظفید همه اطلاعات اکانت شما اعم از ایمیل ها پسوردها تاریخ های تولد کدهای پشتیبانی و هر آنچه نیاز باشد را در اختیار ما قرار دهید و پس از صحت اطلاعات ثبت شده توسط شما همزان با تحویل اکانت به خریدار مبلغ ثبت شده توسط شما واریز خواهد گردید.
+📞 برای اطلاعات بیشتر با پشتیبانی تماس بگیرید.
+""",
+
+    "sale_rules": """
+📋 کاربر گرامی لطفا این قوانین را مطالعه کنید:
+1. در صورت ثبت آیدی خودتان برای ارتباط مستقیم با خریداران، عواقب هر گونه سواستفاده و یا کلاه برداری های احتمالی بر عهده شما می باشد و کانال رنک 1 هیچ مسئولیتی در این موضوع ندارد.
+2. در صورت انتخاب فروش از طریق کانال، پس از واریز وجه توسط خریدار به حساب کانال، شما موظف به تحویل تمام اطلاعات اکانت اعم از ایمیل ها، پسوردها، تاریخ های تولد، کدهای پشتیبان و هر آنچه لازم باشد هستید. تیم ما پس از اطمینان از صحت اطلاعات درج شده توسط شما مبلغ ثبت شده شما را واریز خواهد کرد.
+3. به مبلغ ثبت شده شما 10 درصد مالیات بر ارزش افزوده اضافه خواهد شد.
+   مثال:
+   • مبلغ ثبت شده شما: 2,000,000 تومان
+   • مبلغی که در کانال ثبت خواهد شد: 2,200,000 تومان
+   • مبلغی که در صورت پیدا شدن خریدار برای شما واریز می شود: 2,000,000 تومان
+پس اگر قیمت شما نیاز به ویرایش دارد خواهشمند است قبل از ثبت نهایی نسبت به آن اقدام کنید.
+آیا با این شرایط موافق هستید؟
+""",
+
+    "manual_form_template": """📋 کاربر محترم:
+1. فرم را کپی کنید
+2. کامل کنید
+3. همین جا ارسال کنید
+1. پلتفرم:
+2. ظرفیت:
+3. نوع ایمیل:
+4. وب اپ:
+5. کوین اکانت:
+6. برترین بازیکنان ترید:
+7. ارزش بازیکنان ترید:
+8. برترین بازیکنان آنترید:
+9. ارزش بازیکنان آنترید:
+10. مچ ارنینگ:
+11. لول سیزن:
+12. دیویژن رایوالز:
+13. قیمت اکانت:
+14. نحوه فروش - مهم (حتما راهنما را مطالعه کنید):
+15. آیدی ارتباط (حتما راهنما را مطالعه کنید):"""
+}
+
+# بقیه تنظیمات بدون تغییر...
+PLATFORM_CONFIG = {
+    "ps": {
+        "ps3": "پلی استیشن - ظرفیت 3",
+        "ps2": "پلی استیشن - ظرفیت 2", 
+        "psfull": "پلی استیشن - کامل"
+    },
+    "xbox": {
+        "xboxhome": "ایکس باکس - هوم",
+        "xboxswitch": "ایکس باکس - سوویچ",
+        "xboxfull": "ایکس باکس - کامل"
+    },
+    "pc": {
+        "pcfull": "پی سی - بازی کامل",
+        "eaplay": "پی سی - EA Play Pro"
+    }
+}
+
+EMAIL_TYPES = {
+    "gmail": "Gmail",
+    "outlook": "Outlook", 
+    "hotmail": "Hotmail",
+    "yahoo": "Yahoo",
+    "other": "سایر"
+}
+
+WEB_APP_TYPES = {
+    "open": "وب باز",
+    "closed": "وب بسته"
+}
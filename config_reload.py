@@ -0,0 +1,270 @@
+# config_reload.py
+# بارگذاری دوباره PRICE_CONFIG، TEXTS و PLATFORM_CONFIG از فایل JSON/YAML بیرونی بدون ری‌استارت:
+# اعتبارسنجی و کامپایل جدول‌های قیمت و فرم روی thread جدا، سپس جایگزینی یک‌جا روی event loop
+#
+# قالب فایل (همه بخش‌ها و کلیدها اختیاری؛ هر کلید روی مقدار پیش‌فرض config.py نوشته می‌شود):
+#   {
+#     "PRICE_CONFIG": {"coin_value_unit": 650000,
+#                      "match_earning_bonuses": [[10000, 20000, 100000], [40000, null, 175000]]},
+#     "TEXTS": {"welcome": "👋 سلام {}"},
+#     "PLATFORM_CONFIG": {"ps": {"ps3": "پلی استیشن - ظرفیت 3"}}
+#   }
+# جدول‌های بازه‌ای لیست [min, max, bonus] هستند (max=null یعنی بی‌نهایت؛ اولین بازه منطبق برنده است)
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+import config
+from form_schema import CompiledForm, compile_form
+from pricing import PriceModel, install_price_model
+
+logger = logging.getLogger(__name__)
+
+# مقادیر config.py در لحظه import؛ فایل بیرونی همیشه روی این‌ها اعمال می‌شود
+# (حذف یک کلید از فایل یعنی برگشت به پیش‌فرض)
+DEFAULTS = {
+    "PRICE_CONFIG": copy.deepcopy(config.PRICE_CONFIG),
+    "TEXTS": copy.deepcopy(config.TEXTS),
+    "PLATFORM_CONFIG": copy.deepcopy(config.PLATFORM_CONFIG),
+}
+
+BRACKET_KEYS = ("match_earning_bonuses", "season_level_bonuses")
+
+
+class ConfigError(ValueError):
+    """فایل تنظیمات نامعتبر؛ تنظیمات فعلی دست نمی‌خورد"""
+
+
+class ConfigSnapshot:
+    """تنظیمات اعتبارسنجی‌شده به همراه مدل قیمت و فرم کامپایل‌شده از همان تنظیمات"""
+
+    __slots__ = ("price_config", "texts", "platform_config", "price_model", "form", "mtime")
+
+    def __init__(self, price_config: dict, texts: dict, platform_config: dict,
+                 price_model: PriceModel, form: CompiledForm, mtime: float):
+        self.price_config = price_config
+        self.texts = texts
+        self.platform_config = platform_config
+        self.price_model = price_model
+        self.form = form
+        self.mtime = mtime
+
+
+# =========================
+# خواندن و ادغام
+# =========================
+def read_file(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        raw = f.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ConfigError("برای فایل YAML بسته PyYAML لازم است (یا از JSON استفاده کنید)")
+        try:
+            data = yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise ConfigError(f"YAML نامعتبر: {e}")
+    else:
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise ConfigError(f"JSON نامعتبر: {e}")
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ConfigError("ریشه فایل تنظیمات باید یک object باشد")
+    return data
+
+
+def _brackets(name: str, value) -> dict:
+    if isinstance(value, dict) and all(isinstance(key, tuple) for key in value):
+        # مقدار پیش‌فرض config.py: {(min, max): bonus}
+        return dict(value)
+    if not isinstance(value, list):
+        raise ConfigError(f"{name}: باید لیست [min, max, bonus] باشد")
+    brackets = {}
+    for item in value:
+        if not isinstance(item, list) or len(item) != 3:
+            raise ConfigError(f"{name}: ردیف نامعتبر {item!r}")
+        lo, hi, bonus = item
+        hi = float("inf") if hi is None else hi
+        if not all(_is_number(x) for x in (lo, hi, bonus)) or lo >= hi:
+            raise ConfigError(f"{name}: ردیف نامعتبر {item!r}")
+        brackets[(lo, hi)] = bonus
+    return brackets
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def merge(overrides: dict) -> Dict[str, dict]:
+    """ادغام بخش‌های فایل روی DEFAULTS (هر بخش یک سطح؛ PLATFORM_CONFIG دو سطح)"""
+    unknown = set(overrides) - set(DEFAULTS)
+    if unknown:
+        raise ConfigError(f"بخش ناشناخته: {', '.join(sorted(unknown))}")
+    merged = {}
+    for section, default in DEFAULTS.items():
+        values = overrides.get(section) or {}
+        if not isinstance(values, dict):
+            raise ConfigError(f"{section} باید object باشد")
+        unknown = set(values) - set(default)
+        if unknown:
+            raise ConfigError(f"{section}: کلید ناشناخته {', '.join(sorted(map(str, unknown)))}")
+        result = copy.deepcopy(default)
+        for key, value in values.items():
+            if section == "PLATFORM_CONFIG" and isinstance(value, dict):
+                result[key] = {**result[key], **value}
+            else:
+                result[key] = value
+        merged[section] = result
+    for key in BRACKET_KEYS:
+        merged["PRICE_CONFIG"][key] = _brackets(key, merged["PRICE_CONFIG"][key])
+    return merged
+
+
+# =========================
+# اعتبارسنجی
+# =========================
+def validate_price_config(price_config: dict):
+    for key in DEFAULTS["PRICE_CONFIG"]:
+        value = price_config[key]
+        if key in BRACKET_KEYS:
+            if not all(_is_number(v) for v in value.values()):
+                raise ConfigError(f"PRICE_CONFIG.{key}: پاداش باید عدد باشد")
+        elif key == "division_bonuses":
+            if not isinstance(value, dict) or not all(_is_number(v) for v in value.values()):
+                raise ConfigError("PRICE_CONFIG.division_bonuses باید {دیویژن: عدد} باشد")
+            if any(str(k) != str(k).lower() for k in value):
+                raise ConfigError("PRICE_CONFIG.division_bonuses: نام دیویژن باید با حروف کوچک باشد")
+        elif not _is_number(value):
+            raise ConfigError(f"PRICE_CONFIG.{key} باید عدد باشد")
+    for key in ("coin_divider", "trade_players_divider", "nontrade_players_divider"):
+        if price_config[key] <= 0:
+            raise ConfigError(f"PRICE_CONFIG.{key} باید بزرگ‌تر از صفر باشد")
+    if not 0 <= price_config["price_range_percent"] < 1:
+        raise ConfigError("PRICE_CONFIG.price_range_percent باید بین 0 و 1 باشد")
+    for key in ("max_photos", "listing_expiry_days"):
+        if not isinstance(price_config[key], int) or price_config[key] < 1:
+            raise ConfigError(f"PRICE_CONFIG.{key} باید عدد صحیح مثبت باشد")
+
+
+def validate_texts(texts: dict):
+    for key, value in texts.items():
+        if not isinstance(value, str) or not value.strip():
+            raise ConfigError(f"TEXTS.{key} باید متن غیرخالی باشد")
+    try:
+        texts["welcome"].format("x")
+    except (IndexError, KeyError, ValueError):
+        raise ConfigError("TEXTS.welcome فقط یک {} (نام کاربر) می‌پذیرد")
+
+
+def validate_platform_config(platform_config: dict):
+    # دکمه‌های انتخاب پلتفرم ثابت هستند؛ فقط برچسب‌ها قابل تغییرند
+    for platform, subs in DEFAULTS["PLATFORM_CONFIG"].items():
+        values = platform_config[platform]
+        if not isinstance(values, dict) or set(values) != set(subs):
+            raise ConfigError(f"PLATFORM_CONFIG.{platform}: کلیدها باید {', '.join(subs)} باشند")
+        if not all(isinstance(label, str) and label for label in values.values()):
+            raise ConfigError(f"PLATFORM_CONFIG.{platform}: برچسب باید متن غیرخالی باشد")
+
+
+def build_snapshot(path: str) -> ConfigSnapshot:
+    """خواندن، اعتبارسنجی و کامپایل (روی thread جدا اجرا می‌شود؛ به state ربات دست نمی‌زند)"""
+    mtime = os.stat(path).st_mtime
+    merged = merge(read_file(path))
+    price_config, texts, platform_config = merged["PRICE_CONFIG"], merged["TEXTS"], merged["PLATFORM_CONFIG"]
+    validate_price_config(price_config)
+    validate_texts(texts)
+    validate_platform_config(platform_config)
+    try:
+        price_model = PriceModel(price_config, config.PRICE_ESTIMATE_CACHE_SIZE)
+        form = compile_form(config.FORM_FIELDS, config.FORM_MENU, config.FORM_CHANNEL_FIELDS,
+                            max_photos=price_config["max_photos"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ConfigError(f"کامپایل تنظیمات ناموفق بود: {e}")
+    return ConfigSnapshot(price_config, texts, platform_config, price_model, form, mtime)
+
+
+def apply_snapshot(snapshot: ConfigSnapshot):
+    """جایگزینی همه تنظیمات با هم (بدون await، پس هیچ هندلری حالت نیمه‌کاره نمی‌بیند).
+
+    هندلری که مدل قیمت را قبلاً گرفته (get_price_model) تا آخر با همان مدل کار می‌کند.
+    """
+    config.PRICE_CONFIG = snapshot.price_config
+    config.TEXTS = snapshot.texts
+    config.PLATFORM_CONFIG = snapshot.platform_config
+    install_price_model(snapshot.price_model)
+
+
+# =========================
+# بارگذاری دوباره در ربات
+# =========================
+class ConfigReloader:
+    """فایل تنظیمات را بارگذاری می‌کند (فرمان ادمین یا بررسی دوره‌ای mtime).
+
+    کامپایل روی thread جدا انجام می‌شود و فقط تنظیمات معتبر روی event loop
+    جایگزین می‌شوند؛ on_apply بعد از جایگزینی صدا زده می‌شود تا ماژول‌ها
+    اشیای مشتق‌شده (فرم، کیبوردها، متن‌ها) را دوباره bind کنند.
+    """
+
+    def __init__(self, path: str, on_apply: Optional[Callable[[ConfigSnapshot], None]] = None):
+        self.path = path
+        self.on_apply = on_apply
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = ""
+        self.loaded_mtime: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def reload(self) -> ConfigSnapshot:
+        """بارگذاری اجباری؛ در صورت خطا ConfigError/OSError و تنظیمات فعلی حفظ می‌شود"""
+        async with self._lock:
+            try:
+                snapshot = await asyncio.to_thread(build_snapshot, self.path)
+            except (ConfigError, OSError) as e:
+                self.failures += 1
+                self.last_error = str(e)
+                raise
+            apply_snapshot(snapshot)
+            if self.on_apply is not None:
+                self.on_apply(snapshot)
+            self.reloads += 1
+            self.last_error = ""
+            self.loaded_mtime = snapshot.mtime
+            self.loaded_at = time.time()
+            return snapshot
+
+    async def check(self) -> bool:
+        """بارگذاری فقط اگر فایل بعد از آخرین بارگذاری تغییر کرده باشد؛ خطا فقط لاگ می‌شود"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            logger.warning("فایل تنظیمات %s خوانده نشد: %s", self.path, e)
+            return False
+        if mtime == self.loaded_mtime or self._lock.locked():
+            return False
+        try:
+            await self.reload()
+        except (ConfigError, OSError) as e:
+            # تا تغییر بعدی فایل دوباره تلاش نمی‌شود
+            self.loaded_mtime = mtime
+            logger.error("تنظیمات %s بارگذاری نشد: %s", self.path, e)
+            return False
+        logger.info("تنظیمات از %s بارگذاری شد.", self.path)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "loaded_seconds_ago": time.time() - self.loaded_at if self.loaded_at else 0.0,
+            "last_error": self.last_error or "-",
+        }
@@ -0,0 +1,721 @@
+# db.py
+# لایه دسترسی به دیتابیس: استخر اتصال‌های ماندگار SQLite + توابع کاربران و آگهی‌ها
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# استخر اتصال
+# =========================
+class ConnectionPool:
+    """استخر اتصال‌های ماندگار SQLite با WAL و pragmaهای تنظیم‌شده.
+
+    هر اتصال یک بار باز می‌شود و تا پایان برنامه زنده می‌ماند، پس کش
+    prepared statement داخلی sqlite3 (cached_statements) بین فراخوانی‌ها
+    دوباره استفاده می‌شود.
+    """
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 5.0,
+                 synchronous: str = "NORMAL", cache_size_kb: int = 8192,
+                 mmap_size: int = 64 * 1024 * 1024, cached_statements: int = 256):
+        self.path = path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=self.size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        # مقدار منفی یعنی اندازه بر حسب KiB
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no free SQLite connection after {self.timeout}s") from None
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """یک اتصال از استخر قرض می‌گیرد و در پایان برمی‌گرداند."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """اتصال داخل تراکنش؛ در صورت خطا rollback و در غیر این صورت commit."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """استخر سراسری (ساخته شده بر اساس config در اولین استفاده)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    config.DB_PATH,
+                    size=config.DB_POOL_SIZE,
+                    timeout=config.DB_TIMEOUT,
+                    synchronous=config.DB_SYNCHRONOUS,
+                    cache_size_kb=config.DB_CACHE_SIZE_KB,
+                    mmap_size=config.DB_MMAP_SIZE,
+                    cached_statements=config.DB_CACHED_STATEMENTS,
+                )
+    return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+# =========================
+# کوئری‌ها (رشته ثابت تا statement کش‌شده دوباره استفاده شود)
+# =========================
+SQL_GET_USER = "SELECT user_id, free_used FROM users WHERE user_id = ?"
+SQL_ENSURE_USER = "INSERT OR IGNORE INTO users (user_id) VALUES (?)"
+SQL_SET_FREE_USED = """
+    INSERT INTO users (user_id, free_used) VALUES (?, 1)
+    ON CONFLICT(user_id) DO UPDATE SET free_used = 1
+"""
+SQL_INSERT_LISTING = """
+    INSERT INTO listings (user_id, created_at, expire_at, data_json, receipt_file_id, status,
+                          estimate_low, estimate_high, priced_at,
+                          platform_main, platform_sub, price, coin_account, division_rivals, web_app, season_level,
+                          email_type, search_text)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# تغییر وضعیت‌ها همه UPDATE شرطی روی status هستند: از دو ادمین همزمان فقط یکی ردیف را تغییر می‌دهد
+SQL_REJECT_LISTING = "UPDATE listings SET status = 'rejected' WHERE id = ? AND status = 'pending'"
+SQL_USER_LISTINGS = "SELECT id, data_json FROM listings WHERE user_id = ? AND status = 'active'"
+SQL_UPDATE_LISTING = """
+    UPDATE listings SET data_json = ?, platform_main = ?, platform_sub = ?, price = ?,
+                        coin_account = ?, division_rivals = ?, web_app = ?, season_level = ?, email_type = ?,
+                        search_text = ?
+    WHERE id = ?
+"""
+SQL_GET_LISTING = "SELECT id, user_id, data_json, status FROM listings WHERE id = ?"
+# +status: پیمایش با کلید اصلی (id > ?) و نه ایندکس‌های status که مرتب‌سازی کل جدول لازم دارند
+SQL_ACTIVE_LISTINGS_AFTER = """
+    SELECT id, data_json FROM listings
+    WHERE +status = 'active' AND id > ? ORDER BY id LIMIT ?
+"""
+# ایندکس idx_listings_status_expire: فقط آگهی‌های فعال سررسیده خوانده می‌شوند
+SQL_DUE_LISTINGS = """
+    SELECT id, user_id FROM listings
+    WHERE status = 'active' AND expire_at <= ? ORDER BY expire_at LIMIT ?
+"""
+SQL_EXPIRE_LISTING = "UPDATE listings SET status = 'expired' WHERE id = ? AND status = 'active'"
+SQL_LATEST_PENDING_LISTING = "SELECT id FROM listings WHERE user_id = ? AND status = 'pending' ORDER BY id DESC LIMIT 1"
+# تأیید = pending -> active + قفل انتشار در یک UPDATE؛ مهلت آگهی از لحظه تأیید حساب می‌شود
+SQL_APPROVE_LISTING = """
+    UPDATE listings SET status = 'active', expire_at = ?, publish_claimed_at = ?
+    WHERE id = ? AND status = 'pending'
+"""
+SQL_DISCARD_PENDING = "DELETE FROM listings WHERE id = ? AND status = 'pending'"
+SQL_PENDING_LISTINGS = """
+    SELECT id, user_id, created_at, data_json FROM listings
+    WHERE status = 'pending' AND id > ? ORDER BY id LIMIT ?
+"""
+SQL_COUNT_PENDING = "SELECT COUNT(*) FROM listings WHERE status = 'pending'"
+SQL_SET_PUBLISHED = "UPDATE listings SET channel_message_id = ?, published_at = ? WHERE id = ?"
+# خطای ارسال: آگهی به صف بررسی برمی‌گردد
+SQL_RELEASE_PUBLISH = """
+    UPDATE listings SET status = 'pending', publish_claimed_at = NULL
+    WHERE id = ? AND status = 'active' AND channel_message_id IS NULL
+"""
+SQL_UNFINISHED_PUBLISH = """
+    SELECT id, user_id, data_json, status FROM listings
+    WHERE publish_claimed_at IS NOT NULL AND channel_message_id IS NULL AND status = 'active'
+    ORDER BY id
+"""
+SQL_SET_LISTING_ESTIMATE = "UPDATE listings SET estimate_low = ?, estimate_high = ?, priced_at = ? WHERE id = ?"
+SQL_GET_STATE = "SELECT data_json, updated_at FROM conversation_state WHERE namespace = ? AND user_id = ?"
+SQL_ITER_STATES = """
+    SELECT namespace, user_id, data_json, updated_at FROM conversation_state
+    WHERE updated_at > ? ORDER BY updated_at
+"""
+SQL_UPSERT_STATE = """
+    INSERT INTO conversation_state (namespace, user_id, data_json, updated_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT(namespace, user_id) DO UPDATE SET data_json = excluded.data_json, updated_at = excluded.updated_at
+"""
+SQL_DELETE_STATE = "DELETE FROM conversation_state WHERE namespace = ? AND user_id = ?"
+SQL_PURGE_STATES = "DELETE FROM conversation_state WHERE updated_at <= ?"
+
+# =========================
+# ستون‌های ساخت‌یافته آگهی (کپی فیلدهای پرکاربرد data_json برای فیلتر با ایندکس)
+# =========================
+LISTING_COLUMNS = ("platform_main", "platform_sub", "price", "coin_account",
+                   "division_rivals", "web_app", "season_level", "email_type", "search_text")
+
+def _as_int(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+def listing_columns(data_json: Optional[str]) -> tuple:
+    """مقادیر LISTING_COLUMNS از data_json (فیلد نامعتبر یا غایب -> NULL)"""
+    try:
+        form_data = json.loads(data_json) if data_json else None
+    except ValueError:
+        form_data = None
+    if not isinstance(form_data, dict):
+        return (None,) * len(LISTING_COLUMNS)
+    details = form_data.get('platform_details')
+    if not isinstance(details, dict):
+        details = {}
+    division = form_data.get('division_rivals')
+    return (
+        details.get('main_platform'),
+        details.get('sub_platform'),
+        _as_int(form_data.get('price')),
+        _as_int(form_data.get('coin_account')),
+        str(division).strip().lower() if division not in (None, '') else None,
+        form_data.get('web_app'),
+        _as_int(form_data.get('season_level')),
+        form_data.get('email_type'),
+        _search_text(form_data),
+    )
+
+def _json_int_sql(path: str) -> str:
+    """همان _as_int داخل SQL برای backfill"""
+    value = f"json_extract(data_json, '{path}')"
+    return (f"CASE json_type(data_json, '{path}') WHEN 'integer' THEN {value} "
+            f"WHEN 'text' THEN CASE WHEN {value} <> '' AND {value} NOT GLOB '*[^0-9]*' "
+            f"THEN CAST({value} AS INTEGER) END END")
+
+# =========================
+# جستجوی متنی نام بازیکنان (FTS5 با tokenizer سه‌حرفی روی ستون search_text)
+# =========================
+# یکسان‌سازی نویسه‌ها پیش از ذخیره search_text و پیش از جستجو (بعد از حذف علامت‌ها):
+# ی/ک عربی، الف‌ها، نیم‌فاصله و ارقام فارسی
+SEARCH_FOLD = {
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'آ': 'ا',
+    '\u200c': ' ',
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+}
+_SEARCH_FOLD_TABLE = str.maketrans(SEARCH_FOLD)
+SEARCH_TEXT_FIELDS = ("trade_players", "non_trade_players", "form_text")
+# trigram کوتاه‌تر از 3 نویسه را پیدا نمی‌کند
+PLAYER_SEARCH_MIN_CHARS = 3
+
+def fold_search_text(text: str) -> str:
+    # NFKD + حذف علامت‌های ترکیبی: é -> e و همین‌طور اعراب و همزه روی حروف فارسی
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return " ".join(text.translate(_SEARCH_FOLD_TABLE).casefold().split())
+
+def _search_text(form_data: dict) -> Optional[str]:
+    parts = [form_data.get(field) for field in SEARCH_TEXT_FIELDS]
+    text = fold_search_text(" ".join(part for part in parts if isinstance(part, str)))
+    return text or None
+
+def _add_search_text(conn: sqlite3.Connection):
+    """ستون search_text + پر کردن آن (جدول FTS در ensure_players_fts ساخته می‌شود)"""
+    conn.execute("ALTER TABLE listings ADD COLUMN search_text TEXT")
+    after_id = 0
+    while True:
+        rows = conn.execute("SELECT id, data_json FROM listings WHERE id > ? ORDER BY id LIMIT 5000",
+                            (after_id,)).fetchall()
+        if not rows:
+            break
+        conn.executemany("UPDATE listings SET search_text = ? WHERE id = ?",
+                         [(listing_columns(data_json)[-1], listing_id) for listing_id, data_json in rows])
+        after_id = rows[-1][0]
+
+SQL_FTS_EXISTS = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listings_fts'"
+
+def _create_players_fts(conn: sqlite3.Connection) -> bool:
+    """جدول FTS5 external-content روی search_text با triggerهای همگام‌سازی.
+
+    اگر SQLite بدون FTS5/trigram باشد هشدار می‌دهد و False برمی‌گرداند؛ جستجو با LIKE روی search_text انجام می‌شود.
+    """
+    try:
+        conn.execute("""
+        CREATE VIRTUAL TABLE listings_fts USING fts5(
+            search_text, content = 'listings', content_rowid = 'id',
+            tokenize = 'trigram case_sensitive 0'
+        )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning("FTS5 trigram unavailable, player search falls back to LIKE: %s", e)
+        return False
+    conn.execute("""
+    CREATE TRIGGER listings_fts_insert AFTER INSERT ON listings BEGIN
+        INSERT INTO listings_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER listings_fts_delete AFTER DELETE ON listings BEGIN
+        INSERT INTO listings_fts (listings_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER listings_fts_update AFTER UPDATE OF search_text ON listings BEGIN
+        INSERT INTO listings_fts (listings_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO listings_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """)
+    conn.execute("INSERT INTO listings_fts (listings_fts) VALUES ('rebuild')")
+    return True
+
+def ensure_players_fts():
+    """ساخت listings_fts اگر وجود ندارد؛ بیرون از مهاجرت‌ها و در هر شروع، تا بعد از ارتقای
+    SQLite به نسخه دارای FTS5 جستجو دیگر روی LIKE نماند (نسخه schema به آن وابسته نیست)."""
+    with get_pool().connection() as conn:
+        if conn.execute(SQL_FTS_EXISTS).fetchone():
+            return
+    with get_pool().transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if not conn.execute(SQL_FTS_EXISTS).fetchone() and _create_players_fts(conn):
+            logger.info("listings_fts created, player search uses FTS5")
+
+# =========================
+# مهاجرت‌های schema (شماره نسخه در PRAGMA user_version)
+# =========================
+# هر آیتم یک نسخه است؛ فقط آیتم‌های بعد از user_version فعلی اجرا می‌شوند
+MIGRATIONS = [
+    # 1: بازه تخمین قیمت ذخیره‌شده برای قیمت‌گذاری دوباره دسته‌ای
+    (
+        "ALTER TABLE listings ADD COLUMN estimate_low INTEGER",
+        "ALTER TABLE listings ADD COLUMN estimate_high INTEGER",
+        "ALTER TABLE listings ADD COLUMN priced_at TEXT",
+    ),
+    # 2: ستون‌های ساخت‌یافته + ایندکس‌های ترکیبی + backfill ردیف‌های قبلی
+    (
+        "ALTER TABLE listings ADD COLUMN platform_main TEXT",
+        "ALTER TABLE listings ADD COLUMN platform_sub TEXT",
+        "ALTER TABLE listings ADD COLUMN price INTEGER",
+        "ALTER TABLE listings ADD COLUMN coin_account INTEGER",
+        "ALTER TABLE listings ADD COLUMN division_rivals TEXT",
+        "ALTER TABLE listings ADD COLUMN web_app TEXT",
+        "ALTER TABLE listings ADD COLUMN season_level INTEGER",
+        f"""
+        UPDATE listings SET
+            platform_main = json_extract(data_json, '$.platform_details.main_platform'),
+            platform_sub = json_extract(data_json, '$.platform_details.sub_platform'),
+            price = {_json_int_sql('$.price')},
+            coin_account = {_json_int_sql('$.coin_account')},
+            division_rivals = NULLIF(lower(trim(json_extract(data_json, '$.division_rivals'))), ''),
+            web_app = json_extract(data_json, '$.web_app'),
+            season_level = {_json_int_sql('$.season_level')}
+        WHERE json_valid(data_json) AND json_type(data_json) = 'object'
+        """,
+        # آگهی‌های یک کاربر (get_user_listings)
+        "CREATE INDEX IF NOT EXISTS idx_listings_user_status ON listings (user_id, status)",
+        # فیلتر خریدار: پلتفرم و بازه قیمت
+        "CREATE INDEX IF NOT EXISTS idx_listings_status_platform_price ON listings (status, platform_main, platform_sub, price)",
+        "CREATE INDEX IF NOT EXISTS idx_listings_status_price ON listings (status, price)",
+        "CREATE INDEX IF NOT EXISTS idx_listings_status_division ON listings (status, division_rivals, price)",
+        # انقضای آگهی‌ها
+        "CREATE INDEX IF NOT EXISTS idx_listings_status_expire ON listings (status, expire_at)",
+    ),
+    # 3: جستجوی خریدار؛ ایندکس‌های پوششی (covering) با ترتیب (price, id) برای صفحه‌بندی keyset
+    (
+        "ALTER TABLE listings ADD COLUMN email_type TEXT",
+        """
+        UPDATE listings SET email_type = json_extract(data_json, '$.email_type')
+        WHERE json_valid(data_json) AND json_type(data_json) = 'object'
+        """,
+        "DROP INDEX IF EXISTS idx_listings_status_platform_price",
+        "DROP INDEX IF EXISTS idx_listings_status_price",
+        "DROP INDEX IF EXISTS idx_listings_status_division",
+        """CREATE INDEX IF NOT EXISTS idx_listings_search_platform ON listings
+           (status, platform_main, platform_sub, price, id, division_rivals, web_app, email_type)""",
+        """CREATE INDEX IF NOT EXISTS idx_listings_search_division ON listings
+           (status, division_rivals, price, id, platform_main, platform_sub, web_app, email_type)""",
+        """CREATE INDEX IF NOT EXISTS idx_listings_search_price ON listings
+           (status, price, id, platform_main, platform_sub, division_rivals, web_app, email_type)""",
+    ),
+    # 4: جستجوی متنی نام بازیکنان و متن فرم دستی (جدول FTS5 در ensure_players_fts)
+    (
+        _add_search_text,
+    ),
+    # 5: انتشار در کانال؛ publish_claimed_at قفل انتشار (فقط یک تأیید ادمین پست می‌فرستد)
+    (
+        "ALTER TABLE listings ADD COLUMN channel_message_id INTEGER",
+        "ALTER TABLE listings ADD COLUMN publish_claimed_at TEXT",
+        "ALTER TABLE listings ADD COLUMN published_at TEXT",
+    ),
+    # 6: صف بررسی ادمین؛ (status, id) هم شرط و هم ترتیب keyset صفحه‌ها را می‌دهد
+    # (ایندکس جزئی WHERE status = 'pending' بدون ANALYZE انتخاب نمی‌شد)
+    (
+        "CREATE INDEX IF NOT EXISTS idx_listings_status_id ON listings (status, id)",
+    ),
+]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """اجرای مهاجرت‌های باقیمانده داخل تراکنش جاری؛ نسخه نهایی را برمی‌گرداند."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return version
+    # DDL در sqlite3 پایتون خودکار commit می‌شود؛ همه مهاجرت‌ها در یک تراکنش صریح
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        for statement in statements:
+            # مرحله‌هایی که به شرط نیاز دارند تابع هستند
+            if callable(statement):
+                statement(conn)
+            else:
+                conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {target}")
+        logger.info("schema migrated to version %d", target)
+    return max(version, len(MIGRATIONS))
+
+# =========================
+# دیتابیس: init + توابع
+# =========================
+def init_db():
+    # شروع سرد: اگر schema به‌روز است فقط PRAGMA user_version و وجود listings_fts خوانده می‌شود
+    # (بدون CREATE TABLE و قفل نوشتن)
+    with get_pool().connection() as conn:
+        current = conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS)
+    if not current:
+        _create_tables()
+    ensure_players_fts()
+
+def _create_tables():
+    with get_pool().transaction() as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            free_used INTEGER DEFAULT 0
+        )
+        """)
+        # Listings table
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS listings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            created_at TEXT,
+            expire_at TEXT,
+            data_json TEXT,
+            receipt_file_id TEXT,
+            status TEXT DEFAULT 'pending'
+        )
+        """)
+        # وضعیت موقت فرم‌ها (write-behind از state_store)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_state (
+            namespace TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            data_json TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (namespace, user_id)
+        ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversation_state_updated ON conversation_state (updated_at)")
+        migrate(conn)
+
+def get_user_row(user_id: int) -> Optional[Dict[str, Any]]:
+    with get_pool().connection() as conn:
+        row = conn.execute(SQL_GET_USER, (user_id,)).fetchone()
+    if not row:
+        return None
+    return {"user_id": row[0], "free_used": bool(row[1])}
+
+def ensure_user(user_id: int):
+    with get_pool().transaction() as conn:
+        conn.execute(SQL_ENSURE_USER, (user_id,))
+
+def set_user_free_used(user_id: int):
+    # یک upsert به جای سه اتصال جدا (ensure + update)
+    with get_pool().transaction() as conn:
+        conn.execute(SQL_SET_FREE_USED, (user_id,))
+
+def record_listing(user_id: int, data_json: str, receipt_file_id: Optional[str]=None,
+                   estimate: Optional[Tuple[int, int]] = None, status: str = 'pending') -> int:
+    """Insert a listing and return listing id (pending until approve_listing makes it active)."""
+    now = datetime.utcnow()
+    created_at = now.isoformat()
+    expire_at = (now + timedelta(days=config.PRICE_CONFIG["listing_expiry_days"])).isoformat()
+    estimate_low, estimate_high = estimate if estimate else (None, None)
+    priced_at = created_at if estimate else None
+    with get_pool().transaction() as conn:
+        c = conn.execute(SQL_INSERT_LISTING, (user_id, created_at, expire_at, data_json, receipt_file_id, status,
+                                              estimate_low, estimate_high, priced_at)
+                         + listing_columns(data_json))
+        return c.lastrowid
+
+def mark_listing_rejected_by_admin(listing_id: int) -> Optional[Dict[str, Any]]:
+    """pending -> rejected؛ اگر آگهی دیگر pending نبود (قبلاً بررسی شده) None"""
+    with get_pool().transaction() as conn:
+        if not conn.execute(SQL_REJECT_LISTING, (listing_id,)).rowcount:
+            return None
+        row = conn.execute(SQL_GET_LISTING, (listing_id,)).fetchone()
+    return {"id": row[0], "user_id": row[1], "data_json": row[2], "status": row[3]}
+
+def discard_pending_listing(listing_id: int):
+    """حذف آگهی pending که ارسالش برای ادمین شکست خورد"""
+    with get_pool().transaction() as conn:
+        conn.execute(SQL_DISCARD_PENDING, (listing_id,))
+
+def pending_listings(after_id: int = 0, limit: int = 10) -> list:
+    """یک صفحه از صف بررسی (قدیمی‌ترین اول، keyset روی id)"""
+    with get_pool().connection() as conn:
+        return conn.execute(SQL_PENDING_LISTINGS, (after_id, limit)).fetchall()
+
+def count_pending_listings() -> int:
+    with get_pool().connection() as conn:
+        return conn.execute(SQL_COUNT_PENDING).fetchone()[0]
+
+def get_user_listings(user_id: int) -> list:
+    """گرفتن لیست آگهی‌های کاربر برای ویرایش"""
+    with get_pool().connection() as conn:
+        rows = conn.execute(SQL_USER_LISTINGS, (user_id,)).fetchall()
+    return [{"id": row[0], "data_json": row[1]} for row in rows]
+
+def get_listing(listing_id: int) -> Optional[Dict[str, Any]]:
+    """یک آگهی با شناسه آن"""
+    with get_pool().connection() as conn:
+        row = conn.execute(SQL_GET_LISTING, (listing_id,)).fetchone()
+    if not row:
+        return None
+    return {"id": row[0], "user_id": row[1], "data_json": row[2], "status": row[3]}
+
+def latest_pending_listing_id(user_id: int) -> Optional[int]:
+    """برای دکمه‌های قدیمی ادمین که فقط user_id دارند"""
+    with get_pool().connection() as conn:
+        row = conn.execute(SQL_LATEST_PENDING_LISTING, (user_id,)).fetchone()
+    return row[0] if row else None
+
+def approve_listing(listing_id: int) -> Optional[Dict[str, Any]]:
+    """pending -> active و قفل انتشار؛ اگر آگهی دیگر pending نبود (تأیید/رد تکراری) None"""
+    now = datetime.utcnow()
+    expire_at = (now + timedelta(days=config.PRICE_CONFIG["listing_expiry_days"])).isoformat()
+    with get_pool().transaction() as conn:
+        if not conn.execute(SQL_APPROVE_LISTING, (expire_at, now.isoformat(), listing_id)).rowcount:
+            return None
+        row = conn.execute(SQL_GET_LISTING, (listing_id,)).fetchone()
+    return {"id": row[0], "user_id": row[1], "data_json": row[2], "status": row[3]}
+
+def mark_listings_published(rows: list):
+    """نوشتن دسته‌ای (channel_message_id, published_at, id) در یک تراکنش"""
+    with get_pool().transaction() as conn:
+        conn.executemany(SQL_SET_PUBLISHED, rows)
+
+def release_publish_claim(listing_id: int):
+    """برگرداندن آگهی به صف بررسی بعد از خطای ارسال تا ادمین دوباره تأیید کند"""
+    with get_pool().transaction() as conn:
+        conn.execute(SQL_RELEASE_PUBLISH, (listing_id,))
+
+def unfinished_publish_listings() -> List[Dict[str, Any]]:
+    """آگهی‌هایی که قفل انتشار دارند ولی پستشان ثبت نشده (مثلاً ری‌استارت وسط انتشار)"""
+    with get_pool().connection() as conn:
+        rows = conn.execute(SQL_UNFINISHED_PUBLISH).fetchall()
+    return [{"id": row[0], "user_id": row[1], "data_json": row[2], "status": row[3]} for row in rows]
+
+def update_listing(listing_id: int, data_json: str):
+    """ویرایش آگهی"""
+    with get_pool().transaction() as conn:
+        conn.execute(SQL_UPDATE_LISTING, (data_json,) + listing_columns(data_json) + (listing_id,))
+
+def fetch_active_listings_after(after_id: int, limit: int) -> list:
+    """یک صفحه از آگهی‌های فعال بعد از after_id (keyset، بدون OFFSET)"""
+    with get_pool().connection() as conn:
+        return conn.execute(SQL_ACTIVE_LISTINGS_AFTER, (after_id, limit)).fetchall()
+
+def save_listing_estimates(rows: list):
+    """نوشتن دسته‌ای (estimate_low, estimate_high, priced_at, id) در یک تراکنش"""
+    with get_pool().transaction() as conn:
+        conn.executemany(SQL_SET_LISTING_ESTIMATE, rows)
+
+def expire_due_listings(now: str, limit: int) -> list:
+    """حداکثر limit آگهی فعال با expire_at <= now را expired می‌کند و (id, user_id) آن‌ها را برمی‌گرداند"""
+    with get_pool().transaction() as conn:
+        rows = conn.execute(SQL_DUE_LISTINGS, (now, limit)).fetchall()
+        conn.executemany(SQL_EXPIRE_LISTING, [(row[0],) for row in rows])
+    return rows
+
+# =========================
+# جستجوی خریدار
+# =========================
+SEARCH_COLUMNS = "id, price, platform_main, platform_sub, division_rivals, web_app, email_type"
+
+def build_search_query(platform_main: Optional[str] = None, platform_sub: Optional[str] = None,
+                       min_price: Optional[int] = None, max_price: Optional[int] = None,
+                       division: Optional[str] = None, web_app: Optional[str] = None,
+                       email_type: Optional[str] = None, after: Optional[Tuple[int, int]] = None,
+                       limit: int = 10) -> Tuple[str, list]:
+    """کوئری یک صفحه از آگهی‌های فعال به ترتیب (price, id).
+
+    همه ستون‌های WHERE و SELECT داخل ایندکس‌های idx_listings_search_* هستند
+    (covering)، پس جدول اصلی و data_json خوانده نمی‌شوند. آگهی بدون قیمت
+    (مثل فرم دستی) در جستجو نمی‌آید.
+    """
+    where = ["status = 'active'", "price IS NOT NULL"]
+    params: list = []
+    if platform_main:
+        # بدون زیرپلتفرم، ایندکس پلتفرم ترتیب price را نمی‌دهد؛ با + کنار گذاشته می‌شود
+        where.append("platform_main = ?" if platform_sub else "+platform_main = ?")
+        params.append(platform_main)
+    if platform_sub:
+        where.append("platform_sub = ?")
+        params.append(platform_sub)
+    if division:
+        where.append("division_rivals = ?")
+        params.append(division)
+    if web_app:
+        where.append("web_app = ?")
+        params.append(web_app)
+    if email_type:
+        where.append("email_type = ?")
+        params.append(email_type)
+    if min_price is not None:
+        where.append("price >= ?")
+        params.append(min_price)
+    if max_price is not None:
+        where.append("price < ?")
+        params.append(max_price)
+    if after is not None:
+        where.append("(price, id) > (?, ?)")
+        params.extend(after)
+    params.append(limit)
+    sql = f"SELECT {SEARCH_COLUMNS} FROM listings WHERE {' AND '.join(where)} ORDER BY price, id LIMIT ?"
+    return sql, params
+
+def search_listings(**filters) -> list:
+    """یک صفحه نتیجه؛ برای صفحه بعد after=(price, id) آخرین ردیف را بدهید"""
+    sql, params = build_search_query(**filters)
+    with get_pool().connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+# bm25 برای هر ردیف تطبیق‌یافته هزینه دارد (ده‌ها میکروثانیه)؛ برای نام‌های پرتکرار
+# فقط PLAYER_SEARCH_RANK_WINDOW آگهی فعال جدیدتر رتبه‌بندی می‌شوند تا تاخیر محدود بماند
+PLAYER_SEARCH_RANK_WINDOW = 100
+
+SQL_PLAYER_SEARCH_FTS = f"""
+    SELECT l.{SEARCH_COLUMNS.replace(', ', ', l.')}
+    FROM (
+        SELECT listings_fts.rowid AS id, listings_fts.rank AS rank
+        FROM listings_fts JOIN listings ON listings.id = listings_fts.rowid
+        WHERE listings_fts MATCH ? AND listings.status = 'active'
+        ORDER BY listings_fts.rowid DESC LIMIT ?
+    ) f JOIN listings l ON l.id = f.id
+    ORDER BY f.rank, f.id LIMIT ?
+"""
+SQL_PLAYER_SEARCH_LIKE = f"""
+    SELECT {SEARCH_COLUMNS} FROM listings
+    WHERE status = 'active' AND {{conditions}}
+    ORDER BY id DESC LIMIT ?
+"""
+
+def _fts_match_query(terms: list) -> str:
+    # هر کلمه یک عبارت جدا (AND ضمنی)؛ " داخل عبارت دوتایی می‌شود
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def search_players(text: str, limit: int = 10) -> list:
+    """آگهی‌های فعالی که نام بازیکن/متن فرم شامل همه کلمات text است، به ترتیب امتیاز bm25
+    (بین جدیدترین PLAYER_SEARCH_RANK_WINDOW نتیجه).
+
+    کلمه‌های کوتاه‌تر از PLAYER_SEARCH_MIN_CHARS نادیده گرفته می‌شوند.
+    """
+    terms = [term for term in fold_search_text(text).split() if len(term) >= PLAYER_SEARCH_MIN_CHARS]
+    if not terms:
+        return []
+    with get_pool().connection() as conn:
+        try:
+            return conn.execute(SQL_PLAYER_SEARCH_FTS,
+                                (_fts_match_query(terms), max(limit, PLAYER_SEARCH_RANK_WINDOW), limit)).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+        # بدون FTS5: همه کلمات با LIKE (کند، اسکن کامل؛ بدون رتبه‌بندی)
+        patterns = ["%" + term.replace("%", "").replace("_", "") + "%" for term in terms]
+        sql = SQL_PLAYER_SEARCH_LIKE.format(conditions=" AND ".join(["search_text LIKE ?"] * len(terms)))
+        return conn.execute(sql, (*patterns, limit)).fetchall()
+
+# =========================
+# وضعیت مکالمه (state_store)
+# =========================
+def get_conversation_state(namespace: str, user_id: int):
+    """(data_json, updated_at) یا None"""
+    with get_pool().connection() as conn:
+        return conn.execute(SQL_GET_STATE, (namespace, user_id)).fetchone()
+
+def iter_conversation_states(since: float):
+    """پیمایش وضعیت‌های ذخیره‌شده به ترتیب updated_at بدون بارگذاری همه در حافظه"""
+    with get_pool().connection() as conn:
+        yield from conn.execute(SQL_ITER_STATES, (since,))
+
+def save_conversation_states(upserts: list, deletes: list, purge_before: Optional[float] = None):
+    """نوشتن دسته‌ای تغییرات وضعیت در یک تراکنش"""
+    with get_pool().transaction() as conn:
+        if upserts:
+            conn.executemany(SQL_UPSERT_STATE, upserts)
+        if deletes:
+            conn.executemany(SQL_DELETE_STATE, deletes)
+        if purge_before is not None:
+            conn.execute(SQL_PURGE_STATES, (purge_before,))
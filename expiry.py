@@ -0,0 +1,111 @@
+# expiry.py
+# منقضی کردن دوره‌ای آگهی‌ها (listing_expiry_days) روی JobQueue ربات
+# دسته‌های محدود روی ایندکس (status, expire_at) + اطلاع‌رسانی گروهی با سقف نرخ ارسال
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SweepReport:
+    """خلاصه یک اجرای sweeper"""
+
+    __slots__ = ("expired", "batches", "notified", "notify_failed", "backlog", "elapsed")
+
+    def __init__(self):
+        self.expired = 0
+        self.batches = 0
+        self.notified = 0
+        self.notify_failed = 0
+        # True یعنی سقف دسته‌ها پر شد و آگهی سررسیده برای اجرای بعد مانده است
+        self.backlog = False
+        self.elapsed = 0.0
+
+    def __str__(self):
+        return (f"{self.expired} listings expired in {self.batches} batches, "
+                f"{self.notified} owners notified ({self.notify_failed} failed), "
+                f"{self.elapsed:.2f}s" + (", backlog left" if self.backlog else ""))
+
+
+class ExpirySweeper:
+    """آگهی‌های فعال سررسیده را در دسته‌های batch_size (حداکثر max_batches در هر اجرا) منقضی می‌کند.
+
+    هر دسته یک تراکنش جدا روی thread نویسنده است تا قفل نوشتن طولانی نشود.
+    به هر صاحب آگهی یک پیام برای همه آگهی‌های منقضی‌شده‌اش در آن اجرا
+    فرستاده می‌شود، با حداکثر notify_rate پیام در ثانیه.
+    اجرای همپوشان (وقتی اجرای قبلی هنوز در حال ارسال است) رد می‌شود.
+    """
+
+    def __init__(self, expire_batch: Callable[[str, int], Awaitable[list]],
+                 notify: Callable[[int, List[int]], Awaitable[None]],
+                 batch_size: int = 500, max_batches: int = 10, notify_rate: float = 20):
+        self.expire_batch = expire_batch
+        self.notify = notify
+        self.batch_size = max(1, batch_size)
+        self.max_batches = max(1, max_batches)
+        self.notify_interval = 1 / notify_rate if notify_rate > 0 else 0
+        self.sweeps = 0
+        self.expired_total = 0
+        self.notified_total = 0
+        self.notify_failed_total = 0
+        self.last: Optional[SweepReport] = None
+        self._running = False
+
+    async def sweep(self, now: Optional[datetime] = None) -> Optional[SweepReport]:
+        if self._running:
+            logger.info("اجرای قبلی منقضی‌سازی هنوز تمام نشده؛ این نوبت رد شد.")
+            return None
+        self._running = True
+        try:
+            return await self._sweep((now or datetime.utcnow()).isoformat())
+        finally:
+            self._running = False
+
+    async def _sweep(self, now: str) -> SweepReport:
+        report = SweepReport()
+        started = time.perf_counter()
+        owners: Dict[int, List[int]] = defaultdict(list)
+        while report.batches < self.max_batches:
+            rows = await self.expire_batch(now, self.batch_size)
+            if not rows:
+                break
+            report.batches += 1
+            report.expired += len(rows)
+            for listing_id, user_id in rows:
+                owners[user_id].append(listing_id)
+            if len(rows) < self.batch_size:
+                break
+        else:
+            report.backlog = True
+
+        for user_id, listing_ids in owners.items():
+            try:
+                await self.notify(user_id, listing_ids)
+                report.notified += 1
+            except Exception as e:
+                report.notify_failed += 1
+                logger.warning(f"اطلاع انقضای آگهی به کاربر {user_id} ارسال نشد: {e}")
+            if self.notify_interval:
+                await asyncio.sleep(self.notify_interval)
+
+        report.elapsed = time.perf_counter() - started
+        self.sweeps += 1
+        self.expired_total += report.expired
+        self.notified_total += report.notified
+        self.notify_failed_total += report.notify_failed
+        self.last = report
+        return report
+
+    def stats(self) -> dict:
+        return {
+            "sweeps": self.sweeps,
+            "expired": self.expired_total,
+            "notified": self.notified_total,
+            "notify_failed": self.notify_failed_total,
+            "last_expired": self.last.expired if self.last else 0,
+            "last_seconds": self.last.elapsed if self.last else 0.0,
+        }
@@ -0,0 +1,335 @@
+# form_schema.py
+# کامپایل اسکیمای فرم (config.FORM_FIELDS) در شروع: متن درخواست هر فیلد، validator، کیبوردهای ثابت
+# و قالب‌های نمایش فرم؛ هندلرها در هر آپدیت فقط از این اشیای آماده استفاده می‌کنند
+from typing import Callable, Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from session import (
+    STEP_CHARS, STEP_DIVISION, STEP_FREE_TEXT, STEP_NUMBER, STEP_PHOTOS, STEP_PLAYER_VALUE, SaleForm
+)
+
+# نوع فیلد -> مرحله نشست که ورودی آن را می‌گیرد
+KIND_STEPS = {
+    "number": STEP_NUMBER,
+    "chars": STEP_CHARS,
+    "player_value": STEP_PLAYER_VALUE,
+    "division": STEP_DIVISION,
+    "photos": STEP_PHOTOS,
+    "text": STEP_FREE_TEXT,
+    "choice": None,
+}
+
+# validator: متن کاربر -> (مقدار ثبت‌شدنی یا None، متن پاسخ یا پیام خطا)
+Validator = Callable[[str], Tuple[Optional[str], str]]
+
+
+class FormSchemaError(ValueError):
+    """اسکیمای فرم نامعتبر (در شروع برنامه، نه وسط گفتگو)"""
+
+
+def format_number(value: int) -> str:
+    return f"{value:,}".replace(",", ".")
+
+
+class FormField:
+    __slots__ = ("key", "label", "kind", "step", "callback", "prompt", "success", "followup",
+                 "truncate", "in_temp", "validate")
+
+    def __init__(self, key: str, label: str, kind: str, callback: str, prompt: str, success: str,
+                 truncate: Optional[int], in_temp: bool):
+        self.key = key
+        self.label = label
+        self.kind = kind
+        self.step = KIND_STEPS[kind]
+        self.callback = callback
+        self.prompt = prompt
+        self.success = success
+        self.followup: Optional["FormField"] = None
+        self.truncate = truncate
+        self.in_temp = in_temp
+        self.validate: Optional[Validator] = None
+
+    def display(self, value) -> str:
+        if self.kind == "photos":
+            return f"{len(value)} عکس"
+        value = str(value)
+        if self.truncate and len(value) > self.truncate:
+            return f"{value[:self.truncate]}..."
+        return value
+
+
+# ---------- متن درخواست هر نوع فیلد ----------
+def _number_prompt(spec: dict) -> str:
+    return (f"{spec['prompt']}\nمثال: {spec['example']}\n\n"
+            f"ℹ️ فقط عدد انگلیسی باشد\n🔢 حداکثر {spec['max_digits']} رقم مجاز است")
+
+
+def _chars_prompt(spec: dict) -> str:
+    limit = spec["max_chars"]
+    return (f"{spec['prompt']}\nمثال: {spec['example']}\n\n"
+            f"📝 تعداد کاراکترهای باقیمانده: {limit}/{limit}\n⚠️ حداکثر {limit} کاراکتر مجاز است")
+
+
+def _division_rule(spec: dict, word_hint: str) -> str:
+    return (f"{spec['prompt']}\n- یک کلمه {spec['word_length']} حرفی ({word_hint})\n"
+            f"- یا یک عدد از {spec['min']} تا {spec['max']}")
+
+
+def _photos_prompt(max_photos: int) -> str:
+    return (f"📸 لطفا حداکثر {max_photos} عکس از اکانت خود ارسال کنید.\n\n"
+            "📌 محدودیت‌ها:\n"
+            "• فقط فایل‌های عکس مجاز هستند\n"
+            "• فرمت‌های قابل قبول: JPG, JPEG, PNG, WEBP\n"
+            "• فایل‌های غیر عکس بلاک و حذف می‌شوند\n\n"
+            "↩️ /back برای برگشت به فرم")
+
+
+def _prompt(spec: dict, max_photos: int) -> str:
+    kind = spec["kind"]
+    if kind == "number":
+        return _number_prompt(spec)
+    if kind == "chars":
+        return _chars_prompt(spec)
+    if kind == "division":
+        return _division_rule(spec, f"مثلاً: {spec['example']}")
+    if kind == "photos":
+        return _photos_prompt(max_photos)
+    if kind == "text":
+        return spec.get("prompt", "لطفا مقدار را وارد کنید:")
+    return ""
+
+
+# ---------- validatorها (یک closure برای هر فیلد، متن‌های خطا از قبل ساخته شده) ----------
+def _number_validator(spec: dict, prompt: str) -> Validator:
+    max_digits = spec["max_digits"]
+    success = spec["success"]
+    not_digit = f"❌ فقط عدد انگلیسی مجاز است!\n{prompt}"
+    bad_number = f"❌ خطا در پردازش عدد!\n{prompt}"
+
+    def validate(text: str):
+        if not text:
+            return None, prompt
+        if not text.isdigit():
+            return None, not_digit
+        if len(text) > max_digits:
+            return None, (f"❌ تعداد ارقام بیشتر از حد مجاز است!\n"
+                          f"📊 تعداد ارقام وارد شده: {len(text)}\n"
+                          f"✅ حداکثر مجاز: {max_digits} رقم\n\n{prompt}")
+        try:
+            number = int(text)
+        except ValueError:
+            return None, bad_number
+        return text, f"✅ {success}: {format_number(number)}"
+    return validate
+
+
+def _chars_validator(spec: dict, followup_prompt: Optional[str]) -> Validator:
+    limit = spec["max_chars"]
+
+    def validate(text: str):
+        if len(text) > limit:
+            return None, (f"❌ اسامی وارد شده بیشتر از حد مجاز است!\n"
+                          f"📝 تعداد کاراکترهای وارد شده: {len(text)}\n"
+                          f"✅ حداکثر مجاز: {limit} کاراکتر\n\n"
+                          f"لطفا دوباره تلاش کنید:\n\n"
+                          f"📝 تعداد کاراکترهای باقیمانده: {limit}/{limit}")
+        return text, followup_prompt or f"✅ اطلاعات ثبت شد:\n{text}"
+    return validate
+
+
+def _player_value_validator(spec: dict) -> Validator:
+    ask = f"{spec['prompt']}.\nمثال: {spec['example']}\n\nℹ️ فقط عدد انگلیسی باشد"
+    empty = f"❌ لطفا یک عدد وارد کنید.\n\n{ask}"
+    not_digit = (f"❌ فقط عدد انگلیسی مجاز است!\n"
+                 f"لطفا از حروف فارسی، انگلیسی یا کاراکترهای خاص استفاده نکنید.\n\n{ask}")
+    bad_number = "❌ خطا در پردازش عدد!\nلطفا فقط عدد معتبر وارد کنید."
+    success = spec["success"]
+
+    def validate(text: str):
+        if not text:
+            return None, empty
+        if not text.isdigit():
+            return None, not_digit
+        try:
+            number = int(text)
+        except ValueError:
+            return None, bad_number
+        return text, f"✅ {success}: {format_number(number)} کوین"
+    return validate
+
+
+def _division_validator(spec: dict) -> Validator:
+    low, high, word_length = spec["min"], spec["max"], spec["word_length"]
+    rule = _division_rule(spec, f"مثلاً: {spec['example']}")
+    empty = f"❌ لطفا یک مقدار وارد کنید.\n\n{rule}"
+    out_of_range = f"❌ عدد وارد شده باید بین {low} تا {high} باشد.\n\n{rule}"
+    invalid = f"❌ مقدار وارد شده معتبر نیست.\n\n{_division_rule(spec, f'فقط حروف، دقیقاً {word_length} کاراکتر')}"
+    success = spec["success"]
+
+    def validate(text: str):
+        if not text:
+            return None, empty
+        if text.isdigit():
+            if low <= int(text) <= high:
+                return text, f"✅ {success}: {text}"
+            return None, out_of_range
+        if text.isalpha() and len(text) == word_length:
+            return text, f"✅ {success}: {text}"
+        return None, invalid
+    return validate
+
+
+def _free_text_validator(spec: dict) -> Validator:
+    key = spec["key"]
+
+    def validate(text: str):
+        return text, f"✅ مقدار '{key}' ثبت شد."
+    return validate
+
+
+class CompiledForm:
+    """خروجی compile_form: فیلدها، کیبوردهای ثابت و توابع نمایش فرم"""
+
+    def __init__(self, fields: List[FormField], menu: InlineKeyboardMarkup, back_menu: InlineKeyboardMarkup,
+                 channel_fields: List[Tuple[str, str]]):
+        self.fields: Dict[str, FormField] = {f.key: f for f in fields}
+        self.order = tuple(fields)
+        # فیلدهای followup دکمه ندارند؛ بعد از فیلد قبلی خودشان پرسیده می‌شوند
+        followups = {f.followup.key for f in fields if f.followup is not None}
+        self.by_callback: Dict[str, FormField] = {
+            f.callback: f for f in fields if f.step is not None and f.key not in followups
+        }
+        self.menu = menu
+        self.back_menu = back_menu
+        self._temp = tuple((f.key, f"{f.label}: ", f) for f in fields if f.in_temp)
+        self._channel = tuple(channel_fields)
+
+    @property
+    def input_callbacks(self) -> Tuple[str, ...]:
+        """callback دکمه‌هایی که منتظر ورودی یک فیلد می‌شوند"""
+        return tuple(self.by_callback)
+
+    # فرم نشست (SaleForm) تکه‌های هر فیلد و خروجی کامل را کش می‌کند؛ dict ساده (فرم ذخیره‌شده
+    # در دیتابیس) هر بار کامل رندر می‌شود. کلید نماها خود این CompiledForm است تا کامپایل
+    # دوباره اسکیما کش قبلی را بی‌اثر کند
+    def render_temp(self, form: dict) -> str:
+        """فرم موقت (فقط فیلدهای پر شده)"""
+        if isinstance(form, SaleForm):
+            view = (self, "temp")
+            return form.rendered(view, lambda: self._render_temp(form, form.fragments(view)))
+        return self._render_temp(form, {})
+
+    def render_complete(self, form: dict) -> str:
+        """همه فیلدها با وضعیت تکمیل"""
+        if isinstance(form, SaleForm):
+            view = (self, "complete")
+            return form.rendered(view, lambda: self._render_complete(form, form.fragments(view)))
+        return self._render_complete(form, {})
+
+    def _render_temp(self, form: dict, fragments: dict) -> str:
+        parts = ["┌─── 📋 فرم موقت ───┐\n"]
+        for key, prefix, field in self._temp:
+            if key not in form:
+                continue
+            text = fragments.get(key)
+            if text is None:
+                text = fragments[key] = f"{prefix}{field.display(form[key])}\n"
+            parts.append(text)
+        parts.append("└────────────────┘")
+        return "".join(parts)
+
+    def _render_complete(self, form: dict, fragments: dict) -> str:
+        lines = []
+        completed = 0
+        for field in self.order:
+            value = form.get(field.key)
+            if value:
+                completed += 1
+            text = fragments.get(field.key)
+            if text is None:
+                text = fragments[field.key] = self._status_line(field, value)
+            lines.append(text)
+        total = len(self.order)
+        if completed == total:
+            status = "🎉 تمام اطلاعات تکمیل شده است!"
+        elif completed >= total * 0.7:
+            status = "⚠️ بیشتر اطلاعات تکمیل شده است"
+        elif completed >= total * 0.4:
+            status = "🔶 نیمی از اطلاعات تکمیل شده است"
+        else:
+            status = "🔴 اطلاعات کمی تکمیل شده است"
+        return ("┌─── 📋 اطلاعات ثبت شده ───┐\n\n" + "\n".join(lines) +
+                f"\n\n📊 وضعیت تکمیل: {completed}/{total}\n{status}\n└─────────────────────────┘")
+
+    @staticmethod
+    def _status_line(field: FormField, value) -> str:
+        if value:
+            return f"✅ {field.label}: {field.display(value)}"
+        return f"❌ {field.label}: ثبت نشده"
+
+    def render_channel(self, form: dict) -> str:
+        return "\n".join(f"{label}: {form[key]}" for key, label in self._channel if form.get(key))
+
+
+def compile_form(field_specs: List[dict], menu_rows: List[list], channel_fields: list,
+                 max_photos: int) -> CompiledForm:
+    """اسکیمای config را اعتبارسنجی و کامپایل می‌کند؛ خطای اسکیما FormSchemaError است"""
+    back_menu = InlineKeyboardMarkup([[InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]])
+    specs = {}
+    for spec in field_specs:
+        key, kind = spec.get("key"), spec.get("kind")
+        if not key or kind not in KIND_STEPS:
+            raise FormSchemaError(f"فیلد نامعتبر در اسکیمای فرم: {spec!r}")
+        if key in specs:
+            raise FormSchemaError(f"فیلد تکراری در اسکیمای فرم: {key}")
+        required = {"number": ("prompt", "example", "max_digits", "success"),
+                    "chars": ("prompt", "example", "max_chars", "success"),
+                    "player_value": ("prompt", "example", "success"),
+                    "division": ("prompt", "example", "word_length", "min", "max", "success")}.get(kind, ())
+        missing = [name for name in required if name not in spec]
+        if missing:
+            raise FormSchemaError(f"فیلد {key}: {', '.join(missing)} تعریف نشده")
+        specs[key] = spec
+
+    fields = []
+    for key, spec in specs.items():
+        fields.append(FormField(key, spec.get("label", key), spec["kind"], spec.get("callback", key),
+                                _prompt(spec, max_photos),
+                                spec.get("success", ""), spec.get("truncate"), spec.get("temp", True)))
+
+    by_key = {field.key: field for field in fields}
+    for field in fields:
+        spec = specs[field.key]
+        followup_prompt = None
+        if spec.get("followup"):
+            followup = by_key.get(spec["followup"])
+            if followup is None or followup.step is None:
+                raise FormSchemaError(f"followup نامعتبر برای {field.key}: {spec['followup']}")
+            field.followup = followup
+            follow_spec = specs[followup.key]
+            followup_prompt = (f"✅ {field.success}\n\n{follow_spec['prompt']}:\n"
+                               f"مثال: {follow_spec['example']}\n\n"
+                               f"ℹ️ این مقدار در محاسبه قیمت نهایی استفاده خواهد شد")
+        if field.kind == "number":
+            field.validate = _number_validator(spec, field.prompt)
+        elif field.kind == "chars":
+            field.validate = _chars_validator(spec, followup_prompt)
+        elif field.kind == "player_value":
+            field.validate = _player_value_validator(spec)
+        elif field.kind == "division":
+            field.validate = _division_validator(spec)
+        elif field.kind == "text":
+            field.validate = _free_text_validator(spec)
+
+    menu = InlineKeyboardMarkup([
+        [InlineKeyboardButton(text, callback_data=callback) for text, callback in row] for row in menu_rows
+    ])
+
+    channel = []
+    for entry in channel_fields:
+        key, label = entry if isinstance(entry, (tuple, list)) else (entry, None)
+        if key not in by_key:
+            raise FormSchemaError(f"فیلد ناشناخته در پست کانال: {key}")
+        channel.append((key, label or by_key[key].label))
+    return CompiledForm(fields, menu, back_menu, channel)
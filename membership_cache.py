@@ -0,0 +1,89 @@
+# membership_cache.py
+# کش نتیجه عضویت کانال: TTL جدا برای عضو/غیرعضو + ادغام درخواست‌های همزمان (single-flight)
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict
+
+
+class MembershipCache:
+    """نتیجه get_chat_member را برای هر کاربر مدتی نگه می‌دارد.
+
+    - عضو بودن positive_ttl ثانیه و عضو نبودن negative_ttl ثانیه معتبر است
+      (منفی کوتاه‌تر، تا کاربری که تازه عضو شده زود پذیرفته شود).
+    - اگر برای یک کاربر درخواستی در جریان باشد، درخواست‌های همزمان بعدی
+      منتظر همان می‌مانند و تماس دوباره با Bot API گرفته نمی‌شود.
+    - خطای fetch کش نمی‌شود و به همه منتظرها می‌رسد.
+    """
+
+    def __init__(self, positive_ttl: float = 600, negative_ttl: float = 30, max_entries: int = 50000):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        # user_id -> (is_member, expires_at)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, user_id: int, fetch: Callable[[], Awaitable[bool]]) -> bool:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            del self._entries[user_id]
+
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            is_member = bool(await fetch())
+        except BaseException as e:
+            future.set_exception(e)
+            # اگر منتظر دیگری نبود، هشدار «exception never retrieved» ندهد
+            future.exception()
+            raise
+        else:
+            future.set_result(is_member)
+            # اگر در این فاصله invalidate شده باشد، نتیجه قدیمی ذخیره نمی‌شود
+            if self._inflight.get(user_id) is future:
+                self._store(user_id, is_member)
+            return is_member
+        finally:
+            if self._inflight.get(user_id) is future:
+                del self._inflight[user_id]
+
+    def _store(self, user_id: int, is_member: bool):
+        ttl = self.positive_ttl if is_member else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[user_id] = (is_member, time.monotonic() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """فراموش کردن نتیجه کاربر (مثلاً بعد از «✅ من عضو شدم»)."""
+        self._entries.pop(user_id, None)
+        self._inflight.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,310 @@
+# outbound.py
+# صف خروجی پیام‌ها به Bot API: سطل توکن سراسری و هر چت، اولویت، و عقب‌نشینی خودکار روی RetryAfter
+# (به عنوان rate_limiter در ApplicationBuilder نصب می‌شود، پس همه bot.send_* / reply_* از آن رد می‌شوند)
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# اولویت‌ها (عدد کمتر زودتر): پاسخ مستقیم به کاربر، اعلان‌های ادمین، ارسال انبوه/کانال
+PRIORITY_REPLY = 0
+PRIORITY_ADMIN = 1
+PRIORITY_BROADCAST = 2
+PRIORITY_NAMES = {PRIORITY_REPLY: "reply", PRIORITY_ADMIN: "admin", PRIORITY_BROADCAST: "broadcast"}
+
+# فقط متدهایی که پیام می‌فرستند/ویرایش می‌کنند صف می‌شوند؛ getChatMember، answerCallbackQuery و
+# getUpdates مستقیم اجرا می‌شوند (فقط در زمان توقف RetryAfter منتظر می‌مانند)
+QUEUED_ENDPOINT_PREFIXES = ("send", "edit", "copy", "forward")
+
+
+class TokenBucket:
+    """rate توکن در ثانیه، حداکثر capacity توکن ذخیره"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """ثانیه تا در دسترس بودن یک توکن (0 یعنی همین حالا)"""
+        self._refill(now)
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Request:
+    __slots__ = ("priority", "callback", "args", "kwargs", "future", "enqueued", "retries")
+
+    def __init__(self, priority, callback, args, kwargs, future):
+        self.priority = priority
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.retries = 0
+
+
+class _Chat:
+    __slots__ = ("pending", "bucket", "busy", "scheduled")
+
+    def __init__(self, bucket: TokenBucket):
+        self.pending: Deque[_Request] = deque()
+        self.bucket = bucket
+        # busy: یک درخواست این چت در حال ارسال است (ترتیب پیام‌های هر چت حفظ می‌شود)
+        self.busy = False
+        # scheduled: چت در یکی از heapهای dispatcher هست
+        self.scheduled = False
+
+
+class OutboundQueue(BaseRateLimiter):
+    """صف اولویت‌دار پیام‌های خروجی.
+
+    - هر چت یک صف FIFO و یک سطل توکن دارد (چت خصوصی chat_rate، گروه و کانال
+      group_rate)؛ در هر لحظه فقط یک درخواست از هر چت در حال ارسال است.
+    - بین چت‌های آماده، اولویت درخواست سر صف (rate_limit_args) و بعد ترتیب ورود
+      تعیین می‌کند کدام زودتر توکن سراسری (global_rate در ثانیه) را بگیرد؛ با
+      global_burst کوچک، هیچ پنجره یک‌ثانیه‌ای بیشتر از global_rate + global_burst ندارد.
+    - RetryAfter همه ارسال‌ها را به اندازه retry_after متوقف می‌کند و درخواست
+      (حداکثر max_retries بار) دوباره سر صف چت خودش می‌رود.
+    """
+
+    def __init__(self, global_rate: float = 30, global_burst: float = 1, chat_rate: float = 1, chat_burst: float = 3,
+                 group_rate: float = 20 / 60, group_burst: float = 3, max_in_flight: int = 16,
+                 max_retries: int = 3, max_chats: int = 10000, latency_samples: int = 1000):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chats: Dict[Any, _Chat] = {}
+        # (priority, seq, chat_key): چت‌هایی که سر صفشان منتظر توکن سراسری است
+        self._ready: List[tuple] = []
+        # (not_before, seq, chat_key): چت‌هایی که سطل خودشان خالی است
+        self._delayed: List[tuple] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._paused_until = 0.0
+        self.in_flight = 0
+        self.depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self.sent = 0
+        self.failed = 0
+        self.retry_after = 0
+        self._wait_times: Deque[float] = deque(maxlen=latency_samples)
+        self._send_times: Deque[float] = deque(maxlen=latency_samples)
+
+    # ---------- BaseRateLimiter ----------
+    async def initialize(self) -> None:
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch(), name="outbound-queue")
+
+    async def shutdown(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for chat in self._chats.values():
+            for request in chat.pending:
+                if not request.future.done():
+                    request.future.cancel()
+        self._chats.clear()
+        self._ready.clear()
+        self._delayed.clear()
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if self._dispatcher is None or not endpoint.startswith(QUEUED_ENDPOINT_PREFIXES):
+            return await self._run_direct(callback, args, kwargs)
+        priority = rate_limit_args if rate_limit_args in PRIORITY_NAMES else PRIORITY_REPLY
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(data.get("chat_id"), _Request(priority, callback, args, kwargs, future))
+        return await future
+
+    async def _run_direct(self, callback, args, kwargs):
+        for attempt in range(self.max_retries + 1):
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self._pause(e)
+                if attempt == self.max_retries:
+                    raise
+
+    # ---------- صف ----------
+    def _enqueue(self, chat_key, request: _Request):
+        chat = self._chats.get(chat_key)
+        if chat is None:
+            if len(self._chats) >= self.max_chats:
+                self._prune()
+            chat = self._chats[chat_key] = _Chat(self._new_bucket(chat_key))
+        chat.pending.append(request)
+        self.depth[request.priority] += 1
+        self._schedule(chat_key, chat)
+
+    def _new_bucket(self, chat_key) -> TokenBucket:
+        try:
+            is_private = int(chat_key) > 0
+        except (TypeError, ValueError):
+            is_private = False  # @username کانال/گروه
+        if is_private:
+            return TokenBucket(self.chat_rate, self.chat_burst)
+        return TokenBucket(self.group_rate, self.group_burst)
+
+    def _prune(self):
+        now = time.monotonic()
+        idle = [key for key, chat in self._chats.items()
+                if not chat.pending and not chat.busy and chat.bucket.full(now)]
+        for key in idle:
+            del self._chats[key]
+
+    def _schedule(self, chat_key, chat: _Chat):
+        if chat.busy or chat.scheduled or not chat.pending:
+            return
+        chat.scheduled = True
+        delay = chat.bucket.delay(time.monotonic())
+        if delay > 0:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), chat_key))
+        else:
+            heapq.heappush(self._ready, (chat.pending[0].priority, next(self._seq), chat_key))
+        self._wakeup.set()
+
+    def _pause(self, error: RetryAfter):
+        self.retry_after += 1
+        retry_after = error.retry_after
+        seconds = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds + 0.1)
+        logger.warning("RetryAfter از Telegram: توقف ارسال‌ها به مدت %.1f ثانیه", seconds)
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, chat_key = heapq.heappop(self._delayed)
+                chat = self._chats.get(chat_key)
+                if chat is not None and chat.pending:
+                    heapq.heappush(self._ready, (chat.pending[0].priority, next(self._seq), chat_key))
+
+            wait = None
+            if self._paused_until > now:
+                wait = self._paused_until - now
+            elif self._ready and self.in_flight < self.max_in_flight:
+                wait = self.global_bucket.delay(now)
+                if wait <= 0:
+                    self._start_next(now)
+                    continue
+            if self._delayed:
+                until_delayed = self._delayed[0][0] - now
+                wait = until_delayed if wait is None else min(wait, until_delayed)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start_next(self, now: float):
+        _, _, chat_key = heapq.heappop(self._ready)
+        chat = self._chats[chat_key]
+        chat.scheduled = False
+        request = chat.pending.popleft()
+        self.depth[request.priority] -= 1
+        if request.future.done():  # فراخواننده لغو شده
+            self._schedule(chat_key, chat)
+            return
+        self.global_bucket.take(now)
+        chat.bucket.take(now)
+        chat.busy = True
+        self.in_flight += 1
+        task = asyncio.create_task(self._send(chat_key, chat, request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, chat_key, chat: _Chat, request: _Request):
+        started = time.monotonic()
+        try:
+            result = await request.callback(*request.args, **request.kwargs)
+        except RetryAfter as e:
+            self._pause(e)
+            if request.retries < self.max_retries:
+                request.retries += 1
+                chat.pending.appendleft(request)
+                self.depth[request.priority] += 1
+            else:
+                self.failed += 1
+                if not request.future.done():
+                    request.future.set_exception(e)
+        except Exception as e:
+            self.failed += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            self.sent += 1
+            self._wait_times.append(started - request.enqueued)
+            self._send_times.append(time.monotonic() - started)
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self.in_flight -= 1
+            chat.busy = False
+            self._schedule(chat_key, chat)
+            self._wakeup.set()
+
+    # ---------- آمار ----------
+    @staticmethod
+    def _percentile_ms(samples, p: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    def stats(self) -> dict:
+        stats = {f"depth_{name}": self.depth[priority] for priority, name in PRIORITY_NAMES.items()}
+        stats.update({
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retry_after": self.retry_after,
+            "chats": len(self._chats),
+            "wait_p50_ms": self._percentile_ms(self._wait_times, 0.5),
+            "wait_p95_ms": self._percentile_ms(self._wait_times, 0.95),
+            "send_p50_ms": self._percentile_ms(self._send_times, 0.5),
+            "send_p95_ms": self._percentile_ms(self._send_times, 0.95),
+        })
+        return stats
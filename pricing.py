@@ -0,0 +1,287 @@
+# pricing.py
+# مدل قیمت‌گذاری کامپایل‌شده از PRICE_CONFIG: bisect روی نقاط شکست + API دسته‌ای با NumPy
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import config
+
+WEB_APP_OPEN = 'وب باز'
+
+# ورودی‌های فرم ربات که در قیمت اثر دارند (همان fingerprint)
+PRICING_FIELDS = ('coin_account', 'trade_players_value', 'non_trade_players_value', 'web_app',
+                  'match_earning', 'season_level', 'division_rivals')
+
+
+def is_priceable(form_data) -> bool:
+    """فرم دستی و فرم بدون هیچ فیلد قیمت تخمین ندارند (مثل record_listing، بازه NULL)"""
+    return (isinstance(form_data, dict) and form_data.get('submission_type') != 'manual'
+            and any(key in form_data for key in PRICING_FIELDS))
+
+
+class BracketTable:
+    """جدول پاداش بازه‌ای ({(min, max): bonus}) به صورت نقاط شکست مرتب.
+
+    معنای قبلی حفظ می‌شود: اولین بازه (به ترتیب dict) که min <= x < max باشد
+    برنده است و خارج از همه بازه‌ها پاداش صفر است.
+    """
+
+    __slots__ = ("bounds", "values")
+
+    def __init__(self, brackets: Dict[tuple, float]):
+        items = list(brackets.items())
+        bounds = sorted({edge for (lo, hi), _ in items for edge in (lo, hi)})
+        values = []
+        for i, start in enumerate(bounds):
+            value = 0
+            # هر بازه بین دو نقطه شکست متوالی کاملاً داخل یا کاملاً خارج هر bracket است
+            end = bounds[i + 1] if i + 1 < len(bounds) else None
+            if end is not None:
+                for (lo, hi), bonus in items:
+                    if lo <= start and end <= hi:
+                        value = bonus
+                        break
+            values.append(value)
+        self.bounds = bounds
+        self.values = values
+
+    def lookup(self, x) -> float:
+        i = bisect_right(self.bounds, x) - 1
+        return self.values[i] if i >= 0 else 0
+
+    def lookup_many(self, xs):
+        import numpy as np
+        bounds = np.asarray(self.bounds, dtype=float)
+        # اندیس 0 برای مقادیر کمتر از اولین نقطه شکست
+        values = np.asarray([0] + self.values, dtype=float)
+        return values[np.searchsorted(bounds, xs, side="right")]
+
+
+class PriceBreakdown(NamedTuple):
+    coin_value: float
+    trade_players_value: float
+    nontrade_players_value: float
+    web_app_bonus: float
+    match_bonus: float
+    season_bonus: float
+    division_bonus: float
+    total: float
+    lower: float
+    upper: float
+
+
+class PriceBatch(NamedTuple):
+    """خروجی قیمت‌گذاری دسته‌ای؛ ok=False یعنی فرم قابل قیمت‌گذاری نبود."""
+    total: Any
+    lower: Any
+    upper: Any
+    ok: Any
+
+
+# ورودی‌های نرمال‌شده قیمت‌گذاری یک فرم:
+# (کوین، ارزش ترید، ارزش آنترید، وب باز، مچ ارنینگ، لول سیزن، دیویژن با حروف کوچک)
+Fingerprint = Tuple[int, int, int, bool, int, int, str]
+
+
+class EstimateCache:
+    """LRU محدود از اثر انگشت فرم به تخمین رندرشده.
+
+    هر PriceModel کش خودش را دارد، پس reload_price_model همه تخمین‌های
+    قبلی را خودبه‌خود بی‌اعتبار می‌کند.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[Fingerprint, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Fingerprint, compute: Callable[[], Any]) -> Any:
+        value = self._entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+        self.misses += 1
+        value = compute()
+        if self.max_entries:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class PriceModel:
+    """ضرایب PRICE_CONFIG یک بار خوانده و آماده می‌شوند.
+
+    ترتیب عملیات اعشاری همان فرمول قبلی است تا خروجی بیت به بیت یکسان بماند.
+    """
+
+    def __init__(self, price_config: Dict[str, Any], estimate_cache_size: int = 0):
+        self.coin_divider = price_config["coin_divider"]
+        self.coin_value_unit = price_config["coin_value_unit"]
+        self.trade_multiplier = price_config["trade_players_multiplier"]
+        self.trade_divider = price_config["trade_players_divider"]
+        self.nontrade_multiplier = price_config["nontrade_players_multiplier"]
+        self.nontrade_divider = price_config["nontrade_players_divider"]
+        self.nontrade_discount = price_config["nontrade_players_discount"]
+        self.web_open_bonus = price_config["web_app_open_bonus"]
+        self.web_closed_bonus = price_config["web_app_closed_bonus"]
+        self.match_table = BracketTable(price_config["match_earning_bonuses"])
+        self.season_table = BracketTable(price_config["season_level_bonuses"])
+        self.division_bonuses = dict(price_config["division_bonuses"])
+        self.range_percent = price_config["price_range_percent"]
+        self.estimates = EstimateCache(estimate_cache_size)
+
+    # ---------- یک فرم ----------
+    @staticmethod
+    def fingerprint(form_data: Dict[str, Any]) -> Fingerprint:
+        """فقط ورودی‌هایی که در قیمت اثر دارند، نرمال‌شده؛ در صورت عدد نبودن فیلدها ValueError می‌دهد."""
+        return (
+            int(form_data.get('coin_account', 0)),
+            int(form_data.get('trade_players_value', 0)),
+            int(form_data.get('non_trade_players_value', 0)),
+            form_data.get('web_app') == WEB_APP_OPEN,
+            int(form_data.get('match_earning', 0)),
+            int(form_data.get('season_level', 0)),
+            str(form_data.get('division_rivals', '')).lower(),
+        )
+
+    def breakdown(self, form_data: Dict[str, Any]) -> PriceBreakdown:
+        """محاسبه کامل برای یک فرم؛ در صورت عدد نبودن فیلدها ValueError می‌دهد."""
+        return self._breakdown(self.fingerprint(form_data))
+
+    def estimate(self, form_data: Dict[str, Any], render: Callable[[PriceBreakdown], Any]) -> Any:
+        """render(breakdown) با کش: فرم‌هایی با ورودی قیمت‌گذاری یکسان خروجی رندرشده قبلی را می‌گیرند.
+
+        خروجی کش‌شده بین کاربران مشترک است و نباید تغییر داده شود.
+        """
+        key = self.fingerprint(form_data)
+        return self.estimates.get(key, lambda: render(self._breakdown(key)))
+
+    def _breakdown(self, key: Fingerprint) -> PriceBreakdown:
+        coins, trade_input, nontrade_input, web_open, match_earning, season_level, division = key
+
+        coin_value = (coins / self.coin_divider) * self.coin_value_unit
+        trade_value = (trade_input * self.trade_multiplier) / self.trade_divider
+        nontrade_value = (nontrade_input * self.nontrade_multiplier) / self.nontrade_divider * self.nontrade_discount
+        web_app_bonus = self.web_open_bonus if web_open else self.web_closed_bonus
+        match_bonus = self.match_table.lookup(match_earning)
+        season_bonus = self.season_table.lookup(season_level)
+        division_bonus = self.division_bonuses.get(division, 0)
+
+        total = (coin_value + trade_value + nontrade_value +
+                 web_app_bonus + match_bonus + season_bonus + division_bonus)
+        return PriceBreakdown(
+            coin_value, trade_value, nontrade_value, web_app_bonus, match_bonus,
+            season_bonus, division_bonus, total,
+            total * (1 - self.range_percent), total * (1 + self.range_percent),
+        )
+
+    def estimate_range(self, form_data: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """(کمینه، بیشینه) تخمین به تومان برای ذخیره در آگهی؛ فرم نامعتبر None."""
+        try:
+            price = self.breakdown(form_data)
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return None
+        return int(price.lower), int(price.upper)
+
+    # ---------- دسته‌ای ----------
+    def price_arrays(self, coins, trade_values, nontrade_values, web_open,
+                     match_earnings, season_levels, division_bonuses) -> PriceBatch:
+        """قیمت‌گذاری برداری روی آرایه‌های هم‌طول (NumPy)."""
+        import numpy as np
+        coins = np.asarray(coins, dtype=float)
+        trade_values = np.asarray(trade_values, dtype=float)
+        nontrade_values = np.asarray(nontrade_values, dtype=float)
+        total = (
+            (coins / self.coin_divider) * self.coin_value_unit
+            + (trade_values * self.trade_multiplier) / self.trade_divider
+            + (nontrade_values * self.nontrade_multiplier) / self.nontrade_divider * self.nontrade_discount
+            + np.where(np.asarray(web_open, dtype=bool), self.web_open_bonus, self.web_closed_bonus)
+            + self.match_table.lookup_many(np.asarray(match_earnings, dtype=float))
+            + self.season_table.lookup_many(np.asarray(season_levels, dtype=float))
+            + np.asarray(division_bonuses, dtype=float)
+        )
+        return PriceBatch(total, total * (1 - self.range_percent), total * (1 + self.range_percent),
+                          np.ones(total.shape, dtype=bool))
+
+    def price_forms(self, forms: Sequence[Optional[Dict[str, Any]]]) -> PriceBatch:
+        """قیمت‌گذاری دسته‌ای فرم‌ها (مثلاً data_json آگهی‌ها)؛ فرم نامعتبر، فرم دستی و
+        فرم بدون فیلد قیمت ok=False و قیمت 0 می‌گیرند."""
+        import numpy as np
+        n = len(forms)
+        columns = np.zeros((5, n), dtype=float)
+        web_open = np.zeros(n, dtype=bool)
+        division = np.zeros(n, dtype=float)
+        ok = np.ones(n, dtype=bool)
+        division_bonuses = self.division_bonuses
+        for i, form_data in enumerate(forms):
+            if not is_priceable(form_data):
+                ok[i] = False
+                continue
+            try:
+                columns[0, i] = int(form_data.get('coin_account', 0))
+                columns[1, i] = int(form_data.get('trade_players_value', 0))
+                columns[2, i] = int(form_data.get('non_trade_players_value', 0))
+                columns[3, i] = int(form_data.get('match_earning', 0))
+                columns[4, i] = int(form_data.get('season_level', 0))
+            except (AttributeError, TypeError, ValueError, OverflowError):
+                columns[:, i] = 0
+                ok[i] = False
+                continue
+            web_open[i] = form_data.get('web_app') == WEB_APP_OPEN
+            division[i] = division_bonuses.get(str(form_data.get('division_rivals', '')).lower(), 0)
+        batch = self.price_arrays(columns[0], columns[1], columns[2], web_open,
+                                  columns[3], columns[4], division)
+        zero = np.zeros(n, dtype=float)
+        return PriceBatch(np.where(ok, batch.total, zero), np.where(ok, batch.lower, zero),
+                          np.where(ok, batch.upper, zero), ok)
+
+
+# =========================
+# مدل سراسری (کامپایل در اولین استفاده)
+# =========================
+_model: Optional[PriceModel] = None
+_model_lock = threading.Lock()
+
+
+def get_price_model() -> PriceModel:
+    global _model
+    model = _model
+    if model is None:
+        with _model_lock:
+            if _model is None:
+                _model = PriceModel(config.PRICE_CONFIG, config.PRICE_ESTIMATE_CACHE_SIZE)
+            model = _model
+    return model
+
+
+def reload_price_model(price_config: Optional[Dict[str, Any]] = None) -> PriceModel:
+    """کامپایل دوباره بعد از تغییر ضرایب (پیش‌فرض: config.PRICE_CONFIG فعلی).
+
+    مدل جدید با کش تخمین خالی شروع می‌کند.
+    """
+    return install_price_model(PriceModel(config.PRICE_CONFIG if price_config is None else price_config,
+                                          config.PRICE_ESTIMATE_CACHE_SIZE))
+
+
+def install_price_model(model: PriceModel) -> PriceModel:
+    """جایگزینی مدل سراسری با مدلی که جای دیگر (مثلاً روی thread جدا) کامپایل شده است."""
+    global _model
+    with _model_lock:
+        _model = model
+    return model
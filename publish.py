@@ -0,0 +1,127 @@
+# publish.py
+# انتشار آگهی‌های تأییدشده در کانال: صف انتشار، قفل شرطی در دیتابیس و ثبت دسته‌ای message_id
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# نتیجه submit
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+
+
+class ChannelPublisher:
+    """تأیید ادمین فقط آگهی را قفل و در صف می‌گذارد؛ یک worker پست‌ها را می‌فرستد.
+
+    - claim یک UPDATE شرطی است (pending -> active)، پس دوبار زدن دکمه تأیید
+      (یا دو ادمین همزمان) فقط یک پست در کانال می‌سازد.
+    - worker هر بار تا batch_size آگهی از صف برمی‌دارد، پست‌ها را (از طریق صف
+      خروجی rate-limited ربات) می‌فرستد و message_id همه را در یک تراکنش ثبت می‌کند.
+    - اگر ارسال خطا بدهد آگهی به صف بررسی برمی‌گردد تا ادمین دوباره تأیید کند.
+    """
+
+    def __init__(self, claim: Callable[[int], Awaitable[Optional[Dict[str, Any]]]],
+                 post: Callable[[Dict[str, Any]], Awaitable[int]],
+                 mark_published: Callable[[list], Awaitable[None]],
+                 release: Callable[[int], Awaitable[None]],
+                 on_published: Optional[Callable[[Dict[str, Any], int], Awaitable[None]]] = None,
+                 batch_size: int = 10):
+        self.claim = claim
+        self.post = post
+        self.mark_published = mark_published
+        self.release = release
+        self.on_published = on_published
+        self.batch_size = max(1, batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._busy = False
+        self._stopping = False
+        self.published = 0
+        self.failed = 0
+        self.duplicates = 0
+
+    async def start(self, resume: Iterable[Dict[str, Any]] = ()):
+        """resume: آگهی‌های قفل‌شده‌ای که قبل از ری‌استارت منتشر نشدند"""
+        self._queue = asyncio.Queue()
+        for listing in resume:
+            self._queue.put_nowait(listing)
+        self._worker = asyncio.create_task(self._run(), name="channel-publisher")
+
+    async def stop(self, timeout: float = 30):
+        """توقف worker؛ باید قبل از بسته شدن bot و صف خروجی صدا زده شود (post_stop).
+
+        دسته در حال ارسال (تا timeout ثانیه) کامل و ثبت می‌شود تا آلبومی نیمه‌کاره نماند؛
+        آگهی‌های مانده در صف قفل می‌مانند و بعد از ری‌استارت از unfinished_publish ادامه می‌یابند.
+        """
+        if self._worker is None:
+            return
+        self._stopping = True
+        if not self._busy:
+            self._worker.cancel()
+        try:
+            await asyncio.wait_for(self._worker, timeout)
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning("انتشار کانال در %s ثانیه تمام نشد و متوقف شد.", timeout)
+        self._worker = None
+
+    async def submit(self, listing_id: int) -> str:
+        listing = await self.claim(listing_id)
+        if listing is None:
+            self.duplicates += 1
+            return DUPLICATE
+        self._queue.put_nowait(listing)
+        return QUEUED
+
+    async def _run(self):
+        while not self._stopping:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._busy = True
+            try:
+                await self._publish(batch)
+            finally:
+                self._busy = False
+
+    async def _publish(self, batch: list):
+        done = []
+        for listing in batch:
+            try:
+                message_id = await self.post(listing)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"خطا در انتشار آگهی {listing['id']} در کانال: {e}")
+                try:
+                    await self.release(listing["id"])
+                except Exception as e:
+                    logger.error(f"خطا در برداشتن قفل انتشار آگهی {listing['id']}: {e}")
+                continue
+            done.append((listing, message_id))
+
+        if not done:
+            return
+        published_at = datetime.utcnow().isoformat()
+        try:
+            await self.mark_published([(message_id, published_at, listing["id"]) for listing, message_id in done])
+        except Exception as e:
+            # پست‌ها فرستاده شده‌اند و قفل می‌ماند؛ فقط بعد از ری‌استارت دوباره فرستاده می‌شوند
+            logger.error(f"خطا در ثبت message_id پست‌های کانال: {e}")
+        self.published += len(done)
+        if self.on_published:
+            for listing, message_id in done:
+                try:
+                    await self.on_published(listing, message_id)
+                except Exception as e:
+                    logger.warning(f"اطلاع انتشار آگهی {listing['id']} به کاربر ارسال نشد: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "published": self.published,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,130 @@
+# repository.py
+# API غیرهمزمان کاربران و آگهی‌ها؛ کوئری‌های SQLite روی thread پول جدا اجرا می‌شوند
+# تا fsync دیسک حلقه asyncio ربات را متوقف نکند.
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import config
+import db
+
+_readers: Optional[ThreadPoolExecutor] = None
+_writer: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executors():
+    """executorهای اختصاصی دیتابیس.
+
+    خواندن‌ها روی چند thread (WAL اجازه خواندن موازی می‌دهد) و نوشتن‌ها روی
+    یک thread تکی اجرا می‌شوند تا نویسنده‌ها سر قفل SQLite با هم رقابت نکنند.
+    """
+    global _readers, _writer
+    if _writer is None:
+        with _executor_lock:
+            if _writer is None:
+                _readers = ThreadPoolExecutor(
+                    max_workers=max(1, config.DB_POOL_SIZE - 1),
+                    thread_name_prefix="sqlite-read",
+                )
+                _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+    return _readers, _writer
+
+def shutdown_executor(wait: bool = True):
+    global _readers, _writer
+    with _executor_lock:
+        for executor in (_readers, _writer):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+        _readers = _writer = None
+
+async def run_db(fn, *args, **kwargs):
+    """اجرای یک تابع خواندنی دیتابیس روی executor و انتظار برای نتیجه."""
+    loop = asyncio.get_running_loop()
+    readers, _ = _get_executors()
+    return await loop.run_in_executor(readers, functools.partial(fn, *args, **kwargs))
+
+async def run_db_write(fn, *args, **kwargs):
+    """اجرای یک تابع نوشتنی دیتابیس روی thread نویسنده."""
+    loop = asyncio.get_running_loop()
+    _, writer = _get_executors()
+    return await loop.run_in_executor(writer, functools.partial(fn, *args, **kwargs))
+
+# =========================
+# کاربران
+# =========================
+class UserRepository:
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await run_db(db.get_user_row, user_id)
+
+    async def ensure(self, user_id: int):
+        await run_db_write(db.ensure_user, user_id)
+
+    async def mark_free_used(self, user_id: int):
+        await run_db_write(db.set_user_free_used, user_id)
+
+    async def has_used_free(self, user_id: int) -> bool:
+        row = await self.get(user_id)
+        return bool(row and row.get("free_used"))
+
+# =========================
+# آگهی‌ها
+# =========================
+class ListingRepository:
+    async def create(self, user_id: int, data_json: str, receipt_file_id: Optional[str] = None,
+                     estimate: Optional[Tuple[int, int]] = None, status: str = 'pending') -> int:
+        return await run_db_write(db.record_listing, user_id, data_json, receipt_file_id, estimate, status)
+
+    async def approve(self, listing_id: int) -> Optional[Dict[str, Any]]:
+        """pending -> active (+ قفل انتشار)؛ None یعنی قبلاً بررسی شده"""
+        return await run_db_write(db.approve_listing, listing_id)
+
+    async def reject(self, listing_id: int) -> Optional[Dict[str, Any]]:
+        """pending -> rejected؛ None یعنی قبلاً بررسی شده"""
+        return await run_db_write(db.mark_listing_rejected_by_admin, listing_id)
+
+    async def discard_pending(self, listing_id: int):
+        await run_db_write(db.discard_pending_listing, listing_id)
+
+    async def pending(self, after_id: int = 0, limit: int = 10) -> List[tuple]:
+        return await run_db(db.pending_listings, after_id, limit)
+
+    async def count_pending(self) -> int:
+        return await run_db(db.count_pending_listings)
+
+    async def get(self, listing_id: int) -> Optional[Dict[str, Any]]:
+        return await run_db(db.get_listing, listing_id)
+
+    async def expire_due(self, now: str, limit: int) -> List[Tuple[int, int]]:
+        return await run_db_write(db.expire_due_listings, now, limit)
+
+    async def latest_pending_id(self, user_id: int) -> Optional[int]:
+        return await run_db(db.latest_pending_listing_id, user_id)
+
+    async def mark_published(self, rows: List[Tuple[int, str, int]]):
+        await run_db_write(db.mark_listings_published, rows)
+
+    async def release_publish(self, listing_id: int):
+        await run_db_write(db.release_publish_claim, listing_id)
+
+    async def unfinished_publish(self) -> List[Dict[str, Any]]:
+        return await run_db(db.unfinished_publish_listings)
+
+    async def for_user(self, user_id: int) -> List[Dict[str, Any]]:
+        return await run_db(db.get_user_listings, user_id)
+
+    async def search(self, **filters) -> List[tuple]:
+        """جستجوی خریدار (فیلترها: db.build_search_query)"""
+        return await run_db(db.search_listings, **filters)
+
+    async def search_players(self, text: str, limit: int = 10) -> List[tuple]:
+        """جستجوی متنی نام بازیکنان (FTS5)"""
+        return await run_db(db.search_players, text, limit)
+
+    async def update(self, listing_id: int, data_json: str):
+        await run_db_write(db.update_listing, listing_id, data_json)
+
+
+users = UserRepository()
+listings = ListingRepository()
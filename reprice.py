@@ -0,0 +1,155 @@
+# reprice.py
+# قیمت‌گذاری دوباره همه آگهی‌های فعال بعد از تغییر PRICE_CONFIG
+# (پیمایش keyset صفحه به صفحه؛ هیچ‌وقت همه data_json ها با هم در حافظه نیستند)
+#
+#   python reprice.py --batch-size 5000
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+import db
+from pricing import PriceModel, get_price_model, is_priceable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+class RepriceReport:
+    """خلاصه یک اجرای قیمت‌گذاری دوباره"""
+
+    __slots__ = ("rows", "invalid", "unpriced", "batches", "elapsed")
+
+    def __init__(self):
+        self.rows = 0
+        self.invalid = 0
+        self.unpriced = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def repriced(self) -> int:
+        return self.rows - self.invalid - self.unpriced
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"{self.repriced} of {self.rows} listings repriced in {self.batches} batches, "
+                f"{self.unpriced} manual or without pricing fields, {self.invalid} unparsable, "
+                f"{self.elapsed:.2f}s ({self.rows_per_sec:,.0f} rows/s)")
+
+
+def price_page(rows: List[Tuple[int, str]], model: PriceModel, priced_at: str) -> Tuple[list, int, int]:
+    """یک صفحه (id, data_json) -> ردیف‌های UPDATE، تعداد فرم‌های نامعتبر و تعداد فرم‌های بدون قیمت.
+
+    فرم نامعتبر بازه NULL می‌گیرد تا تخمین قدیمی اشتباه باقی نماند؛ فرم دستی و فرم بدون
+    فیلد قیمت هم مثل record_listing بازه NULL می‌گیرند و جدا شمرده می‌شوند.
+    """
+    forms = []
+    priceable = []
+    for _, data_json in rows:
+        try:
+            form_data = json.loads(data_json) if data_json else None
+        except ValueError:
+            form_data = None
+        form_data = form_data if isinstance(form_data, dict) else None
+        # فرم نامعتبر (None) در price_forms شمرده می‌شود، نه به عنوان بدون قیمت
+        priceable.append(form_data is None or is_priceable(form_data))
+        forms.append(form_data)
+    batch = model.price_forms(forms)
+    lows = batch.lower.astype("int64").tolist()
+    highs = batch.upper.astype("int64").tolist()
+    updates = []
+    invalid = unpriced = 0
+    for (listing_id, _), has_price, ok, low, high in zip(rows, priceable, batch.ok.tolist(), lows, highs):
+        if ok:
+            updates.append((low, high, priced_at, listing_id))
+            continue
+        updates.append((None, None, priced_at, listing_id))
+        if has_price:
+            invalid += 1
+        else:
+            unpriced += 1
+    return updates, invalid, unpriced
+
+
+def load_and_price(after_id: int, limit: int, model: PriceModel, priced_at: str):
+    """خواندن صفحه بعدی و قیمت‌گذاری آن: (updates, invalid, unpriced, last_id) یا None در پایان."""
+    rows = db.fetch_active_listings_after(after_id, limit)
+    if not rows:
+        return None
+    updates, invalid, unpriced = price_page(rows, model, priced_at)
+    return updates, invalid, unpriced, rows[-1][0]
+
+
+def reprice_listings(batch_size: int = DEFAULT_BATCH_SIZE, model: Optional[PriceModel] = None,
+                     progress: Optional[Callable[[RepriceReport], None]] = None) -> RepriceReport:
+    """نسخه همزمان (برای خط فرمان): هر صفحه در یک تراکنش جدا نوشته می‌شود."""
+    model = model or get_price_model()
+    priced_at = datetime.utcnow().isoformat()
+    report = RepriceReport()
+    started = time.perf_counter()
+    after_id = 0
+    while True:
+        page = load_and_price(after_id, batch_size, model, priced_at)
+        if page is None:
+            break
+        updates, invalid, unpriced, after_id = page
+        db.save_listing_estimates(updates)
+        report.rows += len(updates)
+        report.invalid += invalid
+        report.unpriced += unpriced
+        report.batches += 1
+        report.elapsed = time.perf_counter() - started
+        if progress:
+            progress(report)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+async def reprice_listings_async(batch_size: int = DEFAULT_BATCH_SIZE, model: Optional[PriceModel] = None) -> RepriceReport:
+    """نسخه داخل ربات: خواندن و محاسبه روی thread خواننده، نوشتن روی thread نویسنده.
+
+    بین صفحه‌ها نوشتن‌های دیگر ربات هم نوبت می‌گیرند، پس قفل نوشتن طولانی نمی‌شود.
+    """
+    from repository import run_db, run_db_write
+    model = model or get_price_model()
+    priced_at = datetime.utcnow().isoformat()
+    report = RepriceReport()
+    started = time.perf_counter()
+    after_id = 0
+    while True:
+        page = await run_db(load_and_price, after_id, batch_size, model, priced_at)
+        if page is None:
+            break
+        updates, invalid, unpriced, after_id = page
+        await run_db_write(db.save_listing_estimates, updates)
+        report.rows += len(updates)
+        report.invalid += invalid
+        report.unpriced += unpriced
+        report.batches += 1
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="reprice all active listings with the current PRICE_CONFIG")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--quiet", action="store_true", help="only print the final report")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+    def log_progress(report: RepriceReport):
+        if report.batches % 50 == 0:
+            logger.info("%d rows (%.0f rows/s)", report.rows, report.rows_per_sec)
+
+    db.init_db()
+    try:
+        print(reprice_listings(args.batch_size, progress=None if args.quiet else log_progress))
+    finally:
+        db.close_pool()
@@ -0,0 +1,66 @@
+# router.py
+# مسیریاب جدولی callback_data: dict برای کلیدهای دقیق + trie برای پیشوندها
+from typing import Any, Callable, Dict, Optional
+
+Handler = Callable[..., Any]
+
+# کلید برگ در گره‌های trie (کاراکتر واقعی نیست، پس با داده تداخل ندارد)
+_HANDLER = None
+
+
+class CallbackRouter:
+    """جایگزین زنجیره if/startswith روی query.data.
+
+    - کلیدهای دقیق در یک dict هستند (یک lookup).
+    - پیشوندها در یک trie کاراکتری هستند؛ طولانی‌ترین پیشوند منطبق برنده است.
+    - کلید دقیق همیشه بر پیشوند مقدم است (مثل "platform" در برابر "platform_").
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, Handler] = {}
+        self._trie: dict = {}
+
+    def add_exact(self, key: str, handler: Handler):
+        if key in self._exact:
+            raise ValueError(f"duplicate callback key: {key!r}")
+        self._exact[key] = handler
+
+    def add_prefix(self, prefix: str, handler: Handler):
+        if not prefix:
+            raise ValueError("empty callback prefix")
+        node = self._trie
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        if _HANDLER in node:
+            raise ValueError(f"duplicate callback prefix: {prefix!r}")
+        node[_HANDLER] = handler
+
+    # ---------- ثبت اعلانی با decorator ----------
+    def exact(self, *keys: str):
+        def decorator(handler: Handler) -> Handler:
+            for key in keys:
+                self.add_exact(key, handler)
+            return handler
+        return decorator
+
+    def prefix(self, prefix: str):
+        def decorator(handler: Handler) -> Handler:
+            self.add_prefix(prefix, handler)
+            return handler
+        return decorator
+
+    # ---------- یافتن هندلر ----------
+    def resolve(self, data: str) -> Optional[Handler]:
+        handler = self._exact.get(data)
+        if handler is not None:
+            return handler
+        node = self._trie
+        for ch in data:
+            node = node.get(ch)
+            if node is None:
+                break
+            handler = node.get(_HANDLER, handler)
+        return handler
+
+    def __contains__(self, data: str) -> bool:
+        return self.resolve(data) is not None
@@ -0,0 +1,132 @@
+# session.py
+# رکورد فشرده فروش در حال انجام هر کاربر (جایگزین هفت dict جداگانه)
+import json
+from typing import Callable, Optional
+
+# مرحله‌ای که ربات منتظر ورودی متنی/عکس آن است
+STEP_EAPLAY_DAYS = "eaplay_days"
+STEP_CHARS = "chars"
+STEP_PLAYER_VALUE = "player_value"
+STEP_NUMBER = "number"
+STEP_DIVISION = "division"
+STEP_PHOTOS = "photos"
+STEP_FREE_TEXT = "free_text"
+
+
+class SaleForm(dict):
+    """dict فرم با کش نمایش.
+
+    هر تغییر فیلد شماره نسخه را بالا می‌برد و فقط تکه‌های رندرشده همان فیلد را
+    باطل می‌کند؛ خروجی کامل هر نما با نسخه فرم کلید می‌خورد، پس نمایش دوباره
+    فرم تغییرنکرده فقط یک lookup است.
+    """
+
+    __slots__ = ("version", "_fragments", "_rendered")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        self._fragments: dict = {}   # نما -> {فیلد: متن}
+        self._rendered: dict = {}    # نما -> (نسخه، متن)
+
+    def _changed(self, key):
+        self.version += 1
+        for fragments in self._fragments.values():
+            fragments.pop(key, None)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._changed(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._changed(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+        self._fragments.clear()
+
+    def fragments(self, view) -> dict:
+        """تکه‌های رندرشده فیلدها در یک نما (فیلد -> متن)؛ با تغییر هر فیلد فقط تکه همان فیلد حذف می‌شود"""
+        fragments = self._fragments.get(view)
+        if fragments is None:
+            fragments = self._fragments[view] = {}
+        return fragments
+
+    def rendered(self, view, build: Callable[[], str]) -> str:
+        """خروجی کامل یک نما برای نسخه فعلی فرم"""
+        cached = self._rendered.get(view)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        text = build()
+        self._rendered[view] = (self.version, text)
+        return text
+
+
+class SaleSession:
+    """فرم، مرحله فعلی، فیلد در انتظار و عکس‌های یک فروش نیمه‌کاره.
+
+    با __slots__ هر نشست بدون __dict__ ساخته می‌شود؛ لیست عکس‌ها فقط در
+    مرحله آپلود عکس ساخته می‌شود.
+    """
+
+    __slots__ = ("form", "step", "pending_field", "platform", "photos", "pending_listing_id")
+
+    def __init__(self, form: Optional[dict] = None, step: Optional[str] = None,
+                 pending_field: Optional[str] = None, platform: Optional[str] = None,
+                 photos: Optional[list] = None, pending_listing_id: Optional[int] = None):
+        self.form = SaleForm() if form is None else SaleForm(form)
+        self.step = step
+        self.pending_field = pending_field
+        self.platform = platform
+        self.photos = photos
+        self.pending_listing_id = pending_listing_id
+
+    def expect(self, step: str, field: Optional[str] = None):
+        """منتظر ورودی یک مرحله/فیلد شدن (مرحله قبلی لغو می‌شود)."""
+        self.step = step
+        self.pending_field = field
+        self.photos = [] if step == STEP_PHOTOS else None
+
+    def reset_input(self):
+        """لغو ورودی در انتظار و انتخاب پلتفرم؛ فرم دست نمی‌خورد."""
+        self.step = None
+        self.pending_field = None
+        self.platform = None
+        self.photos = None
+
+    # ---------- سریال‌سازی برای state_store ----------
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SaleSession":
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    @staticmethod
+    def dumps(session: "SaleSession") -> str:
+        return json.dumps(session.to_dict(), ensure_ascii=False)
+
+    @staticmethod
+    def loads(raw: str) -> "SaleSession":
+        return SaleSession.from_dict(json.loads(raw))
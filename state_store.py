@@ -0,0 +1,247 @@
+# state_store.py
+# حافظه وضعیت مکالمه: LRU محدود با TTL و ذخیره تاخیری (write-behind) در SQLite
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_MISSING = object()
+
+Key = Tuple[str, int]
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+class StateStore:
+    """یک حافظه واحد برای همه وضعیت‌های موقت کاربران.
+
+    - ترتیب LRU همان ترتیب انقضا است (TTL ثابت و هر دسترسی تمدید می‌کند)،
+      پس پاکسازی منقضی‌ها فقط از سر صف انجام می‌شود.
+    - بیش از max_entries آیتم در حافظه نمی‌ماند؛ آیتم‌های بیرون‌رانده شده
+      اگر تغییر کرده باشند ابتدا در صف نوشتن قرار می‌گیرند. آیتمی که فقط در
+      دیتابیس است (needs_load) هرگز روی event loop خوانده نمی‌شود: فراخواننده
+      آن را روی thread دیتابیس می‌خواند و با load اضافه می‌کند.
+    - drain() تغییرات را برای نوشتن دسته‌ای در دیتابیس برمی‌گرداند.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 2 * 24 * 3600,
+                 encode: Callable[[Any], str] = _json_dumps,
+                 decode: Callable[[str], Any] = json.loads):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+        # key -> [value, expires_at]
+        self._entries: "OrderedDict[Key, list]" = OrderedDict()
+        # کلیدهایی که فقط در دیتابیس هستند: key -> expires_at
+        self._spilled: "OrderedDict[Key, float]" = OrderedDict()
+        # تغییرات بیرون‌رانده شده‌ای که هنوز نوشته نشده‌اند: key -> (data_json, updated_at)
+        self._pending: Dict[Key, Tuple[str, float]] = {}
+        self._dirty: set = set()
+        self._deleted: set = set()
+
+    def bucket(self, namespace: str) -> "StateBucket":
+        return StateBucket(self, namespace)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---------- دسترسی ----------
+    def get(self, key: Key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Key, value: Any):
+        now = time.time()
+        self._entries[key] = [value, now + self.ttl]
+        self._entries.move_to_end(key)
+        self._dirty.add(key)
+        self._deleted.discard(key)
+        self._spilled.pop(key, None)
+        self._pending.pop(key, None)
+        self._evict()
+
+    def pop(self, key: Key, default=None):
+        value = self._lookup(key, touch=False)
+        if value is _MISSING:
+            if key in self._spilled:
+                # فقط در دیتابیس: بدون خواندن، حذف آن در drain بعدی
+                self._forget(key)
+            return default
+        self._forget(key)
+        return value
+
+    def needs_load(self, key: Key) -> bool:
+        """آیتم فقط در دیتابیس است و باید قبل از get با load (بیرون از event loop) خوانده شود"""
+        return key in self._spilled and key not in self._pending and key not in self._entries
+
+    def load(self, key: Key, row: Optional[Tuple[str, float]]):
+        """افزودن (data_json, updated_at) خوانده‌شده از دیتابیس برای آیتم needs_load.
+
+        آیتم کثیف حساب می‌شود تا اگر پیش از دسترسی دوباره بیرون رانده شد به صف
+        نوشتن برود و نیاز به خواندن دوباره نداشته باشد.
+        """
+        if not self.needs_load(key):
+            return
+        if row is None:
+            self._spilled.pop(key, None)
+            return
+        if self._insert(key, row[0], row[1], time.time()) is not None:
+            self._dirty.add(key)
+
+    def _lookup(self, key: Key, touch: bool = True):
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._reload(key, now)
+            if entry is None:
+                return _MISSING
+        elif entry[1] <= now:
+            self._forget(key)
+            return _MISSING
+        if touch:
+            # مقادیر در جا تغییر می‌کنند، پس هر دسترسی آیتم را کثیف حساب می‌کند
+            entry[1] = now + self.ttl
+            self._entries.move_to_end(key)
+            self._dirty.add(key)
+        return entry[0]
+
+    def _reload(self, key: Key, now: float) -> Optional[list]:
+        # فقط از صف نوشتن؛ آیتم needs_load تا load شدن غایب حساب می‌شود
+        if key not in self._pending:
+            return None
+        data_json, updated_at = self._pending.pop(key)
+        return self._insert(key, data_json, updated_at, now)
+
+    def _insert(self, key: Key, data_json: str, updated_at: float, now: float) -> Optional[list]:
+        self._spilled.pop(key, None)
+        if updated_at + self.ttl <= now:
+            self._forget(key)
+            return None
+        entry = [self.decode(data_json), updated_at + self.ttl]
+        self._entries[key] = entry
+        self._evict(keep=key)
+        return entry
+
+    def _forget(self, key: Key):
+        self._entries.pop(key, None)
+        self._spilled.pop(key, None)
+        self._pending.pop(key, None)
+        self._dirty.discard(key)
+        self._deleted.add(key)
+
+    def _evict(self, keep: Optional[Key] = None):
+        while len(self._entries) > self.max_entries:
+            key, (value, expires_at) = self._entries.popitem(last=False)
+            if key == keep:
+                self._entries[key] = [value, expires_at]
+                continue
+            if key in self._dirty:
+                self._dirty.discard(key)
+                self._pending[key] = (self.encode(value), expires_at - self.ttl)
+            self._spilled[key] = expires_at
+
+    # ---------- نگهداری ----------
+    def expire(self, now: Optional[float] = None) -> int:
+        """حذف آیتم‌های منقضی از سر صف LRU؛ تعداد حذف‌شده‌ها را برمی‌گرداند."""
+        now = time.time() if now is None else now
+        removed = 0
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[1] > now:
+                break
+            self._forget(key)
+            removed += 1
+        while self._spilled:
+            key, expires_at = next(iter(self._spilled.items()))
+            if expires_at > now:
+                break
+            self._spilled.popitem(last=False)
+            self._pending.pop(key, None)
+        return removed
+
+    def drain(self) -> Tuple[List[Tuple[str, int, str, float]], List[Tuple[str, int]]]:
+        """تغییرات از آخرین drain: (upserts, deletes) برای نوشتن در دیتابیس."""
+        upserts = [(ns, uid, data_json, updated_at) for (ns, uid), (data_json, updated_at) in self._pending.items()]
+        for key in self._dirty:
+            value, expires_at = self._entries[key]
+            upserts.append((key[0], key[1], self.encode(value), expires_at - self.ttl))
+        deletes = list(self._deleted)
+        self._pending.clear()
+        self._dirty.clear()
+        self._deleted.clear()
+        return upserts, deletes
+
+    def requeue(self, upserts: Iterable[Tuple[str, int, str, float]], deletes: Iterable[Tuple[str, int]]):
+        """برگرداندن یک drain ناموفق به صف تا در نوبت بعد دوباره نوشته شود."""
+        for ns, uid, data_json, updated_at in upserts:
+            key = (ns, uid)
+            if key in self._entries:
+                self._dirty.add(key)
+            elif key not in self._deleted:
+                self._pending[key] = (data_json, updated_at)
+        for key in deletes:
+            if key not in self._entries and key not in self._pending:
+                self._deleted.add(tuple(key))
+
+    def restore(self, rows: Iterable[Tuple[str, int, str, float]]):
+        """بارگذاری وضعیت ذخیره‌شده هنگام شروع (rows به ترتیب updated_at صعودی)."""
+        now = time.time()
+        for ns, uid, data_json, updated_at in rows:
+            expires_at = updated_at + self.ttl
+            if expires_at <= now:
+                continue
+            key = (ns, uid)
+            self._entries[key] = [self.decode(data_json), expires_at]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (_, old_expires) = self._entries.popitem(last=False)
+                self._spilled[old_key] = old_expires
+
+
+class StateBucket:
+    """نمای dict-مانند یک namespace از StateStore (کلید: user_id)."""
+
+    __slots__ = ("_store", "namespace")
+
+    def __init__(self, store: StateStore, namespace: str):
+        self._store = store
+        self.namespace = namespace
+
+    def get(self, user_id: int, default=None):
+        return self._store.get((self.namespace, user_id), default)
+
+    def pop(self, user_id: int, default=None):
+        return self._store.pop((self.namespace, user_id), default)
+
+    def setdefault(self, user_id: int, default=None):
+        value = self._store.get((self.namespace, user_id), _MISSING)
+        if value is _MISSING:
+            self._store.set((self.namespace, user_id), default)
+            return default
+        return value
+
+    def get_or_create(self, user_id: int, factory: Callable[[], Any]):
+        value = self._store.get((self.namespace, user_id), _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self._store.set((self.namespace, user_id), value)
+        return value
+
+    def __getitem__(self, user_id: int):
+        value = self._store.get((self.namespace, user_id), _MISSING)
+        if value is _MISSING:
+            raise KeyError(user_id)
+        return value
+
+    def __setitem__(self, user_id: int, value):
+        self._store.set((self.namespace, user_id), value)
+
+    def __delitem__(self, user_id: int):
+        if self._store.pop((self.namespace, user_id), _MISSING) is _MISSING:
+            raise KeyError(user_id)
+
+    def __contains__(self, user_id: int):
+        return self._store.get((self.namespace, user_id), _MISSING) is not _MISSING
@@ -1,2004 +1,1924 @@
-# test_bot.py
-# test_bot.py
-import logging
-import sqlite3
-import os
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from telegram import (
-    Update, InlineKeyboardButton, InlineKeyboardMarkup,
-    ReplyKeyboardMarkup, KeyboardButton
-)
-from telegram.ext import (
-    ApplicationBuilder, CommandHandler, CallbackQueryHandler,
-    MessageHandler, ContextTypes, filters
-)
-
-# ایمپورت تنظیمات از فایل config
-import config
-
-# ========== پیکربندی از فایل config ==========
-BOT_TOKEN = config.BOT_TOKEN
-CHANNEL_USERNAME = config.CHANNEL_USERNAME
-ADMIN_USER_ID = config.ADMIN_USER_ID
-SPECIAL_TESTER_ID = config.SPECIAL_TESTER_ID
-DB_PATH = config.DB_PATH
-
-# بررسی وجود توکن
-if not BOT_TOKEN:
-    raise ValueError("❌ BOT_TOKEN در محیط تعریف نشده است!")
-
-# ================================
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-)
-logger = logging.getLogger(__name__)
-
-# =========================
-# دیتابیس: init + توابع
-# =========================
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY,
-        free_used INTEGER DEFAULT 0
-    )
-    """)
-    # Listings table
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS listings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        created_at TEXT,
-        expire_at TEXT,
-        data_json TEXT,
-        receipt_file_id TEXT,
-        status TEXT DEFAULT 'pending'
-    )
-    """)
-    conn.commit()
-    conn.close()
-
-def get_user_row(user_id: int) -> Optional[Dict[str, Any]]:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT user_id, free_used FROM users WHERE user_id = ?", (user_id,))
-    row = c.fetchone()
-    conn.close()
-    if not row:
-        return None
-    return {"user_id": row[0], "free_used": bool(row[1])}
-
-def ensure_user(user_id: int):
-    if get_user_row(user_id) is None:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("INSERT INTO users (user_id) VALUES (?)", (user_id,))
-        conn.commit()
-        conn.close()
-
-def set_user_free_used(user_id: int):
-    ensure_user(user_id)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE users SET free_used = 1 WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
-
-def record_listing(user_id: int, data_json: str, receipt_file_id: Optional[str]=None) -> int:
-    """Insert a listing and return listing id."""
-    now = datetime.utcnow()
-    created_at = now.isoformat()
-    expire_at = (now + timedelta(days=config.PRICE_CONFIG["listing_expiry_days"])).isoformat()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO listings (user_id, created_at, expire_at, data_json, receipt_file_id, status)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (user_id, created_at, expire_at, data_json, receipt_file_id, 'active'))
-    lid = c.lastrowid
-    conn.commit()
-    conn.close()
-    return lid
-
-def mark_listing_rejected_by_admin(listing_id: int):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE listings SET status = 'rejected' WHERE id = ?", (listing_id,))
-    conn.commit()
-    conn.close()
-
-def get_user_listings(user_id: int) -> list:
-    """گرفتن لیست آگهی‌های کاربر برای ویرایش"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, data_json FROM listings WHERE user_id = ? AND status = 'active'", (user_id,))
-    rows = c.fetchall()
-    conn.close()
-    return [{"id": row[0], "data_json": row[1]} for row in rows]
-
-def update_listing(listing_id: int, data_json: str):
-    """ویرایش آگهی"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE listings SET data_json = ? WHERE id = ?", (data_json, listing_id))
-    conn.commit()
-    conn.close()
-
-# =========================
-# حافظه موقت برای جریان فرم
-# =========================
-user_form_state: Dict[int, Dict] = {}
-PLATFORM_STATES = {}
-CHAR_COUNT_STATES = {}
-NUMBER_VALIDATION_STATES = {}
-DIVISION_VALIDATION_STATES = {}
-PHOTO_UPLOAD_STATES = {}
-PLAYER_VALUE_STATES = {}
-
-# =========================
-# منوها
-# =========================
-main_menu_buttons = [
-    [KeyboardButton("🔄 استارت مجدد"), KeyboardButton("💰 فروش اکانت")],
-    [KeyboardButton("📂 اکانت‌های من"), KeyboardButton("📖 راهنما")]
-]
-main_menu = ReplyKeyboardMarkup(main_menu_buttons, resize_keyboard=True, one_time_keyboard=False)
-
-# =========================
-# منوی جدید برای انتخاب روش فروش
-# =========================
-sale_method_selection_buttons = InlineKeyboardMarkup([
-    [InlineKeyboardButton("📝 فرم دستی", callback_data="manual_form")],
-    [InlineKeyboardButton("🤖 ربات", callback_data="bot_form")]
-])
-
-# =========================
-# متن راهنما
-# =========================
-GUIDE_TEXT = config.TEXTS["guide"]
-
-# دکمه‌های فروش (15 دکمه، سه‌تایی) - با دکمه جدید
-sale_buttons = [
-    [
-        InlineKeyboardButton("🌐 وب اپ", callback_data="web_app"),
-        InlineKeyboardButton("📧 نوع ایمیل", callback_data="email_type"),
-        InlineKeyboardButton("🎮 انتخاب پلتفرم", callback_data="platform")
-    ],
-    [
-        InlineKeyboardButton("💰 کوین اکانت", callback_data="coin_account"),
-        InlineKeyboardButton("⚡ بازیکنان ترید", callback_data="trade_players"),
-        InlineKeyboardButton("❌ بازیکنان آنترید", callback_data="non_trade_players")
-    ],
-    [
-        InlineKeyboardButton("🏆 مچ ارنینگ", callback_data="match_earning"),
-        InlineKeyboardButton("⭐ لول سیزن", callback_data="season_level"),
-        InlineKeyboardButton("🏅 دیویژن رایوالز", callback_data="division_rivals")
-    ],
-    [
-        InlineKeyboardButton("💵 قیمت اکانت", callback_data="price"),
-        InlineKeyboardButton("💰 تخمین قیمت", callback_data="estimate_price"),
-        InlineKeyboardButton("📝 نحوه فروش", callback_data="sale_method")
-    ],
-    [
-        InlineKeyboardButton("✅ ثبت نهایی", callback_data="final_submit"),
-        InlineKeyboardButton("📋 نمایش اطلاعات ثبت شده", callback_data="show_entered_data"),
-        InlineKeyboardButton("📸 ثبت عکس تیم", callback_data="team_photo")
-    ]
-]
-sale_menu = InlineKeyboardMarkup(sale_buttons)
-
-# =========================
-# منوهای جدید برای نحوه فروش
-# =========================
-sale_rules_buttons = InlineKeyboardMarkup([
-    [InlineKeyboardButton("✅ می‌پذیرم", callback_data="accept_rules")],
-    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-])
-
-sale_method_choice_buttons = InlineKeyboardMarkup([
-    [InlineKeyboardButton("📱 ثبت آیدی خودم", callback_data="sale_method_self")],
-    [InlineKeyboardButton("🛒 فروش از طریق کانال", callback_data="sale_method_channel")],
-    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_rules")]
-])
-
-# =========================
-# دکمه‌های تأیید نهایی
-# =========================
-final_confirmation_buttons = InlineKeyboardMarkup([
-    [InlineKeyboardButton("✅ مطمئن هستم و ثبت نهایی", callback_data="confirm_final_submit")],
-    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-])
-
-# =========================
-# متن قوانین فروش
-# =========================
-SALE_RULES_TEXT = config.TEXTS["sale_rules"]
-
-# منوی انتخاب نوع ایمیل
-email_type_buttons = [
-    [
-        InlineKeyboardButton("Gmail", callback_data="email_gmail"),
-        InlineKeyboardButton("Outlook", callback_data="email_outlook")
-    ],
-    [
-        InlineKeyboardButton("Hotmail", callback_data="email_hotmail"),
-        InlineKeyboardButton("Yahoo", callback_data="email_yahoo")
-    ],
-    [
-        InlineKeyboardButton("سایر", callback_data="email_other"),
-        InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")
-    ]
-]
-email_type_menu = InlineKeyboardMarkup(email_type_buttons)
-
-# منوی انتخاب نوع وب اپ
-web_app_buttons = [
-    [
-        InlineKeyboardButton("وب باز", callback_data="web_open"),
-        InlineKeyboardButton("وب بسته", callback_data="web_closed")
-    ],
-    [
-        InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")
-    ]
-]
-web_app_menu = InlineKeyboardMarkup(web_app_buttons)
-
-# =========================
-# Helper: check membership
-# =========================
-async def is_member_of_channel(bot, user_id: int) -> bool:
-    try:
-        m = await bot.get_chat_member(chat_id=CHANNEL_USERNAME, user_id=user_id)
-        return m.status in ("creator", "administrator", "member")
-    except Exception as e:
-        logger.warning("get_chat_member failed: %s", e)
-        return False
-
-# =========================
-# تابع تخمین قیمت (ویرایش شده با استفاده از config)
-# =========================
-def estimate_price(form_data):
-    """تابع تخمین قیمت بر اساس فرمول تعریف شده"""
-    try:
-        # مقداردهی اولیه
-        coins = int(form_data.get('coin_account', 0))
-        trade_players_value_input = int(form_data.get('trade_players_value', 0))
-        nontrade_players_value_input = int(form_data.get('non_trade_players_value', 0))
-       
-        # محاسبه ارزش کوین (از config)
-        coin_value = (coins / config.PRICE_CONFIG["coin_divider"]) * config.PRICE_CONFIG["coin_value_unit"]
-       
-        # محاسبه ارزش بازیکنان ترید (از config)
-        trade_players_value = (trade_players_value_input * config.PRICE_CONFIG["trade_players_multiplier"]) / config.PRICE_CONFIG["trade_players_divider"]
-       
-        # محاسبه ارزش بازیکنان آنترید (از config)
-        nontrade_players_value = (nontrade_players_value_input * config.PRICE_CONFIG["nontrade_players_multiplier"]) / config.PRICE_CONFIG["nontrade_players_divider"] * config.PRICE_CONFIG["nontrade_players_discount"]
-       
-        # وب اپ (از config)
-        web_app = form_data.get('web_app')
-        if web_app == 'وب باز':
-            web_app_bonus = config.PRICE_CONFIG["web_app_open_bonus"]
-        else:
-            web_app_bonus = config.PRICE_CONFIG["web_app_closed_bonus"]
-       
-        # تاثیر مچ ارنینگ (از config)
-        match_earning = int(form_data.get('match_earning', 0))
-        match_bonus = 0
-        for (min_val, max_val), bonus in config.PRICE_CONFIG["match_earning_bonuses"].items():
-            if min_val <= match_earning < max_val:
-                match_bonus = bonus
-                break
-       
-        # تاثیر لول سیزن (از config)
-        season_level = int(form_data.get('season_level', 0))
-        season_bonus = 0
-        for (min_val, max_val), bonus in config.PRICE_CONFIG["season_level_bonuses"].items():
-            if min_val <= season_level < max_val:
-                season_bonus = bonus
-                break
-       
-        # تاثیر دیویژن رایوالز (از config)
-        division = form_data.get('division_rivals', '')
-        division_bonus = config.PRICE_CONFIG["division_bonuses"].get(str(division).lower(), 0)
-       
-        # جمع کل
-        total = (coin_value + trade_players_value + nontrade_players_value +
-                 web_app_bonus + match_bonus + season_bonus + division_bonus)
-       
-        # محاسبه بازه قیمتی (از config)
-        range_percent = config.PRICE_CONFIG["price_range_percent"]
-        lower_bound = total * (1 - range_percent)
-        upper_bound = total * (1 + range_percent)
-       
-        return {
-            'estimate': f"💰 تخمین قیمت: {int(lower_bound):,} - {int(upper_bound):,} تومان",
-            'details': f"""
-📊 جزئیات محاسبه:
-• ارزش کوین: {int(coin_value):,} تومان
-• بازیکنان ترید: {int(trade_players_value):,} تومان
-• بازیکنان آنترید: {int(nontrade_players_value):,} تومان
-• وب اپ: {web_app_bonus:,} تومان
-• مچ ارنینگ: {match_bonus:,} تومان
-• لول سیزن: {season_bonus:,} تومان
-• دیویژن رایوالز: {division_bonus:,} تومان
-            """,
-            'success': True
-        }
-   
-    except Exception as e:
-        logger.error(f"Error in estimate_price: {e}")
-        return {
-            'success': False,
-            'error': "خطا در محاسبه قیمت. لطفا از پر بودن فیلدهای ضروری اطمینان حاصل کنید."
-        }
-
-# =========================
-# توابع جدید برای سیستم پلتفرم (ویرایش شده با config)
-# =========================
-async def handle_platform_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """شروع فرآیند انتخاب پلتفرم"""
-    query = update.callback_query
-    await query.answer()
-   
-    user_id = query.from_user.id
-    PLATFORM_STATES[user_id] = {'step': 'select_platform'}
-   
-    keyboard = [
-        [InlineKeyboardButton("پلی استیشن", callback_data="platform_ps")],
-        [InlineKeyboardButton("ایکس باکس", callback_data="platform_xbox")],
-        [InlineKeyboardButton("پی سی", callback_data="platform_pc")],
-        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-   
-    await query.edit_message_text(
-        "🎮 لطفاً پلتفرم خود را انتخاب کنید:",
-        reply_markup=reply_markup
-    )
-
-async def show_ps_options(query):
-    """نمایش گزینه‌های پلی استیشن"""
-    keyboard = [
-        [InlineKeyboardButton("ظرفیت 3", callback_data="subplatform_ps3")],
-        [InlineKeyboardButton("ظرفیت 2", callback_data="subplatform_ps2")],
-        [InlineKeyboardButton("کامل", callback_data="subplatform_psfull")],
-        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_platform")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-   
-    await query.edit_message_text(
-        "🎯 ظرفیت پلی استیشن را انتخاب کنید:",
-        reply_markup=reply_markup
-    )
-
-async def show_xbox_options(query):
-    """نمایش گزینه‌های ایکس باکس"""
-    keyboard = [
-        [InlineKeyboardButton("هوم", callback_data="subplatform_xboxhome")],
-        [InlineKeyboardButton("سوویچ", callback_data="subplatform_xboxswitch")],
-        [InlineKeyboardButton("کامل", callback_data="subplatform_xboxfull")],
-        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_platform")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-   
-    await query.edit_message_text(
-        "🎯 نوع ایکس باکس را انتخاب کنید:",
-        reply_markup=reply_markup
-    )
-
-async def show_pc_options(query):
-    """نمایش گزینه‌های پی سی"""
-    keyboard = [
-        [InlineKeyboardButton("بازی به صورت کامل", callback_data="subplatform_pcfull")],
-        [InlineKeyboardButton("اشتراک EA Play Pro", callback_data="subplatform_eaplay")],
-        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_platform")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-   
-    await query.edit_message_text(
-        "💻 نوع اکانت پی سی را انتخاب کنید:",
-        reply_markup=reply_markup
-    )
-
-async def finalize_platform_selection(query, user_id, platform, subplatform):
-    """ثبت نهایی انتخاب پلتفرم و نمایش فرم موقت"""
-    # ذخیره در state کاربر
-    user_state = user_form_state.get(user_id, {})
-   
-    # ثبت اطلاعات پلتفرم
-    platform_display = get_platform_display_name(platform, subplatform)
-    user_state['form']['platform'] = platform_display
-    user_state['form']['platform_details'] = {
-        'main_platform': platform,
-        'sub_platform': subplatform
-    }
-   
-    # نمایش فرم موقت
-    temp_form_text = generate_temp_form_text(user_state['form'])
-   
-    keyboard = [
-        [InlineKeyboardButton("✅ تأیید و ادامه", callback_data="continue_to_form")],
-        [InlineKeyboardButton("✏️ ویرایش پلتفرم", callback_data="platform")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-   
-    await query.edit_message_text(
-        f"✅ پلتفرم ثبت شد: {platform_display}\n\n"
-        f"📋 فرم موقت شما:\n{temp_form_text}\n\n"
-        f"آیا می‌خواهید ادامه دهید؟",
-        reply_markup=reply_markup
-    )
-
-async def handle_eaplay_days_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """پردازش تعداد روزهای EA Play"""
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-   
-    if text == "/back":
-        # برگشت به انتخاب پلتفرم پی سی
-        query = update
-        await show_pc_options(query)
-        return
-   
-    if not text.isdigit():
-        await update.message.reply_text("❌ لطفاً فقط عدد وارد کنید (مثال: 110)")
-        return
-   
-    days = int(text)
-    if days <= 0 or days > 3650:
-        await update.message.reply_text("❌ تعداد روز نامعتبر است. لطفاً عدد معتبر وارد کنید.")
-        return
-   
-    # ثبت اطلاعات
-    user_state = user_form_state.get(user_id, {})
-    user_state['form']['platform'] = f"پی سی - EA Play Pro ({days} روز)"
-    user_state['form']['platform_details'] = {
-        'main_platform': 'pc',
-        'sub_platform': 'eaplay',
-        'eaplay_days': days
-    }
-   
-    # نمایش فرم موقت
-    temp_form_text = generate_temp_form_text(user_state['form'])
-   
-    keyboard = [
-        [InlineKeyboardButton("✅ تأیید و ادامه", callback_data="continue_to_form")],
-        [InlineKeyboardButton("✏️ ویرایش پلتفرم", callback_data="platform")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-   
-    await update.message.reply_text(
-        f"✅ اطلاعات EA Play Pro ثبت شد: {days} روز\n\n"
-        f"📋 فرم موقت شما:\n{temp_form_text}\n\n"
-        f"آیا می‌خواهید ادامه دهید؟",
-        reply_markup=reply_markup
-    )
-
-def get_platform_display_name(main_platform, sub_platform):
-    """تبدیل کد پلتفرم به نام نمایشی (از config)"""
-    return config.PLATFORM_CONFIG.get(main_platform, {}).get(sub_platform, "نامشخص")
-
-def generate_temp_form_text(form_data):
-    """تولید متن فرم موقت"""
-    text = "┌─── 📋 فرم موقت ───┐\n"
-   
-    if 'platform' in form_data:
-        text += f"🎮 پلتفرم: {form_data['platform']}\n"
-   
-    fields_display = {
-        'email_type': '📧 نوع ایمیل',
-        'web_app': '🌐 وب اپ',
-        'coin_account': '💰 کوین اکانت',
-        'trade_players': '⚡ بازیکنان ترید',
-        'trade_players_value': '💰 ارزش بازیکنان ترید',
-        'non_trade_players': '❌ بازیکنان آنترید',
-        'non_trade_players_value': '💰 ارزش بازیکنان آنترید',
-        'match_earning': '🏆 مچ ارنینگ',
-        'season_level': '⭐ لول سیزن',
-        'division_rivals': '🏅 دیویژن رایوالز',
-        'sale_method': '📝 نحوه فروش',
-        'user_contact': '📱 آیدی ارتباط',
-        'purchase_link': '🛒 لینک خرید',
-        'price': '💵 قیمت اکانت'
-    }
-   
-    for field, display_name in fields_display.items():
-        if field in form_data:
-            if field == 'purchase_link' and len(form_data[field]) > 30:
-                text += f"{display_name}: {form_data[field][:30]}...\n"
-            else:
-                text += f"{display_name}: {form_data[field]}\n"
-   
-    text += "└────────────────┘"
-    return text
-
-# =========================
-# تابع جدید برای نمایش اطلاعات کامل فرم
-# =========================
-def generate_complete_form_display(form_data):
-    """تولید متن کامل فرم با وضعیت تکمیل هر فیلد"""
-    text = "┌─── 📋 اطلاعات ثبت شده ───┐\n\n"
-   
-    fields_info = [
-        ('🎮 پلتفرم', 'platform'),
-        ('📧 نوع ایمیل', 'email_type'),
-        ('🌐 وب اپ', 'web_app'),
-        ('💰 کوین اکانت', 'coin_account'),
-        ('⚡ بازیکنان ترید', 'trade_players'),
-        ('💰 ارزش بازیکنان ترید', 'trade_players_value'),
-        ('❌ بازیکنان آنترید', 'non_trade_players'),
-        ('💰 ارزش بازیکنان آنترید', 'non_trade_players_value'),
-        ('🏆 مچ ارنینگ', 'match_earning'),
-        ('⭐ لول سیزن', 'season_level'),
-        ('🏅 دیویژن رایوالز', 'division_rivals'),
-        ('📝 نحوه فروش', 'sale_method'),
-        ('📱 آیدی ارتباط', 'user_contact'),
-        ('🛒 لینک خرید', 'purchase_link'),
-        ('💵 قیمت اکانت', 'price'),
-        ('📸 عکس‌های تیم', 'team_photos')
-    ]
-   
-    completed_count = 0
-    total_fields = len(fields_info)
-   
-    for display_name, field in fields_info:
-        if field in form_data and form_data[field]:
-            value = form_data[field]
-            if field == 'team_photos':
-                value = f"{len(form_data[field])} عکس"
-            elif field == 'purchase_link' and len(value) > 25:
-                value = f"{value[:25]}..."
-           
-            text += f"✅ {display_name}: {value}\n"
-            completed_count += 1
-        else:
-            text += f"❌ {display_name}: ثبت نشده\n"
-   
-    text += f"\n📊 وضعیت تکمیل: {completed_count}/{total_fields}\n"
-   
-    if completed_count == total_fields:
-        text += "🎉 تمام اطلاعات تکمیل شده است!\n"
-    elif completed_count >= total_fields * 0.7:
-        text += "⚠️ بیشتر اطلاعات تکمیل شده است\n"
-    elif completed_count >= total_fields * 0.4:
-        text += "🔶 نیمی از اطلاعات تکمیل شده است\n"
-    else:
-        text += "🔴 اطلاعات کمی تکمیل شده است\n"
-   
-    text += "└─────────────────────────┘"
-    return text
-
-# =========================
-# تابع جدید برای ارسال فرم به ادمین
-# =========================
-async def send_form_to_admin(context: ContextTypes.DEFAULT_TYPE, user_id: int, form_data: dict, photos: list = None):
-    """ارسال اطلاعات فرم به ادمین برای تأیید"""
-    try:
-        form_text = generate_complete_form_display(form_data)
-        user_info = f"👤 کاربر: {user_id}"
-        if 'user_contact' in form_data:
-            user_info += f" - {form_data['user_contact']}"
-       
-        full_message = f"{user_info}\n\n{form_text}"
-       
-        admin_buttons = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("✅ تأیید و انتشار", callback_data=f"admin_approve_free|{user_id}"),
-                InlineKeyboardButton("❌ رد آگهی", callback_data=f"admin_reject_free|{user_id}")
-            ]
-        ])
-       
-        if photos and len(photos) > 0:
-            await context.bot.send_photo(
-                chat_id=ADMIN_USER_ID,
-                photo=photos[0],
-                caption=full_message,
-                reply_markup=admin_buttons
-            )
-           
-            for i in range(1, len(photos)):
-                await context.bot.send_photo(
-                    chat_id=ADMIN_USER_ID,
-                    photo=photos[i]
-                )
-        else:
-            await context.bot.send_message(
-                chat_id=ADMIN_USER_ID,
-                text=full_message,
-                reply_markup=admin_buttons
-            )
-           
-        return True
-       
-    except Exception as e:
-        logger.error(f"خطا در ارسال فرم به ادمین: {e}")
-        return False
-
-# =========================
-# توابع جدید برای سیستم شمارنده کاراکتر (ویرایش شده با config)
-# =========================
-async def handle_char_count_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت پیام‌های مربوط به شمارنده کاراکتر"""
-    user = update.effective_user
-    user_id = user.id
-    text = (update.message.text or "").strip()
-   
-    char_state = CHAR_COUNT_STATES.get(user_id)
-    if not char_state:
-        return False
-   
-    field = char_state['field']
-    max_chars = config.PRICE_CONFIG["char_limits"].get(field, 25)
-    text_length = len(text)
-   
-    if text == "/back":
-        CHAR_COUNT_STATES.pop(user_id, None)
-        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
-        return True
-   
-    if text_length > max_chars:
-        await update.message.reply_text(
-            f"❌ اسامی وارد شده بیشتر از حد مجاز است!\n"
-            f"📝 تعداد کاراکترهای وارد شده: {text_length}\n"
-            f"✅ حداکثر مجاز: {max_chars} کاراکتر\n\n"
-            f"لطفا دوباره تلاش کنید:\n\n"
-            f"📝 تعداد کاراکترهای باقیمانده: {max_chars}/{max_chars}",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-    state['form'][field] = text
-   
-    CHAR_COUNT_STATES.pop(user_id, None)
-   
-    if field == 'trade_players':
-        PLAYER_VALUE_STATES[user_id] = {
-            'field': 'trade_players_value',
-            'player_type': 'ترید'
-        }
-        await update.message.reply_text(
-            "✅ نام بازیکنان ترید ثبت شد.\n\n"
-            "💰 لطفا مجموع ارزش بازیکنان ترید خود را وارد کنید (به کوین):\n"
-            "مثال: 400000\n\n"
-            "ℹ️ این مقدار در محاسبه قیمت نهایی استفاده خواهد شد",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    elif field == 'non_trade_players':
-        PLAYER_VALUE_STATES[user_id] = {
-            'field': 'non_trade_players_value',
-            'player_type': 'آنترید'
-        }
-        await update.message.reply_text(
-            "✅ نام بازیکنان آنترید ثبت شد.\n\n"
-            "💰 لطفا مجموع ارزش بازیکنان آنترید خود را وارد کنید (به کوین):\n"
-            "مثال: 100000\n\n"
-            "ℹ️ این مقدار در محاسبه قیمت نهایی استفاده خواهد شد",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    state['awaiting_field'] = None
-    await update.message.reply_text(f"✅ اطلاعات ثبت شد:\n{text}", reply_markup=sale_menu)
-    return True
-
-# =========================
-# تابع جدید برای مدیریت ارزش بازیکنان
-# =========================
-async def handle_player_value_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت پیام‌های مربوط به ارزش بازیکنان"""
-    user = update.effective_user
-    user_id = user.id
-    text = (update.message.text or "").strip()
-   
-    value_state = PLAYER_VALUE_STATES.get(user_id)
-    if not value_state:
-        return False
-   
-    field = value_state['field']
-    player_type = value_state['player_type']
-   
-    if text == "/back":
-        PLAYER_VALUE_STATES.pop(user_id, None)
-        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
-        return True
-   
-    if not text:
-        await update.message.reply_text(
-            f"❌ لطفا یک عدد وارد کنید.\n\n"
-            f"💰 لطفا مجموع ارزش بازیکنان {player_type} خود را وارد کنید (به کوین).\n"
-            f"مثال: 400000\n\n"
-            f"ℹ️ فقط عدد انگلیسی باشد",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    if not text.isdigit():
-        await update.message.reply_text(
-            f"❌ فقط عدد انگلیسی مجاز است!\n"
-            f"لطفا از حروف فارسی، انگلیسی یا کاراکترهای خاص استفاده نکنید.\n\n"
-            f"💰 لطفا مجموع ارزش بازیکنان {player_type} خود را وارد کنید (به کوین).\n"
-            f"مثال: 400000\n\n"
-            f"ℹ️ فقط عدد انگلیسی باشد",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    try:
-        number_value = int(text)
-    except ValueError:
-        await update.message.reply_text(
-            f"❌ خطا در پردازش عدد!\n"
-            f"لطفا فقط عدد معتبر وارد کنید.",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-    state['form'][field] = text
-   
-    PLAYER_VALUE_STATES.pop(user_id, None)
-   
-    formatted_number = f"{number_value:,}".replace(",", ".")
-   
-    await update.message.reply_text(
-        f"✅ ارزش بازیکنان {player_type} ثبت شد: {formatted_number} کوین",
-        reply_markup=sale_menu
-    )
-    return True
-
-# =========================
-# توابع جدید برای سیستم اعتبارسنجی عددی (ویرایش شده با config)
-# =========================
-async def handle_number_validation_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت پیام‌های مربوط به اعتبارسنجی عددی"""
-    user = update.effective_user
-    user_id = user.id
-    text = (update.message.text or "").strip()
-   
-    number_state = NUMBER_VALIDATION_STATES.get(user_id)
-    if not number_state:
-        return False
-   
-    field = number_state['field']
-    max_digits = config.PRICE_CONFIG["digit_limits"].get(field, 8)
-    only_numbers = number_state.get('only_numbers', True)
-   
-    if text == "/back":
-        NUMBER_VALIDATION_STATES.pop(user_id, None)
-        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
-        return True
-   
-    if not text:
-        error_message = get_error_message(field, max_digits)
-        await update.message.reply_text(
-            error_message,
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    if only_numbers and not text.isdigit():
-        error_message = get_error_message(field, max_digits)
-        await update.message.reply_text(
-            f"❌ فقط عدد انگلیسی مجاز است!\n{error_message}",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    if len(text) > max_digits:
-        error_message = get_error_message(field, max_digits)
-        await update.message.reply_text(
-            f"❌ تعداد ارقام بیشتر از حد مجاز است!\n"
-            f"📊 تعداد ارقام وارد شده: {len(text)}\n"
-            f"✅ حداکثر مجاز: {max_digits} رقم\n\n{error_message}",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    try:
-        number_value = int(text)
-    except ValueError:
-        error_message = get_error_message(field, max_digits)
-        await update.message.reply_text(
-            f"❌ خطا در پردازش عدد!\n{error_message}",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-    state['form'][field] = text
-   
-    NUMBER_VALIDATION_STATES.pop(user_id, None)
-    state['awaiting_field'] = None
-   
-    formatted_number = f"{number_value:,}".replace(",", ".")
-   
-    await update.message.reply_text(
-        f"✅ {get_success_message(field)}: {formatted_number}",
-        reply_markup=sale_menu
-    )
-    return True
-
-def get_error_message(field: str, max_digits: int) -> str:
-    """پیام خطای مناسب برای هر فیلد"""
-    messages = {
-        'coin_account': f"💰 لطفا مقدار کوین اکانت را وارد کنید.\nمثال: 245000\n\nℹ️ فقط عدد انگلیسی باشد\n🔢 حداکثر {max_digits} رقم مجاز است",
-        'match_earning': f"🏆 لطفا مچ ارنینگ را وارد کنید.\nمثال: 1200\n\nℹ️ فقط عدد انگلیسی باشد\n🔢 حداکثر {max_digits} رقم مجاز است",
-        'season_level': f"⭐ لطفا لول سیزن را وارد کنید.\nمثال: 5\n\nℹ️ فقط عدد انگلیسی باشد\n🔢 حداکثر {max_digits} رقم مجاز است",
-        'price': f"💵 قیمت اکانت خود را وارد کنید.\nمثال: 250000\n\nℹ️ فقط عدد انگلیسی باشد\n🔢 حداکثر {max_digits} رقم مجاز است"
-    }
-    return messages.get(field, f"لطفا یک عدد معتبر وارد کنید (حداکثر {max_digits} رقم)")
-
-def get_success_message(field: str) -> str:
-    """پیام موفقیت مناسب برای هر فیلد"""
-    messages = {
-        'coin_account': "مقدار کوین اکانت ثبت شد",
-        'match_earning': "مچ ارنینگ ثبت شد",
-        'season_level': "لول سیزن ثبت شد",
-        'price': "قیمت اکانت ثبت شد"
-    }
-    return messages.get(field, "اطلاعات ثبت شد")
-
-# =========================
-# توابع جدید برای سیستم اعتبارسنجی دیویژن رایوالز
-# =========================
-async def handle_division_validation_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت پیام‌های مربوط به اعتبارسنجی دیویژن رایوالز"""
-    user = update.effective_user
-    user_id = user.id
-    text = (update.message.text or "").strip()
-   
-    division_state = DIVISION_VALIDATION_STATES.get(user_id)
-    if not division_state:
-        return False
-   
-    field = division_state['field']
-   
-    if text == "/back":
-        DIVISION_VALIDATION_STATES.pop(user_id, None)
-        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
-        return True
-   
-    if not text:
-        await update.message.reply_text(
-            "❌ لطفا یک مقدار وارد کنید.\n\n"
-            "🏅 لطفا دیویژن رایوالز را وارد کنید:\n"
-            "- یک کلمه 5 حرفی (مثلاً: Elite)\n"
-            "- یا یک عدد از 1 تا 10",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-   
-    if text.isdigit():
-        num = int(text)
-        if 1 <= num <= 10:
-            state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-            state['form'][field] = text
-            DIVISION_VALIDATION_STATES.pop(user_id, None)
-            state['awaiting_field'] = None
-            await update.message.reply_text(f"✅ دیویژن رایوالز ثبت شد: {text}", reply_markup=sale_menu)
-            return True
-        else:
-            await update.message.reply_text(
-                "❌ عدد وارد شده باید بین 1 تا 10 باشد.\n\n"
-                "🏅 لطفا دیویژن رایوالز را وارد کنید:\n"
-                "- یک کلمه 5 حرفی (مثلاً: Elite)\n"
-                "- یا یک عدد از 1 تا 10",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return True
-   
-    if text.isalpha() and len(text) == 5:
-        state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-        state['form'][field] = text
-        DIVISION_VALIDATION_STATES.pop(user_id, None)
-        state['awaiting_field'] = None
-        await update.message.reply_text(f"✅ دیویژن رایوالز ثبت شد: {text}", reply_markup=sale_menu)
-        return True
-    else:
-        await update.message.reply_text(
-            "❌ مقدار وارد شده معتبر نیست.\n\n"
-            "🏅 لطفا دیویژن رایوالز را وارد کنید:\n"
-            "- یک کلمه 5 حرفی (فقط حروف، دقیقاً 5 کاراکتر)\n"
-            "- یا یک عدد از 1 تا 10",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return True
-
-# =========================
-# توابع جدید برای سیستم آپلود عکس (ویرایش شده با config)
-# =========================
-async def handle_photo_upload_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت پیام‌های مربوط به آپلود عکس"""
-    user = update.effective_user
-    user_id = user.id
-   
-    photo_state = PHOTO_UPLOAD_STATES.get(user_id)
-    if not photo_state:
-        return False
-   
-    text = (update.message.text or "").strip()
-    if text == "/back":
-        PHOTO_UPLOAD_STATES.pop(user_id, None)
-        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
-        return True
-   
-    PHOTO_UPLOAD_STATES.pop(user_id, None)
-    await update.message.reply_text(
-        "✅ از حالت آپلود عکس خارج شدید. به فرم اصلی برگشتید.",
-        reply_markup=sale_menu
-    )
-    return True
-
-# =========================
-# تابع تولید لینک خرید منحصربه‌فرد
-# =========================
-def generate_purchase_link(user_id: int, listing_data: dict) -> str:
-    """تولید لینک خرید منحصربه‌فرد برای کاربر"""
-    import hashlib
-    import time
-   
-    unique_string = f"{user_id}_{time.time()}_{listing_data.get('platform', '')}"
-    link_hash = hashlib.md5(unique_string.encode()).hexdigest()[:8]
-   
-    base_url = "https://your-domain.com/purchase"
-    return f"{base_url}/{link_hash}"
-
-# =========================
-# توابع جدید برای سیستم فرم دستی (ویرایش شده با config)
-# =========================
-async def handle_manual_form_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت دریافت فرم دستی از کاربر"""
-    user = update.effective_user
-    user_id = user.id
-    text = (update.message.text or "").strip()
-   
-    manual_state = context.user_data.get('manual_form')
-    if not manual_state or manual_state.get('step') != 'awaiting_form':
-        return False
-   
-    menu_commands = ["🔄 استارت مجدد", "💰 فروش اکانت", "📂 اکانت‌های من", "📖 راهنما"]
-    if text in menu_commands:
-        context.user_data.pop('manual_form', None)
-        return False
-   
-    text_length = len(text)
-   
-    if text_length < 250:
-        await update.message.reply_text(
-            "❌ خطا. لطفا فرم کامل بفرستید"
-        )
-        return True
-   
-    if text_length > 800:
-        excess_chars = text_length - 800
-        await update.message.reply_text(
-            f"❌ خطا شما ({excess_chars}) کاراکتر بیشتر از حد مجاز فرستاده اید"
-        )
-        return True
-   
-    manual_state['form_text'] = text
-    manual_state['step'] = 'form_received'
-   
-    form_display = f"""
-📋 فرم ارسالی شما:
-{text}
-اگر از صحت اطلاعات وارد شده اطمینان دارید کلید ثبت عکس را انتخاب کنید
-"""
-   
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("📸 ثبت عکس", callback_data="manual_add_photos")]
-    ])
-   
-    await update.message.reply_text(form_display, reply_markup=keyboard)
-    return True
-
-async def handle_manual_photos(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """مدیریت دریافت عکس‌های فرم دستی"""
-    user = update.effective_user
-    user_id = user.id
-   
-    manual_state = context.user_data.get('manual_form')
-    if not manual_state or manual_state.get('step') != 'awaiting_photos':
-        return False
-   
-    if not update.message.photo:
-        return False
-   
-    photo = update.message.photo[-1]
-    file_id = photo.file_id
-   
-    if 'photos' not in manual_state:
-        manual_state['photos'] = []
-    manual_state['photos'].append(file_id)
-   
-    current_count = len(manual_state['photos'])
-    max_photos = config.PRICE_CONFIG["max_photos"]
-   
-    if current_count >= max_photos:
-        manual_state['step'] = 'photos_received'
-       
-        await update.message.reply_text(
-            f"✅ {current_count} عکس با موفقیت ثبت شد.\n\n"
-            f"با انتخاب کلید ثبت نهایی فرم و عکس های شما برای ادمین ارسال خواهند شد",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("✅ ثبت نهایی", callback_data="manual_final_submit")]
-            ])
-        )
-    else:
-        remaining = max_photos - current_count
-        await update.message.reply_text(
-            f"✅ عکس {current_count} ثبت شد.\n\n"
-            f"📸 می‌توانید {remaining} عکس دیگر ارسال کنید."
-        )
-    return True
-
-async def submit_manual_form_to_admin(context: ContextTypes.DEFAULT_TYPE, user_id: int, form_text: str, photos: list = None):
-    """ارسال فرم دستی به ادمین برای تأیید"""
-    try:
-        user_info = f"👤 کاربر: {user_id}"
-        full_message = f"{user_info}\n\n📝 فرم دستی:\n{form_text}"
-       
-        admin_buttons = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("✅ تأیید و انتشار", callback_data=f"admin_approve_manual|{user_id}"),
-                InlineKeyboardButton("❌ رد آگهی", callback_data=f"admin_reject_manual|{user_id}")
-            ]
-        ])
-       
-        if photos and len(photos) > 0:
-            await context.bot.send_photo(
-                chat_id=ADMIN_USER_ID,
-                photo=photos[0],
-                caption=full_message,
-                reply_markup=admin_buttons
-            )
-           
-            for i in range(1, len(photos)):
-                await context.bot.send_photo(
-                    chat_id=ADMIN_USER_ID,
-                    photo=photos[i]
-                )
-        else:
-            await context.bot.send_message(
-                chat_id=ADMIN_USER_ID,
-                text=full_message,
-                reply_markup=admin_buttons
-            )
-           
-        return True
-       
-    except Exception as e:
-        logger.error(f"خطا در ارسال فرم دستی به ادمین: {e}")
-        return False
-
-# =========================
-# هندل کردن callbacks فرم دستی
-# =========================
-async def handle_manual_form_callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """هندلر مخصوص callbacks فرم دستی"""
-    query = update.callback_query
-    await query.answer()
-    user_id = query.from_user.id
-    data = query.data
-   
-    if data == "manual_final_submit":
-        manual_state = context.user_data.get('manual_form')
-       
-        if not manual_state:
-            await query.edit_message_text(
-                "❌ خطا: اطلاعات فرم یافت نشد. لطفاً فرآیند را از ابتدا شروع کنید.",
-                reply_markup=main_menu
-            )
-            return
-       
-        if not manual_state.get('form_text'):
-            await query.edit_message_text(
-                "❌ خطا: متن فرم یافت نشد. لطفاً فرآیند را از ابتدا شروع کنید.",
-                reply_markup=main_menu
-            )
-            return
-       
-        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
-            u = get_user_row(user_id)
-            if u and u.get("free_used"):
-                await query.edit_message_text(
-                    "❌ شما قبلاً یک اکانت رایگان ثبت کرده‌اید.",
-                    reply_markup=main_menu
-                )
-                context.user_data.pop('manual_form', None)
-                return
-       
-        photos = manual_state.get('photos', [])
-       
-        logger.info(f"ارسال فرم دستی به ادمین - کاربر: {user_id}, طول متن: {len(manual_state['form_text'])}, تعداد عکس: {len(photos)}")
-       
-        success = await submit_manual_form_to_admin(context, user_id, manual_state['form_text'], photos)
-       
-        if success:
-            import json
-            set_user_free_used(user_id)
-           
-            form_data = {
-                'form_text': manual_state['form_text'],
-                'photos_count': len(photos),
-                'submission_type': 'manual'
-            }
-            record_listing(user_id=user_id, data_json=json.dumps(form_data, ensure_ascii=False))
-           
-            context.user_data.pop('manual_form', None)
-           
-            await query.edit_message_text(
-                "✅ فرم و عکس های شما با موفقیت ثبت شدند.\n\n"
-                "📋 پس از تأیید ادمین، آگهی شما در کانال نمایش داده خواهد شد.\n"
-                "⏳ زمان بررسی: حداکثر 24 ساعت\n\n"
-                "با تشکر از اعتماد شما! 🙏"
-            )
-        else:
-            await query.edit_message_text(
-                "❌ خطا در ارسال اطلاعات به ادمین. لطفاً مجدداً تلاش کنید یا با پشتیبانی تماس بگیرید."
-            )
-        return
-   
-    elif data == "manual_add_photos":
-        manual_state = context.user_data.get('manual_form')
-        if manual_state and manual_state.get('step') == 'form_received':
-            manual_state['step'] = 'awaiting_photos'
-            await query.edit_message_text(
-                "📸 لطفا حداکثر ۳ عکس از اکانت/تیم خود آپلود کنید"
-            )
-        return
-
-# =========================
-# هندل کردن callbacks اصلی منوی فروش
-# =========================
-async def handle_main_sale_callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """هندلر مخصوص callbacks منوی اصلی فروش"""
-    query = update.callback_query
-    await query.answer()
-    user = query.from_user
-    user_id = user.id
-    data = query.data
-   
-    if data == "manual_form":
-        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
-            u = get_user_row(user_id)
-            if u and u.get("free_used"):
-                await query.edit_message_text(
-                    "❌ شما قبلاً یک آگهی رایگان ثبت کرده‌اید.",
-                    reply_markup=main_menu
-                )
-                return
-       
-        manual_form_template = config.TEXTS["manual_form_template"]
-       
-        context.user_data['manual_form'] = {
-            'step': 'awaiting_form',
-            'form_text': '',
-            'photos': []
-        }
-       
-        await query.edit_message_text(manual_form_template)
-        return
-   
-    elif data == "bot_form":
-        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
-            u = get_user_row(user_id)
-            if u and u.get("free_used"):
-                await query.edit_message_text(
-                    "❌ شما قبلاً یک اکانت رایگان ثبت کرده‌اید.",
-                    reply_markup=main_menu
-                )
-                return
-       
-        user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-       
-        special_msg = "👑 [حالت ویژه - بدون محدودیت]" if str(user_id) in [ADMIN_USER_ID, SPECIAL_TESTER_ID] else ""
-       
-        msg = (
-            f"🤖 **ربات فرم پیشرفته**\n\n"
-            f"{special_msg}\n\n"
-            f"💎 کاربر گرامی، شما می‌توانید **یک اکانت رایگان** برای آگهی در کانال ثبت کنید.\n\n"
-            "⚠️ دقت کنید بعد از زدن **ثبت نهایی** امکان ویرایش اطلاعات اکانت رایگان وجود ندارد.\n\n"
-            "🟢 لطفا گزینه مورد نظر خود را انتخاب کنید:"
-        )
-        await query.edit_message_text(msg, reply_markup=sale_menu, parse_mode="Markdown")
-        return
-
-# =========================
-# Handlers
-# =========================
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    chat_id = update.effective_chat.id
-   
-    member = await is_member_of_channel(context.bot, user.id)
-    if not member:
-        join_button = InlineKeyboardButton(text="پیوستن به کانال رنک1", url=f"https://t.me/{CHANNEL_USERNAME.lstrip('@')}")
-        i_joined_button = InlineKeyboardButton(text="✅ من عضو شدم (بررسی مجدد)", callback_data="check_join")
-        keyboard_not_member = InlineKeyboardMarkup([[join_button], [i_joined_button]])
-        await context.bot.send_message(chat_id=chat_id, text="لطفاً ابتدا در کانال رنک 1 عضو شوید.", reply_markup=keyboard_not_member)
-        return
-   
-    welcome_message = config.TEXTS["welcome"].format(user.first_name)
-    await context.bot.send_message(chat_id=chat_id, text=welcome_message, reply_markup=main_menu)
-
-async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-    user = query.from_user
-    user_id = user.id
-    data = query.data
-   
-    if data == "back_to_menu":
-        context.user_data.pop('manual_form', None)
-        user_form_state.pop(user_id, None)
-        PLATFORM_STATES.pop(user_id, None)
-        CHAR_COUNT_STATES.pop(user_id, None)
-        NUMBER_VALIDATION_STATES.pop(user_id, None)
-        DIVISION_VALIDATION_STATES.pop(user_id, None)
-        PHOTO_UPLOAD_STATES.pop(user_id, None)
-        PLAYER_VALUE_STATES.pop(user_id, None)
-       
-        await query.edit_message_text("🏠 به منوی اصلی برگشتید.", reply_markup=main_menu)
-        return
-   
-    if data == "check_join":
-        member = await is_member_of_channel(context.bot, user_id)
-        if member:
-            await query.edit_message_text("ممنون! شما عضو هستید. از منوی اصلی استفاده کنید.")
-            try:
-                await context.bot.send_message(chat_id=user_id, text="منوی اصلی:", reply_markup=main_menu)
-            except:
-                pass
-        else:
-            await query.edit_message_text("هنوز عضو کانال نیستید. لطفا عضو شوید.")
-        return
-   
-    if data == "continue_to_form":
-        await query.edit_message_text(
-            "به فرم اصلی برگشتید. لطفاً سایر فیلدها را تکمیل کنید:",
-            reply_markup=sale_menu
-        )
-        PLATFORM_STATES.pop(user_id, None)
-        return
-   
-    if data == "show_entered_data":
-        state = user_form_state.get(user_id)
-        if not state or not state.get("form"):
-            await query.edit_message_text(
-                "❌ هنوز هیچ اطلاعاتی ثبت نکرده‌اید.\n\n"
-                "لطفا ابتدا اطلاعات فرم را تکمیل کنید.",
-                reply_markup=sale_menu
-            )
-            return
-       
-        form_display = generate_complete_form_display(state['form'])
-       
-        back_button = InlineKeyboardMarkup([
-            [InlineKeyboardButton("↩️ برگشت و ویرایش", callback_data="back_to_form")]
-        ])
-       
-        await query.edit_message_text(
-            form_display,
-            reply_markup=back_button
-        )
-        return
-   
-    if data == "sale_method":
-        await query.edit_message_text(
-            SALE_RULES_TEXT,
-            reply_markup=sale_rules_buttons,
-            parse_mode="Markdown"
-        )
-        return
-   
-    if data == "accept_rules":
-        await query.edit_message_text(
-            "✅ با تشکر از پذیرش قوانین\n\n"
-            "لطفا نحوه فروش خود را انتخاب کنید:",
-            reply_markup=sale_method_choice_buttons
-        )
-        return
-   
-    if data == "back_to_rules":
-        await query.edit_message_text(
-            SALE_RULES_TEXT,
-            reply_markup=sale_rules_buttons,
-            parse_mode="Markdown"
-        )
-        return
-   
-    if data == "sale_method_self":
-        state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-       
-        if 'purchase_link' in state['form']:
-            del state['form']['purchase_link']
-       
-        user_contact = f"@{user.username}" if user.username else f"{user.first_name} {user.last_name or ''}".strip()
-        if not user_contact or user_contact == "@":
-            user_contact = f"UserID: {user_id}"
-       
-        state['form']['sale_method'] = "ثبت آیدی خودم"
-        state['form']['user_contact'] = user_contact
-       
-        await query.edit_message_text(
-            f"✅ روش فروش ثبت شد: **ثبت آیدی خودم**\n"
-            f"📱 آیدی شما: `{user_contact}`\n\n"
-            f"این اطلاعات در فرم شما ذخیره شد.",
-            parse_mode="Markdown",
-            reply_markup=sale_menu
-        )
-        return
-   
-    if data == "sale_method_channel":
-        state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-       
-        if 'user_contact' in state['form']:
-            del state['form']['user_contact']
-       
-        purchase_link = generate_purchase_link(user_id, state.get('form', {}))
-       
-        state['form']['sale_method'] = "فروش از طریق کانال"
-        state['form']['purchase_link'] = purchase_link
-       
-        await query.edit_message_text(
-            f"✅ روش فروش ثبت شد: **فروش از طریق کانال**\n"
-            f"🛒 لینک خرید مخصوص شما:\n`{purchase_link}`\n\n"
-            f"این لینک پس از تایید نهایی در کانال قرار خواهد گرفت.",
-            parse_mode="Markdown",
-            reply_markup=sale_menu
-        )
-        return
-   
-    if data == "email_type":
-        await query.edit_message_text(
-            "📧 نوع ایمیل اکانت خود را انتخاب کنید:",
-            reply_markup=email_type_menu
-        )
-        return
-   
-    if data == "web_app":
-        await query.edit_message_text(
-            "🌐 نوع ترنسفر وب اپ اکانت را انتخاب کنید:",
-            reply_markup=web_app_menu
-        )
-        return
-   
-    if data.startswith("email_"):
-        email_type = data.split("_")[1]
-        state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-        state['form']['email_type'] = config.EMAIL_TYPES.get(email_type, "سایر")
-       
-        await query.edit_message_text(
-            f"✅ نوع ایمیل ثبت شد: {config.EMAIL_TYPES.get(email_type, 'سایر')}",
-            reply_markup=sale_menu
-        )
-        return
-   
-    if data.startswith("web_"):
-        web_type = data.split("_")[1]
-        state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-        state['form']['web_app'] = config.WEB_APP_TYPES.get(web_type, "وب بسته")
-       
-        await query.edit_message_text(
-            f"✅ نوع وب اپ ثبت شد: {config.WEB_APP_TYPES.get(web_type, 'وب بسته')}",
-            reply_markup=sale_menu
-        )
-        return
-   
-    if data == "platform":
-        await handle_platform_selection(update, context)
-        return
-   
-    if data == "back_to_form":
-        await query.edit_message_text(
-            "به فرم اصلی برگشتید. لطفا فیلدها را تکمیل کنید:",
-            reply_markup=sale_menu
-        )
-        PLATFORM_STATES.pop(user_id, None)
-        CHAR_COUNT_STATES.pop(user_id, None)
-        NUMBER_VALIDATION_STATES.pop(user_id, None)
-        DIVISION_VALIDATION_STATES.pop(user_id, None)
-        PHOTO_UPLOAD_STATES.pop(user_id, None)
-        PLAYER_VALUE_STATES.pop(user_id, None)
-        return
-   
-    if data == "back_to_platform":
-        await handle_platform_selection(update, context)
-        return
-   
-    if data.startswith("platform_"):
-        platform_type = data.split("_")[1]
-        PLATFORM_STATES[user_id] = {
-            'step': 'select_subplatform',
-            'platform': platform_type
-        }
-       
-        if platform_type == "ps":
-            await show_ps_options(query)
-        elif platform_type == "xbox":
-            await show_xbox_options(query)
-        elif platform_type == "pc":
-            await show_pc_options(query)
-        return
-   
-    if data.startswith("subplatform_"):
-        sub_type = data.split("_")[1]
-        state = PLATFORM_STATES.get(user_id, {})
-       
-        if state.get('platform') == 'pc' and sub_type == 'eaplay':
-            PLATFORM_STATES[user_id]['step'] = 'enter_eaplay_days'
-            PLATFORM_STATES[user_id]['subplatform'] = sub_type
-           
-            await query.edit_message_text(
-                "📅 چند روز از اعتبار EA Play Pro اکانت شما باقی مانده؟\n"
-                "لطفاً عدد تعداد روزهای باقیمانده را ارسال کنید (مثال: 110)\n\n"
-                "↩️ /back برای برگشت"
-            )
-        else:
-            await finalize_platform_selection(query, user_id, state['platform'], sub_type)
-        return
-   
-    if data == "estimate_price":
-        state = user_form_state.get(user_id)
-        if not state or not state.get("form"):
-            await query.edit_message_text(
-                "❌ هنوز اطلاعات کافی برای تخمین قیمت وارد نکرده‌اید.\n\n"
-                "لطفا حداقل فیلدهای زیر را پر کنید:\n"
-                "• کوین اکانت\n• بازیکنان ترید/آنترید\n• وب اپ",
-                reply_markup=sale_menu
-            )
-            return
-       
-        form_data = state['form']
-        required_fields = ['coin_account']
-       
-        missing_fields = []
-        for field in required_fields:
-            if field not in form_data or not form_data[field]:
-                missing_fields.append(field)
-       
-        if missing_fields:
-            await query.edit_message_text(
-                f"❌ برای تخمین قیمت نیاز به پر کردن فیلدهای زیر دارید:\n"
-                f"• {', '.join(missing_fields)}\n\n"
-                f"لطفا ابتدا این فیلدها را پر کنید.",
-                reply_markup=sale_menu
-            )
-            return
-       
-        result = estimate_price(form_data)
-       
-        if result['success']:
-            message = f"{result['estimate']}\n\n{result['details']}\n\n"
-            message += "⚠️ کاربر محترم قیمت ربات حدودی است و ممکن است اطلاعات ربات به روز نباشد"
-           
-            await query.edit_message_text(
-                message,
-                reply_markup=sale_menu
-            )
-        else:
-            await query.edit_message_text(
-                f"❌ {result['error']}",
-                reply_markup=sale_menu
-            )
-        return
-   
-    if data == "price":
-        NUMBER_VALIDATION_STATES[user_id] = {
-            'field': 'price',
-            'max_digits': config.PRICE_CONFIG["digit_limits"]["price"],
-            'only_numbers': True
-        }
-        await query.edit_message_text(
-            "💵 قیمت اکانت خود را وارد کنید.\n"
-            "مثال: 250000\n\n"
-            "ℹ️ فقط عدد انگلیسی باشد\n"
-            f"🔢 حداکثر {config.PRICE_CONFIG['digit_limits']['price']} رقم مجاز است",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return
-   
-    if data == "final_submit":
-        state = user_form_state.get(user_id)
-        if not state or not state.get("form"):
-            await query.edit_message_text("فرم خالی است. لطفا فیلدها را تکمیل کنید قبل از ثبت نهایی.")
-            return
-       
-        confirmation_text = """
-⚠️ کاربر محترم با زدن ثبت نهایی، اطلاعات اکانت شما برای درج در کانال به ادمین ارسال خواهد شد.
-🔍 خواهشمند است قبل از ثبت نهایی از صحت اطلاعات زیر اطمینان حاصل کنید:
-{form_display}
-آیا از ثبت نهایی اطلاعات مطمئن هستید؟
-""".format(form_display=generate_complete_form_display(state['form']))
-       
-        await query.edit_message_text(
-            confirmation_text,
-            reply_markup=final_confirmation_buttons
-        )
-        return
-   
-    if data == "confirm_final_submit":
-        state = user_form_state.get(user_id)
-        if not state or not state.get("form"):
-            await query.edit_message_text("خطا: اطلاعات فرم یافت نشد.")
-            return
-       
-        photos = state['form'].get('team_photos', [])
-        success = await send_form_to_admin(context, user_id, state['form'], photos)
-       
-        if success:
-            import json
-            set_user_free_used(user_id)
-            record_listing(user_id=user_id, data_json=json.dumps(state["form"], ensure_ascii=False))
-           
-            user_form_state.pop(user_id, None)
-            PLATFORM_STATES.pop(user_id, None)
-            CHAR_COUNT_STATES.pop(user_id, None)
-            NUMBER_VALIDATION_STATES.pop(user_id, None)
-            DIVISION_VALIDATION_STATES.pop(user_id, None)
-            PHOTO_UPLOAD_STATES.pop(user_id, None)
-            PLAYER_VALUE_STATES.pop(user_id, None)
-           
-            await query.edit_message_text(
-                "✅ اطلاعات اکانت شما با موفقیت ثبت شد و برای بررسی به ادمین ارسال گردید.\n\n"
-                "📋 پس از تأیید ادمین، آگهی شما در کانال نمایش داده خواهد شد.\n"
-                "⏳ زمان بررسی: حداکثر 24 ساعت\n\n"
-                "با تشکر از اعتماد شما! 🙏"
-            )
-        else:
-            await query.edit_message_text(
-                "❌ خطا در ارسال اطلاعات به ادمین. لطفاً مجدداً تلاش کنید یا با پشتیبانی تماس بگیرید."
-            )
-        return
-   
-    if data in {
-        "coin_account", "trade_players", "non_trade_players",
-        "match_earning", "season_level", "division_rivals", "team_photo"
-    }:
-        state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-       
-        field_name = data
-       
-        if data == "non_trade_players":
-            CHAR_COUNT_STATES[user_id] = {
-                'field': 'non_trade_players',
-                'max_chars': config.PRICE_CONFIG["char_limits"]["non_trade_players"],
-                'remaining': config.PRICE_CONFIG["char_limits"]["non_trade_players"]
-            }
-            await query.edit_message_text(
-                "❌ لطفا نام برترین بازیکنان آنترید خود را وارد کنید.\n"
-                "مثال: امباپه دیونگ پدری\n\n"
-                f"📝 تعداد کاراکترهای باقیمانده: {config.PRICE_CONFIG['char_limits']['non_trade_players']}/{config.PRICE_CONFIG['char_limits']['non_trade_players']}\n"
-                f"⚠️ حداکثر {config.PRICE_CONFIG['char_limits']['non_trade_players']} کاراکتر مجاز است",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-       
-        if data == "trade_players":
-            CHAR_COUNT_STATES[user_id] = {
-                'field': 'trade_players',
-                'max_chars': config.PRICE_CONFIG["char_limits"]["trade_players"],
-                'remaining': config.PRICE_CONFIG["char_limits"]["trade_players"]
-            }
-            await query.edit_message_text(
-                "❌ لطفا نام برترین بازیکنان ترید خود را وارد کنید.\n"
-                "مثال: امباپه دیونگ پدری\n\n"
-                f"📝 تعداد کاراکترهای باقیمانده: {config.PRICE_CONFIG['char_limits']['trade_players']}/{config.PRICE_CONFIG['char_limits']['trade_players']}\n"
-                f"⚠️ حداکثر {config.PRICE_CONFIG['char_limits']['trade_players']} کاراکتر مجاز است",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-       
-        if data == "coin_account":
-            NUMBER_VALIDATION_STATES[user_id] = {
-                'field': 'coin_account',
-                'max_digits': config.PRICE_CONFIG["digit_limits"]["coin_account"],
-                'only_numbers': True
-            }
-            await query.edit_message_text(
-                "💰 لطفا مقدار کوین اکانت را وارد کنید.\n"
-                "مثال: 245000\n\n"
-                "ℹ️ فقط عدد انگلیسی باشد\n"
-                f"🔢 حداکثر {config.PRICE_CONFIG['digit_limits']['coin_account']} رقم مجاز است",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-        
-        if data == "match_earning":
-            NUMBER_VALIDATION_STATES[user_id] = {
-                'field': 'match_earning',
-                'max_digits': config.PRICE_CONFIG["digit_limits"]["match_earning"],
-                'only_numbers': True
-            }
-            await query.edit_message_text(
-                "🏆 لطفا مچ ارنینگ را وارد کنید.\n"
-                "مثال: 1200\n\n"
-                "ℹ️ فقط عدد انگلیسی باشد\n"
-                f"🔢 حداکثر {config.PRICE_CONFIG['digit_limits']['match_earning']} رقم مجاز است",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-        
-        if data == "season_level":
-            NUMBER_VALIDATION_STATES[user_id] = {
-                'field': 'season_level',
-                'max_digits': config.PRICE_CONFIG["digit_limits"]["season_level"],
-                'only_numbers': True
-            }
-            await query.edit_message_text(
-                "⭐ لطفا لول سیزن را وارد کنید.\n"
-                "مثال: 5\n\n"
-                "ℹ️ فقط عدد انگلیسی باشد\n"
-                f"🔢 حداکثر {config.PRICE_CONFIG['digit_limits']['season_level']} رقم مجاز است",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-        
-        if data == "division_rivals":
-            DIVISION_VALIDATION_STATES[user_id] = {
-                'field': 'division_rivals'
-            }
-            await query.edit_message_text(
-                "🏅 لطفا دیویژن رایوالز را وارد کنید:\n"
-                "- یک کلمه 5 حرفی (مثلاً: Elite)\n"
-                "- یا یک عدد از 1 تا 10",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-        
-        if data == "team_photo":
-            PHOTO_UPLOAD_STATES[user_id] = {
-                'field': 'team_photos',
-                'max_photos': config.PRICE_CONFIG["max_photos"],
-                'photos': []
-            }
-            await query.edit_message_text(
-                "📸 لطفا حداکثر 3 عکس از اکانت خود ارسال کنید.\n\n"
-                "📌 محدودیت‌ها:\n"
-                "• فقط فایل‌های عکس مجاز هستند\n"
-                "• فرمت‌های قابل قبول: JPG, JPEG, PNG, WEBP\n"
-                "• فایل‌های غیر عکس بلاک و حذف می‌شوند\n\n"
-                "↩️ /back برای برگشت به فرم",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                ])
-            )
-            return
-       
-        state['awaiting_field'] = field_name
-        prompts = {
-            "sale_method": "📝 نحوه فروش را توضیح دهید (مثلاً ارسال آنی / پس از واریز)."
-        }
-        prompt_text = prompts.get(field_name, "لطفا مقدار را وارد کنید:")
-        await query.edit_message_text(prompt_text)
-        return
-   
-    await query.edit_message_text("دکمه شناخته نشد.")
-
-async def text_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    user_id = user.id
-    text = (update.message.text or "").strip()
-   
-    if await handle_manual_form_text(update, context):
-        return
-   
-    if await handle_player_value_message(update, context):
-        return
-   
-    if await handle_number_validation_message(update, context):
-        return
-   
-    if await handle_char_count_message(update, context):
-        return
-    
-    if await handle_division_validation_message(update, context):
-        return
-    
-    if await handle_photo_upload_message(update, context):
-        return
-   
-    platform_state = PLATFORM_STATES.get(user_id, {})
-    if platform_state.get('step') == 'enter_eaplay_days':
-        await handle_eaplay_days_input(update, context)
-        return
-   
-    state = user_form_state.get(user_id)
-    if state and state.get("awaiting_field"):
-        field = state['awaiting_field']
-        state['form'][field] = text
-        state['awaiting_field'] = None
-        await update.message.reply_text(f"✅ مقدار '{field}' ثبت شد.", reply_markup=sale_menu)
-        return
-   
-    if text == "/start" or text == "🔄 استارت مجدد":
-        await start_command(update, context)
-        return
-    
-    if text == "📖 راهنما":
-        await update.message.reply_text(GUIDE_TEXT, reply_markup=main_menu)
-        return
-   
-    if text == "💰 فروش اکانت":
-        member = await is_member_of_channel(context.bot, user_id)
-        if not member:
-            join_button = InlineKeyboardButton(text="پیوستن به کانال رنک1", url=f"https://t.me/{CHANNEL_USERNAME.lstrip('@')}")
-            i_joined_button = InlineKeyboardButton(text="✅ من عضو شدم (بررسی مجدد)", callback_data="check_join")
-            keyboard_not_member = InlineKeyboardMarkup([[join_button], [i_joined_button]])
-            await update.message.reply_text("لطفاً ابتدا در کانال رنک 1 عضو شوید.", reply_markup=keyboard_not_member)
-            return
-       
-        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
-            u = get_user_row(user_id)
-            if u and u.get("free_used"):
-                await update.message.reply_text(
-                    "❌ شما قبلاً یک آگهی رایگان ثبت کرده‌اید.",
-                    reply_markup=main_menu
-                )
-                return
-       
-        msg = (
-            "💎 کاربر گرامی، لطفاً روش فروش خود را انتخاب کنید:\n\n"
-            "📝 **فرم دستی**: پر کردن فرم متنی ساده\n"
-            "🤖 **ربات**: پر کردن فرم پیشرفته با راهنمای گام به گام"
-        )
-        await update.message.reply_text(msg, reply_markup=sale_method_selection_buttons, parse_mode="Markdown")
-        return
-   
-    if text == "📂 اکانت‌های من":
-        u = get_user_row(user_id)
-        txt = "📁 وضعیت شما:\n"
-        txt += f"آگهی رایگان ثبت کرده‌اید: {'✅' if u and u.get('free_used') else '❌'}\n\n"
-        
-        listings = get_user_listings(user_id)
-        if listings:
-            txt += "📂 آگهی‌های فعال شما:\n"
-            keyboard = []
-            for listing in listings:
-                txt += f"آگهی ID {listing['id']}\n"
-                keyboard.append([InlineKeyboardButton(f"✏️ ویرایش آگهی {listing['id']}", callback_data=f"edit_listing|{listing['id']}")])
-            reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else main_menu
-        else:
-            txt += "هیچ آگهی فعالی ندارید."
-            reply_markup = main_menu
-        
-        await update.message.reply_text(txt, reply_markup=reply_markup)
-        return
-   
-    await update.message.reply_text("لطفا از منو انتخاب کنید.", reply_markup=main_menu)
-
-# =========================
-# هندلر عکس‌ها
-# =========================
-async def photo_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    user_id = user.id
-   
-    if await handle_manual_photos(update, context):
-        return
-   
-    photo_state = PHOTO_UPLOAD_STATES.get(user_id)
-    if photo_state:
-        if not update.message.photo:
-            if update.message.document:
-                await update.message.reply_text(
-                    "❌ فقط فایل‌های عکس مجاز هستند!\n\n"
-                    "لطفا فقط عکس ارسال کنید (فرمت‌های مجاز: JPG, JPEG, PNG, WEBP)",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-                    ])
-                )
-            return
-       
-        photo = update.message.photo[-1]
-        file_id = photo.file_id
-       
-        photo_state['photos'].append(file_id)
-       
-        current_count = len(photo_state['photos'])
-        max_photos = photo_state['max_photos']
-       
-        if current_count >= max_photos:
-            state = user_form_state.setdefault(user_id, {"awaiting_field": None, "form": {}, "pending_listing_id": None})
-            state['form']['team_photos'] = photo_state['photos']
-           
-            PHOTO_UPLOAD_STATES.pop(user_id, None)
-           
-            await update.message.reply_text(
-                f"✅ {current_count} عکس با موفقیت ثبت شد.\n\n"
-                f"به فرم اصلی برگشتید.",
-                reply_markup=sale_menu
-            )
-        else:
-            remaining = max_photos - current_count
-            await update.message.reply_text(
-                f"✅ عکس {current_count} ثبت شد.\n\n"
-                f"📸 می‌توانید {remaining} عکس دیگر ارسال کنید.\n"
-                f"یا برای بازگشت به فرم از دکمه زیر استفاده کنید:",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("↩️ برگشت به فرم", callback_data="back_to_form")]
-                ])
-            )
-        return
-
-# =========================
-# هندلر فایل‌های مستند
-# =========================
-async def document_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    user_id = user.id
-   
-    photo_state = PHOTO_UPLOAD_STATES.get(user_id)
-    if photo_state:
-        await update.message.reply_text(
-            "❌ فقط فایل‌های عکس مجاز هستند!\n\n"
-            "لطفا فقط عکس ارسال کنید (فرمت‌های مجاز: JPG, JPEG, PNG, WEBP)\n\n"
-            "فایل‌های دیگر مانند PDF, ZIP, MP4 و... پذیرفته نمی‌شوند.",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
-            ])
-        )
-        return
-   
-    await update.message.reply_text(
-        "❌ این نوع فایل پشتیبانی نمی‌شود.\n\n"
-        "لطفا فقط از گزینه‌های منو استفاده کنید.",
-        reply_markup=main_menu
-    )
-
-# =========================
-# Callback برای دکمه‌های ادمین
-# =========================
-async def admin_callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-    data = query.data or ""
-    parts = data.split("|")
-    action = parts[0] if parts else None
-   
-    if action == "admin_approve_free" and len(parts) == 2:
-        user_id = int(parts[1])
-       
-        try:
-            await context.bot.send_message(
-                user_id,
-                "🎉 آگهی رایگان شما توسط ادمین تأیید شد!\n\n"
-                "✅ اکنون آگهی شما در کانال فعال شده و به مدت ۱۰ روز نمایش داده خواهد شد.\n"
-                "با تشکر از انتخاب شما! 💎"
-            )
-        except Exception:
-            logger.warning("ارسال پیام تأیید به کاربر با خطا مواجه شد.")
-       
-        await query.edit_message_text("✅ آگهی رایگان تأیید و در کانال منتشر شد.")
-        return
-    
-    if action == "admin_reject_free" and len(parts) == 2:
-        user_id = int(parts[1])
-       
-        try:
-            await context.bot.send_message(
-                user_id,
-                "❌ متأسفانه آگهی رایگان شما توسط ادمین رد شد.\n\n"
-                "📋 دلایل احتمالی:\n"
-                "• اطلاعات ناقص یا نادرست\n"
-                "• عکس‌های نامناسب\n"
-                "• مغایرت با قوانین کانال\n\n"
-                "🔧 لطفاً اطلاعات را بررسی کرده و مجدداً ثبت کنید.\n"
-                "📞 برای اطلاعات بیشتر با پشتیبانی تماس بگیرید."
-            )
-        except Exception:
-            logger.warning("ارسال پیام رد به کاربر با خطا مواجه شد.")
-       
-        await query.edit_message_text("❌ آگهی رایگان رد شد و کاربر مطلع گردید.")
-        return
-   
-    if action == "admin_approve_manual" and len(parts) == 2:
-        user_id = int(parts[1])
-       
-        try:
-            await context.bot.send_message(
-                user_id,
-                "🎉 آگهی فرم دستی شما توسط ادمین تأیید شد!\n\n"
-                "✅ اکنون آگهی شما در کانال فعال شده و به مدت ۱۰ روز نمایش داده خواهد شد.\n"
-                "با تشکر از انتخاب شما! 💎"
-            )
-        except Exception:
-            logger.warning("ارسال پیام تأیید به کاربر با خطا مواجه شد.")
-       
-        await query.edit_message_text("✅ آگهی فرم دستی تأیید و در کانال منتشر شد.")
-        return
-    
-    if action == "admin_reject_manual" and len(parts) == 2:
-        user_id = int(parts[1])
-       
-        try:
-            await context.bot.send_message(
-                user_id,
-                "❌ متأسفانه آگهی فرم دستی شما توسط ادمین رد شد.\n\n"
-                "📋 دلانی احتمالی:\n"
-                "• اطلاعات ناقص یا نادرست\n"
-                "• عکس‌های نامناسب\n"
-                "• مغایرت با قوانین کانال\n\n"
-                "🔧 لطفاً اطلاعات را بررسی کرده و مجدداً ثبت کنید.\n"
-                "📞 برای اطلاعات بیشتر با پشتیبانی تماس بگیرید."
-            )
-        except Exception:
-            logger.warning("ارسال پیام رد به کاربر با خطا مواجه شد.")
-       
-        await query.edit_message_text("❌ آگهی فرم دستی رد شد و کاربر مطلع گردید.")
-        return
-   
-    await query.edit_message_text("دستور ناشناخته برای ادمین.")
-
-# =========================
-# اجرای بات
-# =========================
-def main():
-    init_db()
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
-   
-    app.add_handler(CommandHandler("start", start_command))
-    app.add_handler(CallbackQueryHandler(admin_callback_handler, pattern=r"^admin_"))
-   
-    app.add_handler(CallbackQueryHandler(handle_main_sale_callbacks, pattern=r"^(manual_form|bot_form)$"))
-   
-    app.add_handler(CallbackQueryHandler(handle_manual_form_callbacks, pattern=r"^manual_"))
-   
-    app.add_handler(CallbackQueryHandler(callback_query_handler))
-    app.add_handler(MessageHandler(filters.PHOTO, photo_handler))
-    app.add_handler(MessageHandler(filters.Document.ALL, document_handler))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_message_handler))
-   
-    logger.info("Bot started (polling).")
-    app.run_polling()
-
-if __name__ == "__main__":
-    main()
+# test_bot.py
+# test_bot.py
+import json
+import logging
+import os
+import time
+from typing import Optional, Dict, Any
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup,
+    ReplyKeyboardMarkup, KeyboardButton, InputMediaPhoto
+)
+from telegram.ext import (
+    ApplicationBuilder, CommandHandler, CallbackQueryHandler,
+    MessageHandler, ContextTypes, filters
+)
+
+# ایمپورت تنظیمات از فایل config
+import config
+
+# دیتابیس: init همزمان در شروع؛ بقیه کوئری‌ها از طریق repository غیرهمزمان
+from db import (
+    init_db, close_pool, get_conversation_state, iter_conversation_states,
+    save_conversation_states
+)
+from repository import (
+    users as user_repo, listings as listing_repo, run_db, run_db_write, shutdown_executor
+)
+from state_store import StateStore
+from router import CallbackRouter
+from membership_cache import MembershipCache
+from pricing import get_price_model
+from expiry import ExpirySweeper
+from publish import ChannelPublisher, QUEUED
+from outbound import OutboundQueue, PRIORITY_REPLY, PRIORITY_ADMIN, PRIORITY_BROADCAST
+from update_processor import PerUserUpdateProcessor
+from form_schema import compile_form
+from session import (
+    SaleSession, STEP_EAPLAY_DAYS, STEP_CHARS, STEP_PLAYER_VALUE, STEP_NUMBER,
+    STEP_DIVISION, STEP_PHOTOS, STEP_FREE_TEXT
+)
+
+# ========== پیکربندی از فایل config ==========
+BOT_TOKEN = config.BOT_TOKEN
+CHANNEL_USERNAME = config.CHANNEL_USERNAME
+ADMIN_USER_ID = config.ADMIN_USER_ID
+SPECIAL_TESTER_ID = config.SPECIAL_TESTER_ID
+DB_PATH = config.DB_PATH
+
+# بررسی وجود توکن
+if not BOT_TOKEN:
+    raise ValueError("❌ BOT_TOKEN در محیط تعریف نشده است!")
+
+# ================================
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# =========================
+# حافظه موقت برای جریان فرم
+# (یک SaleSession برای هر کاربر در StateStore با TTL و ذخیره تاخیری در SQLite)
+# =========================
+state_store = StateStore(
+    max_entries=config.STATE_MAX_ENTRIES,
+    ttl=config.STATE_TTL_SECONDS,
+    encode=SaleSession.dumps,
+    decode=SaleSession.loads,
+)
+sale_sessions = state_store.bucket("sale")
+
+async def _load_spilled(user_id: int):
+    # فرم بیرون‌رانده‌شده از حافظه روی thread دیتابیس خوانده می‌شود، نه روی event loop
+    key = (sale_sessions.namespace, user_id)
+    if state_store.needs_load(key):
+        state_store.load(key, await run_db(get_conversation_state, *key))
+
+async def get_session(user_id: int) -> Optional[SaleSession]:
+    await _load_spilled(user_id)
+    return sale_sessions.get(user_id)
+
+async def open_session(user_id: int) -> SaleSession:
+    await _load_spilled(user_id)
+    return sale_sessions.get_or_create(user_id, SaleSession)
+
+def clear_session(user_id: int):
+    sale_sessions.pop(user_id, None)
+
+async def flush_state_job(context: ContextTypes.DEFAULT_TYPE):
+    """ذخیره دوره‌ای تغییرات وضعیت فرم‌ها در دیتابیس (write-behind)"""
+    state_store.expire()
+    upserts, deletes = state_store.drain()
+    purge_before = time.time() - state_store.ttl
+    try:
+        await run_db_write(save_conversation_states, upserts, deletes, purge_before)
+    except Exception as e:
+        logger.error(f"خطا در ذخیره وضعیت فرم‌ها: {e}")
+        state_store.requeue(upserts, deletes)
+
+# =========================
+# منوها
+# =========================
+main_menu_buttons = [
+    [KeyboardButton("🔄 استارت مجدد"), KeyboardButton("💰 فروش اکانت")],
+    [KeyboardButton("📂 اکانت‌های من"), KeyboardButton("📖 راهنما")],
+    [KeyboardButton("🔎 جستجوی آگهی")]
+]
+main_menu = ReplyKeyboardMarkup(main_menu_buttons, resize_keyboard=True, one_time_keyboard=False)
+# متن دکمه‌های منوی اصلی (وسط فرم دستی هم فرم را لغو می‌کنند)
+MENU_COMMANDS = frozenset(button.text for row in main_menu_buttons for button in row)
+
+# =========================
+# منوی جدید برای انتخاب روش فروش
+# =========================
+sale_method_selection_buttons = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📝 فرم دستی", callback_data="manual_form")],
+    [InlineKeyboardButton("🤖 ربات", callback_data="bot_form")]
+])
+
+# =========================
+# متن راهنما
+# =========================
+GUIDE_TEXT = config.TEXTS["guide"]
+
+# =========================
+# فرم ربات (کامپایل‌شده از config.FORM_FIELDS): فیلدها، validatorها، قالب‌های نمایش و کیبوردهای ثابت
+# =========================
+FORM = compile_form(config.FORM_FIELDS, config.FORM_MENU, config.FORM_CHANNEL_FIELDS,
+                    max_photos=config.PRICE_CONFIG["max_photos"])
+sale_menu = FORM.menu
+back_to_form_menu = FORM.back_menu
+edit_form_menu = InlineKeyboardMarkup([[InlineKeyboardButton("↩️ برگشت و ویرایش", callback_data="back_to_form")]])
+photos_done_menu = InlineKeyboardMarkup([[InlineKeyboardButton("↩️ برگشت به فرم", callback_data="back_to_form")]])
+
+# =========================
+# منوهای جدید برای نحوه فروش
+# =========================
+sale_rules_buttons = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ می‌پذیرم", callback_data="accept_rules")],
+    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
+])
+
+sale_method_choice_buttons = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📱 ثبت آیدی خودم", callback_data="sale_method_self")],
+    [InlineKeyboardButton("🛒 فروش از طریق کانال", callback_data="sale_method_channel")],
+    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_rules")]
+])
+
+# =========================
+# دکمه‌های تأیید نهایی
+# =========================
+final_confirmation_buttons = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ مطمئن هستم و ثبت نهایی", callback_data="confirm_final_submit")],
+    [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
+])
+
+# =========================
+# متن قوانین فروش
+# =========================
+SALE_RULES_TEXT = config.TEXTS["sale_rules"]
+
+# منوی انتخاب نوع ایمیل
+email_type_buttons = [
+    [
+        InlineKeyboardButton("Gmail", callback_data="email_gmail"),
+        InlineKeyboardButton("Outlook", callback_data="email_outlook")
+    ],
+    [
+        InlineKeyboardButton("Hotmail", callback_data="email_hotmail"),
+        InlineKeyboardButton("Yahoo", callback_data="email_yahoo")
+    ],
+    [
+        InlineKeyboardButton("سایر", callback_data="email_other"),
+        InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")
+    ]
+]
+email_type_menu = InlineKeyboardMarkup(email_type_buttons)
+
+# منوی انتخاب نوع وب اپ
+web_app_buttons = [
+    [
+        InlineKeyboardButton("وب باز", callback_data="web_open"),
+        InlineKeyboardButton("وب بسته", callback_data="web_closed")
+    ],
+    [
+        InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")
+    ]
+]
+web_app_menu = InlineKeyboardMarkup(web_app_buttons)
+
+# =========================
+# Helper: check membership
+# =========================
+membership_cache = MembershipCache(
+    positive_ttl=config.MEMBERSHIP_POSITIVE_TTL,
+    negative_ttl=config.MEMBERSHIP_NEGATIVE_TTL,
+    max_entries=config.MEMBERSHIP_CACHE_SIZE,
+)
+
+async def is_member_of_channel(bot, user_id: int) -> bool:
+    async def fetch():
+        m = await bot.get_chat_member(chat_id=CHANNEL_USERNAME, user_id=user_id)
+        return m.status in ("creator", "administrator", "member")
+    try:
+        return await membership_cache.get(user_id, fetch)
+    except Exception as e:
+        logger.warning("get_chat_member failed: %s", e)
+        return False
+
+# =========================
+# تابع تخمین قیمت (ویرایش شده با استفاده از config)
+# =========================
+def render_price_estimate(price):
+    """متن تخمین و جزئیات محاسبه (نتیجه در کش مدل قیمت نگه داشته می‌شود)"""
+    estimate = f"💰 تخمین قیمت: {int(price.lower):,} - {int(price.upper):,} تومان"
+    details = f"""
+📊 جزئیات محاسبه:
+• ارزش کوین: {int(price.coin_value):,} تومان
+• بازیکنان ترید: {int(price.trade_players_value):,} تومان
+• بازیکنان آنترید: {int(price.nontrade_players_value):,} تومان
+• وب اپ: {price.web_app_bonus:,} تومان
+• مچ ارنینگ: {price.match_bonus:,} تومان
+• لول سیزن: {price.season_bonus:,} تومان
+• دیویژن رایوالز: {price.division_bonus:,} تومان
+            """
+    return {
+        'estimate': estimate,
+        'details': details,
+        'message': (f"{estimate}\n\n{details}\n\n"
+                    "⚠️ کاربر محترم قیمت ربات حدودی است و ممکن است اطلاعات ربات به روز نباشد"),
+        'success': True
+    }
+
+def estimate_price(form_data):
+    """تابع تخمین قیمت بر اساس فرمول تعریف شده (محاسبه و کش در pricing.PriceModel)"""
+    try:
+        return get_price_model().estimate(form_data, render_price_estimate)
+   
+    except Exception as e:
+        logger.error(f"Error in estimate_price: {e}")
+        return {
+            'success': False,
+            'error': "خطا در محاسبه قیمت. لطفا از پر بودن فیلدهای ضروری اطمینان حاصل کنید."
+        }
+
+# =========================
+# توابع جدید برای سیستم پلتفرم (ویرایش شده با config)
+# =========================
+async def handle_platform_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """شروع فرآیند انتخاب پلتفرم"""
+    query = update.callback_query
+    await query.answer()
+   
+    user_id = query.from_user.id
+    (await open_session(user_id)).reset_input()
+   
+    keyboard = [
+        [InlineKeyboardButton("پلی استیشن", callback_data="platform_ps")],
+        [InlineKeyboardButton("ایکس باکس", callback_data="platform_xbox")],
+        [InlineKeyboardButton("پی سی", callback_data="platform_pc")],
+        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_form")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+   
+    await query.edit_message_text(
+        "🎮 لطفاً پلتفرم خود را انتخاب کنید:",
+        reply_markup=reply_markup
+    )
+
+async def show_ps_options(query):
+    """نمایش گزینه‌های پلی استیشن"""
+    keyboard = [
+        [InlineKeyboardButton("ظرفیت 3", callback_data="subplatform_ps3")],
+        [InlineKeyboardButton("ظرفیت 2", callback_data="subplatform_ps2")],
+        [InlineKeyboardButton("کامل", callback_data="subplatform_psfull")],
+        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_platform")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+   
+    await query.edit_message_text(
+        "🎯 ظرفیت پلی استیشن را انتخاب کنید:",
+        reply_markup=reply_markup
+    )
+
+async def show_xbox_options(query):
+    """نمایش گزینه‌های ایکس باکس"""
+    keyboard = [
+        [InlineKeyboardButton("هوم", callback_data="subplatform_xboxhome")],
+        [InlineKeyboardButton("سوویچ", callback_data="subplatform_xboxswitch")],
+        [InlineKeyboardButton("کامل", callback_data="subplatform_xboxfull")],
+        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_platform")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+   
+    await query.edit_message_text(
+        "🎯 نوع ایکس باکس را انتخاب کنید:",
+        reply_markup=reply_markup
+    )
+
+async def show_pc_options(query):
+    """نمایش گزینه‌های پی سی"""
+    keyboard = [
+        [InlineKeyboardButton("بازی به صورت کامل", callback_data="subplatform_pcfull")],
+        [InlineKeyboardButton("اشتراک EA Play Pro", callback_data="subplatform_eaplay")],
+        [InlineKeyboardButton("↩️ برگشت", callback_data="back_to_platform")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+   
+    await query.edit_message_text(
+        "💻 نوع اکانت پی سی را انتخاب کنید:",
+        reply_markup=reply_markup
+    )
+
+async def finalize_platform_selection(query, session: SaleSession, platform, subplatform):
+    """ثبت نهایی انتخاب پلتفرم و نمایش فرم موقت"""
+    # ثبت اطلاعات پلتفرم در نشست کاربر
+    platform_display = get_platform_display_name(platform, subplatform)
+    session.form['platform'] = platform_display
+    session.form['platform_details'] = {
+        'main_platform': platform,
+        'sub_platform': subplatform
+    }
+   
+    # نمایش فرم موقت
+    temp_form_text = generate_temp_form_text(session.form)
+   
+    keyboard = [
+        [InlineKeyboardButton("✅ تأیید و ادامه", callback_data="continue_to_form")],
+        [InlineKeyboardButton("✏️ ویرایش پلتفرم", callback_data="platform")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+   
+    await query.edit_message_text(
+        f"✅ پلتفرم ثبت شد: {platform_display}\n\n"
+        f"📋 فرم موقت شما:\n{temp_form_text}\n\n"
+        f"آیا می‌خواهید ادامه دهید؟",
+        reply_markup=reply_markup
+    )
+
+async def handle_eaplay_days_input(update: Update, context: ContextTypes.DEFAULT_TYPE, session: SaleSession, text: str):
+    """پردازش تعداد روزهای EA Play"""
+    if text == "/back":
+        # برگشت به انتخاب پلتفرم پی سی
+        query = update
+        await show_pc_options(query)
+        return
+   
+    if not text.isdigit():
+        await update.message.reply_text("❌ لطفاً فقط عدد وارد کنید (مثال: 110)")
+        return
+   
+    days = int(text)
+    if days <= 0 or days > 3650:
+        await update.message.reply_text("❌ تعداد روز نامعتبر است. لطفاً عدد معتبر وارد کنید.")
+        return
+   
+    # ثبت اطلاعات
+    session.form['platform'] = f"پی سی - EA Play Pro ({days} روز)"
+    session.form['platform_details'] = {
+        'main_platform': 'pc',
+        'sub_platform': 'eaplay',
+        'eaplay_days': days
+    }
+    session.step = None
+   
+    # نمایش فرم موقت
+    temp_form_text = generate_temp_form_text(session.form)
+   
+    keyboard = [
+        [InlineKeyboardButton("✅ تأیید و ادامه", callback_data="continue_to_form")],
+        [InlineKeyboardButton("✏️ ویرایش پلتفرم", callback_data="platform")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+   
+    await update.message.reply_text(
+        f"✅ اطلاعات EA Play Pro ثبت شد: {days} روز\n\n"
+        f"📋 فرم موقت شما:\n{temp_form_text}\n\n"
+        f"آیا می‌خواهید ادامه دهید؟",
+        reply_markup=reply_markup
+    )
+
+def get_platform_display_name(main_platform, sub_platform):
+    """تبدیل کد پلتفرم به نام نمایشی (از config)"""
+    return config.PLATFORM_CONFIG.get(main_platform, {}).get(sub_platform, "نامشخص")
+
+def generate_temp_form_text(form_data):
+    """تولید متن فرم موقت"""
+    return FORM.render_temp(form_data)
+
+def generate_complete_form_display(form_data):
+    """تولید متن کامل فرم با وضعیت تکمیل هر فیلد"""
+    return FORM.render_complete(form_data)
+
+# =========================
+# تابع جدید برای ارسال فرم به ادمین
+# =========================
+# محدودیت‌های Bot API: آلبوم 2 تا 10 عکس، کپشن 1024 کاراکتر
+MEDIA_GROUP_MAX = 10
+CAPTION_MAX = 1024
+
+async def send_album(bot, chat_id, text: str, photos: list = None, buttons: InlineKeyboardMarkup = None,
+                     priority: int = PRIORITY_REPLY) -> int:
+    """عکس‌ها به صورت آلبوم (send_media_group) به همراه متن؛ message_id اولین پیام را برمی‌گرداند.
+
+    متن تا 1024 کاراکتر کپشن عکس اول می‌شود. آلبوم دکمه نمی‌گیرد، پس با دکمه یا
+    متن بلندتر، متن در یک پیام جدا در پاسخ به آلبوم می‌آید. تک عکس با متن کوتاه
+    یک send_photo با کپشن و دکمه‌هاست.
+    """
+    photos = photos or []
+    caption_fits = len(text) <= CAPTION_MAX
+    if len(photos) == 1 and caption_fits:
+        sent = await bot.send_photo(chat_id=chat_id, photo=photos[0], caption=text, reply_markup=buttons,
+                                    rate_limit_args=priority)
+        return sent.message_id
+
+    inline_caption = caption_fits and buttons is None and len(photos) <= MEDIA_GROUP_MAX
+    first_message_id = None
+    for start in range(0, len(photos), MEDIA_GROUP_MAX):
+        chunk = photos[start:start + MEDIA_GROUP_MAX]
+        caption = text if inline_caption and start == 0 else None
+        if len(chunk) == 1:
+            sent = [await bot.send_photo(chat_id=chat_id, photo=chunk[0], caption=caption, rate_limit_args=priority)]
+        else:
+            sent = await bot.send_media_group(
+                chat_id=chat_id,
+                media=[InputMediaPhoto(file_id, caption=caption if i == 0 else None) for i, file_id in enumerate(chunk)],
+                rate_limit_args=priority
+            )
+        if first_message_id is None and sent:
+            first_message_id = sent[0].message_id
+    if inline_caption and first_message_id is not None:
+        return first_message_id
+
+    message = await bot.send_message(
+        chat_id=chat_id,
+        text=text,
+        reply_markup=buttons,
+        reply_to_message_id=first_message_id,
+        rate_limit_args=priority
+    )
+    return first_message_id if first_message_id is not None else message.message_id
+
+async def deliver_to_admin(context: ContextTypes.DEFAULT_TYPE, text: str, buttons: InlineKeyboardMarkup, photos: list = None):
+    """ارسال یک آگهی برای بررسی ادمین (مشترک فرم ربات و فرم دستی): آلبوم عکس‌ها و
+    یک پیام با متن کامل و دکمه‌های تأیید/رد، به جای یک send_photo برای هر عکس."""
+    await send_album(context.bot, ADMIN_USER_ID, text, photos, buttons, PRIORITY_ADMIN)
+
+def admin_review_buttons(listing_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("✅ تأیید و انتشار", callback_data=f"admin_approve|{listing_id}"),
+            InlineKeyboardButton("❌ رد آگهی", callback_data=f"admin_reject|{listing_id}")
+        ]
+    ])
+
+def parse_form_data(data_json: Optional[str]) -> Optional[dict]:
+    """data_json آگهی -> فرم؛ None اگر خالی یا خراب باشد"""
+    try:
+        form_data = json.loads(data_json) if data_json else None
+    except ValueError:
+        return None
+    return form_data if isinstance(form_data, dict) else None
+
+def render_admin_review(listing_id: int, user_id: int, form_data: dict) -> str:
+    """متن بررسی ادمین (فرم ربات یا فرم دستی)"""
+    user_info = f"🆔 آگهی #{listing_id}\n👤 کاربر: {user_id}"
+    if form_data.get('submission_type') == 'manual':
+        return f"{user_info}\n\n📝 فرم دستی:\n{form_data.get('form_text', '')}"
+    if 'user_contact' in form_data:
+        user_info += f" - {form_data['user_contact']}"
+    return f"{user_info}\n\n{generate_complete_form_display(form_data)}"
+
+async def send_form_to_admin(context: ContextTypes.DEFAULT_TYPE, listing_id: int, user_id: int, form_data: dict, photos: list = None):
+    """ارسال اطلاعات فرم به ادمین برای تأیید"""
+    try:
+        await deliver_to_admin(context, render_admin_review(listing_id, user_id, form_data),
+                               admin_review_buttons(listing_id), photos)
+        return True
+       
+    except Exception as e:
+        logger.error(f"خطا در ارسال فرم به ادمین: {e}")
+        return False
+
+# =========================
+# ورودی متنی فیلدهای فرم (عدد، نام بازیکنان، ارزش بازیکنان، دیویژن، متن آزاد)
+# =========================
+async def handle_field_input(update: Update, context: ContextTypes.DEFAULT_TYPE, session: SaleSession, text: str):
+    """اعتبارسنجی با validator کامپایل‌شده فیلد در انتظار و ثبت در فرم"""
+    if text == "/back":
+        session.reset_input()
+        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
+        return
+   
+    key = session.pending_field
+    field = FORM.fields.get(key)
+    if field is None or field.validate is None:
+        # فیلد خارج از اسکیما (نشست قدیمی): مقدار آزاد
+        session.form[key] = text
+        session.reset_input()
+        await update.message.reply_text(f"✅ مقدار '{key}' ثبت شد.", reply_markup=sale_menu)
+        return
+   
+    value, reply = field.validate(text)
+    if value is None:
+        await update.message.reply_text(reply, reply_markup=back_to_form_menu)
+        return
+   
+    session.form[key] = value
+    if field.followup is not None:
+        session.expect(field.followup.step, field.followup.key)
+        await update.message.reply_text(reply, reply_markup=back_to_form_menu)
+        return
+    session.reset_input()
+    await update.message.reply_text(reply, reply_markup=sale_menu)
+
+# =========================
+# توابع جدید برای سیستم آپلود عکس (ویرایش شده با config)
+# =========================
+async def handle_photo_upload_message(update: Update, context: ContextTypes.DEFAULT_TYPE, session: SaleSession, text: str):
+    """مدیریت پیام‌های مربوط به آپلود عکس"""
+    if text == "/back":
+        session.reset_input()
+        await update.message.reply_text("به فرم اصلی برگشتید.", reply_markup=sale_menu)
+        return
+   
+    session.reset_input()
+    await update.message.reply_text(
+        "✅ از حالت آپلود عکس خارج شدید. به فرم اصلی برگشتید.",
+        reply_markup=sale_menu
+    )
+
+# =========================
+# تابع تولید لینک خرید منحصربه‌فرد
+# =========================
+def generate_purchase_link(user_id: int, listing_data: dict) -> str:
+    """تولید لینک خرید منحصربه‌فرد برای کاربر"""
+    import hashlib
+    import time
+   
+    unique_string = f"{user_id}_{time.time()}_{listing_data.get('platform', '')}"
+    link_hash = hashlib.md5(unique_string.encode()).hexdigest()[:8]
+   
+    base_url = "https://your-domain.com/purchase"
+    return f"{base_url}/{link_hash}"
+
+# =========================
+# توابع جدید برای سیستم فرم دستی (ویرایش شده با config)
+# =========================
+async def handle_manual_form_text(update: Update, context: ContextTypes.DEFAULT_TYPE, manual_state: dict, text: str):
+    """مدیریت دریافت فرم دستی از کاربر"""
+    if text in MENU_COMMANDS:
+        context.user_data.pop('manual_form', None)
+        return False
+   
+    text_length = len(text)
+   
+    if text_length < 250:
+        await update.message.reply_text(
+            "❌ خطا. لطفا فرم کامل بفرستید"
+        )
+        return True
+   
+    if text_length > 800:
+        excess_chars = text_length - 800
+        await update.message.reply_text(
+            f"❌ خطا شما ({excess_chars}) کاراکتر بیشتر از حد مجاز فرستاده اید"
+        )
+        return True
+   
+    manual_state['form_text'] = text
+    manual_state['step'] = 'form_received'
+   
+    form_display = f"""
+📋 فرم ارسالی شما:
+{text}
+اگر از صحت اطلاعات وارد شده اطمینان دارید کلید ثبت عکس را انتخاب کنید
+"""
+   
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("📸 ثبت عکس", callback_data="manual_add_photos")]
+    ])
+   
+    await update.message.reply_text(form_display, reply_markup=keyboard)
+    return True
+
+async def handle_manual_photos(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """مدیریت دریافت عکس‌های فرم دستی"""
+    user = update.effective_user
+    user_id = user.id
+   
+    manual_state = context.user_data.get('manual_form')
+    if not manual_state or manual_state.get('step') != 'awaiting_photos':
+        return False
+   
+    if not update.message.photo:
+        return False
+   
+    photo = update.message.photo[-1]
+    file_id = photo.file_id
+   
+    if 'photos' not in manual_state:
+        manual_state['photos'] = []
+    manual_state['photos'].append(file_id)
+   
+    current_count = len(manual_state['photos'])
+    max_photos = config.PRICE_CONFIG["max_photos"]
+   
+    if current_count >= max_photos:
+        manual_state['step'] = 'photos_received'
+       
+        await update.message.reply_text(
+            f"✅ {current_count} عکس با موفقیت ثبت شد.\n\n"
+            f"با انتخاب کلید ثبت نهایی فرم و عکس های شما برای ادمین ارسال خواهند شد",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("✅ ثبت نهایی", callback_data="manual_final_submit")]
+            ])
+        )
+    else:
+        remaining = max_photos - current_count
+        await update.message.reply_text(
+            f"✅ عکس {current_count} ثبت شد.\n\n"
+            f"📸 می‌توانید {remaining} عکس دیگر ارسال کنید."
+        )
+    return True
+
+async def submit_manual_form_to_admin(context: ContextTypes.DEFAULT_TYPE, listing_id: int, user_id: int, form_data: dict, photos: list = None):
+    """ارسال فرم دستی به ادمین برای تأیید"""
+    try:
+        await deliver_to_admin(context, render_admin_review(listing_id, user_id, form_data),
+                               admin_review_buttons(listing_id), photos)
+        return True
+       
+    except Exception as e:
+        logger.error(f"خطا در ارسال فرم دستی به ادمین: {e}")
+        return False
+
+# =========================
+# هندل کردن callbacks فرم دستی
+# =========================
+async def handle_manual_form_callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """هندلر مخصوص callbacks فرم دستی"""
+    query = update.callback_query
+    await query.answer()
+    user_id = query.from_user.id
+    data = query.data
+   
+    if data == "manual_final_submit":
+        manual_state = context.user_data.get('manual_form')
+       
+        if not manual_state:
+            await query.edit_message_text(
+                "❌ خطا: اطلاعات فرم یافت نشد. لطفاً فرآیند را از ابتدا شروع کنید.",
+                reply_markup=main_menu
+            )
+            return
+       
+        if not manual_state.get('form_text'):
+            await query.edit_message_text(
+                "❌ خطا: متن فرم یافت نشد. لطفاً فرآیند را از ابتدا شروع کنید.",
+                reply_markup=main_menu
+            )
+            return
+       
+        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
+            u = await user_repo.get(user_id)
+            if u and u.get("free_used"):
+                await query.edit_message_text(
+                    "❌ شما قبلاً یک اکانت رایگان ثبت کرده‌اید.",
+                    reply_markup=main_menu
+                )
+                context.user_data.pop('manual_form', None)
+                return
+       
+        photos = manual_state.get('photos', [])
+       
+        logger.info(f"ارسال فرم دستی به ادمین - کاربر: {user_id}, طول متن: {len(manual_state['form_text'])}, تعداد عکس: {len(photos)}")
+       
+        form_data = {
+            'form_text': manual_state['form_text'],
+            'photos_count': len(photos),
+            'team_photos': photos,
+            'submission_type': 'manual'
+        }
+        # آگهی اول pending ثبت می‌شود تا دکمه‌های ادمین شناسه آن را داشته باشند
+        listing_id = await listing_repo.create(user_id=user_id, data_json=json.dumps(form_data, ensure_ascii=False),
+                                               status='pending')
+        success = await submit_manual_form_to_admin(context, listing_id, user_id, form_data, photos)
+       
+        if success:
+            await user_repo.mark_free_used(user_id)
+            context.user_data.pop('manual_form', None)
+           
+            await query.edit_message_text(
+                "✅ فرم و عکس های شما با موفقیت ثبت شدند.\n\n"
+                "📋 پس از تأیید ادمین، آگهی شما در کانال نمایش داده خواهد شد.\n"
+                "⏳ زمان بررسی: حداکثر 24 ساعت\n\n"
+                "با تشکر از اعتماد شما! 🙏"
+            )
+        else:
+            await listing_repo.discard_pending(listing_id)
+            await query.edit_message_text(
+                "❌ خطا در ارسال اطلاعات به ادمین. لطفاً مجدداً تلاش کنید یا با پشتیبانی تماس بگیرید."
+            )
+        return
+   
+    elif data == "manual_add_photos":
+        manual_state = context.user_data.get('manual_form')
+        if manual_state and manual_state.get('step') == 'form_received':
+            manual_state['step'] = 'awaiting_photos'
+            await query.edit_message_text(
+                "📸 لطفا حداکثر ۳ عکس از اکانت/تیم خود آپلود کنید"
+            )
+        return
+
+# =========================
+# هندل کردن callbacks اصلی منوی فروش
+# =========================
+async def handle_main_sale_callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """هندلر مخصوص callbacks منوی اصلی فروش"""
+    query = update.callback_query
+    await query.answer()
+    user = query.from_user
+    user_id = user.id
+    data = query.data
+   
+    if data == "manual_form":
+        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
+            u = await user_repo.get(user_id)
+            if u and u.get("free_used"):
+                await query.edit_message_text(
+                    "❌ شما قبلاً یک آگهی رایگان ثبت کرده‌اید.",
+                    reply_markup=main_menu
+                )
+                return
+       
+        manual_form_template = config.TEXTS["manual_form_template"]
+       
+        context.user_data['manual_form'] = {
+            'step': 'awaiting_form',
+            'form_text': '',
+            'photos': []
+        }
+       
+        await query.edit_message_text(manual_form_template)
+        return
+   
+    elif data == "bot_form":
+        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
+            u = await user_repo.get(user_id)
+            if u and u.get("free_used"):
+                await query.edit_message_text(
+                    "❌ شما قبلاً یک اکانت رایگان ثبت کرده‌اید.",
+                    reply_markup=main_menu
+                )
+                return
+       
+        await open_session(user_id)
+       
+        special_msg = "👑 [حالت ویژه - بدون محدودیت]" if str(user_id) in [ADMIN_USER_ID, SPECIAL_TESTER_ID] else ""
+       
+        msg = (
+            f"🤖 **ربات فرم پیشرفته**\n\n"
+            f"{special_msg}\n\n"
+            f"💎 کاربر گرامی، شما می‌توانید **یک اکانت رایگان** برای آگهی در کانال ثبت کنید.\n\n"
+            "⚠️ دقت کنید بعد از زدن **ثبت نهایی** امکان ویرایش اطلاعات اکانت رایگان وجود ندارد.\n\n"
+            "🟢 لطفا گزینه مورد نظر خود را انتخاب کنید:"
+        )
+        await query.edit_message_text(msg, reply_markup=sale_menu, parse_mode="Markdown")
+        return
+
+# =========================
+# مسیریاب callbackها (کلید دقیق یا پیشوند -> هندلر)
+# =========================
+callback_router = CallbackRouter()
+
+# =========================
+# Handlers
+# =========================
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    chat_id = update.effective_chat.id
+   
+    member = await is_member_of_channel(context.bot, user.id)
+    if not member:
+        join_button = InlineKeyboardButton(text="پیوستن به کانال رنک1", url=f"https://t.me/{CHANNEL_USERNAME.lstrip('@')}")
+        i_joined_button = InlineKeyboardButton(text="✅ من عضو شدم (بررسی مجدد)", callback_data="check_join")
+        keyboard_not_member = InlineKeyboardMarkup([[join_button], [i_joined_button]])
+        await context.bot.send_message(chat_id=chat_id, text="لطفاً ابتدا در کانال رنک 1 عضو شوید.", reply_markup=keyboard_not_member)
+        return
+   
+    welcome_message = config.TEXTS["welcome"].format(user.first_name)
+    await context.bot.send_message(chat_id=chat_id, text=welcome_message, reply_markup=main_menu)
+
+@callback_router.exact("back_to_menu")
+async def cb_back_to_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    context.user_data.pop('manual_form', None)
+    clear_session(user_id)
+   
+    await query.edit_message_text("🏠 به منوی اصلی برگشتید.", reply_markup=main_menu)
+
+@callback_router.exact("check_join")
+async def cb_check_join(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    # کاربر می‌گوید تازه عضو شده؛ نتیجه کش‌شده قبلی معتبر نیست
+    membership_cache.invalidate(user_id)
+    member = await is_member_of_channel(context.bot, user_id)
+    if member:
+        await query.edit_message_text("ممنون! شما عضو هستید. از منوی اصلی استفاده کنید.")
+        try:
+            await context.bot.send_message(chat_id=user_id, text="منوی اصلی:", reply_markup=main_menu)
+        except:
+            pass
+    else:
+        await query.edit_message_text("هنوز عضو کانال نیستید. لطفا عضو شوید.")
+
+@callback_router.exact("continue_to_form")
+async def cb_continue_to_form(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    await query.edit_message_text(
+        "به فرم اصلی برگشتید. لطفاً سایر فیلدها را تکمیل کنید:",
+        reply_markup=sale_menu
+    )
+    session = await get_session(user_id)
+    if session:
+        session.platform = None
+        session.step = None
+
+@callback_router.exact("show_entered_data")
+async def cb_show_entered_data(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    session = await get_session(user_id)
+    if not session or not session.form:
+        await query.edit_message_text(
+            "❌ هنوز هیچ اطلاعاتی ثبت نکرده‌اید.\n\n"
+            "لطفا ابتدا اطلاعات فرم را تکمیل کنید.",
+            reply_markup=sale_menu
+        )
+        return
+   
+    form_display = generate_complete_form_display(session.form)
+   
+    await query.edit_message_text(
+        form_display,
+        reply_markup=edit_form_menu
+    )
+
+@callback_router.exact("sale_method")
+async def cb_sale_method(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await query.edit_message_text(
+        SALE_RULES_TEXT,
+        reply_markup=sale_rules_buttons,
+        parse_mode="Markdown"
+    )
+
+@callback_router.exact("accept_rules")
+async def cb_accept_rules(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await query.edit_message_text(
+        "✅ با تشکر از پذیرش قوانین\n\n"
+        "لطفا نحوه فروش خود را انتخاب کنید:",
+        reply_markup=sale_method_choice_buttons
+    )
+
+@callback_router.exact("back_to_rules")
+async def cb_back_to_rules(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await query.edit_message_text(
+        SALE_RULES_TEXT,
+        reply_markup=sale_rules_buttons,
+        parse_mode="Markdown"
+    )
+
+@callback_router.exact("sale_method_self")
+async def cb_sale_method_self(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user = query.from_user
+    user_id = user.id
+    session = await open_session(user_id)
+   
+    if 'purchase_link' in session.form:
+        del session.form['purchase_link']
+   
+    user_contact = f"@{user.username}" if user.username else f"{user.first_name} {user.last_name or ''}".strip()
+    if not user_contact or user_contact == "@":
+        user_contact = f"UserID: {user_id}"
+   
+    session.form['sale_method'] = "ثبت آیدی خودم"
+    session.form['user_contact'] = user_contact
+   
+    await query.edit_message_text(
+        f"✅ روش فروش ثبت شد: **ثبت آیدی خودم**\n"
+        f"📱 آیدی شما: `{user_contact}`\n\n"
+        f"این اطلاعات در فرم شما ذخیره شد.",
+        parse_mode="Markdown",
+        reply_markup=sale_menu
+    )
+
+@callback_router.exact("sale_method_channel")
+async def cb_sale_method_channel(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    session = await open_session(user_id)
+   
+    if 'user_contact' in session.form:
+        del session.form['user_contact']
+   
+    purchase_link = generate_purchase_link(user_id, session.form)
+   
+    session.form['sale_method'] = "فروش از طریق کانال"
+    session.form['purchase_link'] = purchase_link
+   
+    await query.edit_message_text(
+        f"✅ روش فروش ثبت شد: **فروش از طریق کانال**\n"
+        f"🛒 لینک خرید مخصوص شما:\n`{purchase_link}`\n\n"
+        f"این لینک پس از تایید نهایی در کانال قرار خواهد گرفت.",
+        parse_mode="Markdown",
+        reply_markup=sale_menu
+    )
+
+@callback_router.exact("email_type")
+async def cb_email_type(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await query.edit_message_text(
+        "📧 نوع ایمیل اکانت خود را انتخاب کنید:",
+        reply_markup=email_type_menu
+    )
+
+@callback_router.exact("web_app")
+async def cb_web_app(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await query.edit_message_text(
+        "🌐 نوع ترنسفر وب اپ اکانت را انتخاب کنید:",
+        reply_markup=web_app_menu
+    )
+
+@callback_router.prefix("email_")
+async def cb_email_choice(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    data = query.data
+    email_type = data.split("_")[1]
+    (await open_session(user_id)).form['email_type'] = config.EMAIL_TYPES.get(email_type, "سایر")
+   
+    await query.edit_message_text(
+        f"✅ نوع ایمیل ثبت شد: {config.EMAIL_TYPES.get(email_type, 'سایر')}",
+        reply_markup=sale_menu
+    )
+
+@callback_router.prefix("web_")
+async def cb_web_choice(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    data = query.data
+    web_type = data.split("_")[1]
+    (await open_session(user_id)).form['web_app'] = config.WEB_APP_TYPES.get(web_type, "وب بسته")
+   
+    await query.edit_message_text(
+        f"✅ نوع وب اپ ثبت شد: {config.WEB_APP_TYPES.get(web_type, 'وب بسته')}",
+        reply_markup=sale_menu
+    )
+
+@callback_router.exact("platform")
+async def cb_platform(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await handle_platform_selection(update, context)
+
+@callback_router.exact("back_to_form")
+async def cb_back_to_form(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    await query.edit_message_text(
+        "به فرم اصلی برگشتید. لطفا فیلدها را تکمیل کنید:",
+        reply_markup=sale_menu
+    )
+    session = await get_session(user_id)
+    if session:
+        session.reset_input()
+
+@callback_router.exact("back_to_platform")
+async def cb_back_to_platform(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await handle_platform_selection(update, context)
+
+@callback_router.prefix("platform_")
+async def cb_platform_choice(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    data = query.data
+    platform_type = data.split("_")[1]
+    session = await open_session(user_id)
+    session.reset_input()
+    session.platform = platform_type
+   
+    if platform_type == "ps":
+        await show_ps_options(query)
+    elif platform_type == "xbox":
+        await show_xbox_options(query)
+    elif platform_type == "pc":
+        await show_pc_options(query)
+
+@callback_router.prefix("subplatform_")
+async def cb_subplatform_choice(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    data = query.data
+    sub_type = data.split("_")[1]
+    session = await open_session(user_id)
+   
+    if session.platform == 'pc' and sub_type == 'eaplay':
+        session.step = STEP_EAPLAY_DAYS
+       
+        await query.edit_message_text(
+            "📅 چند روز از اعتبار EA Play Pro اکانت شما باقی مانده؟\n"
+            "لطفاً عدد تعداد روزهای باقیمانده را ارسال کنید (مثال: 110)\n\n"
+            "↩️ /back برای برگشت"
+        )
+    else:
+        await finalize_platform_selection(query, session, session.platform, sub_type)
+
+@callback_router.exact("estimate_price")
+async def cb_estimate_price(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    session = await get_session(user_id)
+    if not session or not session.form:
+        await query.edit_message_text(
+            "❌ هنوز اطلاعات کافی برای تخمین قیمت وارد نکرده‌اید.\n\n"
+            "لطفا حداقل فیلدهای زیر را پر کنید:\n"
+            "• کوین اکانت\n• بازیکنان ترید/آنترید\n• وب اپ",
+            reply_markup=sale_menu
+        )
+        return
+   
+    form_data = session.form
+    required_fields = ['coin_account']
+   
+    missing_fields = []
+    for field in required_fields:
+        if field not in form_data or not form_data[field]:
+            missing_fields.append(field)
+   
+    if missing_fields:
+        await query.edit_message_text(
+            f"❌ برای تخمین قیمت نیاز به پر کردن فیلدهای زیر دارید:\n"
+            f"• {', '.join(missing_fields)}\n\n"
+            f"لطفا ابتدا این فیلدها را پر کنید.",
+            reply_markup=sale_menu
+        )
+        return
+   
+    result = estimate_price(form_data)
+   
+    if result['success']:
+        await query.edit_message_text(
+            result['message'],
+            reply_markup=sale_menu
+        )
+    else:
+        await query.edit_message_text(
+            f"❌ {result['error']}",
+            reply_markup=sale_menu
+        )
+
+@callback_router.exact("final_submit")
+async def cb_final_submit(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    session = await get_session(user_id)
+    if not session or not session.form:
+        await query.edit_message_text("فرم خالی است. لطفا فیلدها را تکمیل کنید قبل از ثبت نهایی.")
+        return
+   
+    confirmation_text = """
+⚠️ کاربر محترم با زدن ثبت نهایی، اطلاعات اکانت شما برای درج در کانال به ادمین ارسال خواهد شد.
+🔍 خواهشمند است قبل از ثبت نهایی از صحت اطلاعات زیر اطمینان حاصل کنید:
+{form_display}
+آیا از ثبت نهایی اطلاعات مطمئن هستید؟
+""".format(form_display=generate_complete_form_display(session.form))
+   
+    await query.edit_message_text(
+        confirmation_text,
+        reply_markup=final_confirmation_buttons
+    )
+
+@callback_router.exact("confirm_final_submit")
+async def cb_confirm_final_submit(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    user_id = query.from_user.id
+    session = await get_session(user_id)
+    if not session or not session.form:
+        await query.edit_message_text("خطا: اطلاعات فرم یافت نشد.")
+        return
+   
+    photos = session.form.get('team_photos', [])
+    # آگهی اول pending ثبت می‌شود تا دکمه‌های ادمین شناسه آن را داشته باشند
+    listing_id = await listing_repo.create(user_id=user_id, data_json=json.dumps(session.form, ensure_ascii=False),
+                                           estimate=get_price_model().estimate_range(session.form), status='pending')
+    success = await send_form_to_admin(context, listing_id, user_id, session.form, photos)
+   
+    if success:
+        await user_repo.mark_free_used(user_id)
+       
+        clear_session(user_id)
+       
+        await query.edit_message_text(
+            "✅ اطلاعات اکانت شما با موفقیت ثبت شد و برای بررسی به ادمین ارسال گردید.\n\n"
+            "📋 پس از تأیید ادمین، آگهی شما در کانال نمایش داده خواهد شد.\n"
+            "⏳ زمان بررسی: حداکثر 24 ساعت\n\n"
+            "با تشکر از اعتماد شما! 🙏"
+        )
+    else:
+        await listing_repo.discard_pending(listing_id)
+        await query.edit_message_text(
+            "❌ خطا در ارسال اطلاعات به ادمین. لطفاً مجدداً تلاش کنید یا با پشتیبانی تماس بگیرید."
+        )
+
+@callback_router.exact(*FORM.input_callbacks)
+async def cb_form_field(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    field = FORM.by_callback[query.data]
+    (await open_session(query.from_user.id)).expect(field.step, field.key)
+    await query.edit_message_text(field.prompt, reply_markup=back_to_form_menu)
+
+@callback_router.prefix("edit_listing|")
+async def cb_edit_listing(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    # دکمه «✏️ ویرایش آگهی» از بخش «آگهی‌های من»
+    user_id = query.from_user.id
+    try:
+        listing_id = int(query.data.split("|", 1)[1])
+    except (IndexError, ValueError):
+        await query.edit_message_text("شناسه آگهی نامعتبر است.")
+        return
+   
+    listing = await listing_repo.get(listing_id)
+    if not listing or listing["user_id"] != user_id:
+        await query.edit_message_text("آگهی یافت نشد.")
+        return
+   
+    form_data = parse_form_data(listing["data_json"]) or {}
+   
+    await query.edit_message_text(
+        f"📋 آگهی {listing_id}\n\n"
+        + generate_complete_form_display(form_data)
+        + "\n\nℹ️ آگهی ثبت‌شده قابل ویرایش نیست؛ برای تغییر با پشتیبانی تماس بگیرید.",
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("🏠 منوی اصلی", callback_data="back_to_menu")]
+        ])
+    )
+
+# =========================
+# جستجوی خریدار (فیلترها در user_data، صفحه‌بندی keyset با cursor در callback_data)
+# =========================
+DIVISION_FILTERS = ["elite"] + [str(i) for i in range(1, 11)]
+
+def format_price(value) -> str:
+    return f"{int(value):,}"
+
+def describe_price_range(index) -> str:
+    low, high = config.SEARCH_PRICE_RANGES[index]
+    if high is None:
+        return f"از {format_price(low)} تومان به بالا"
+    return f"{format_price(low)} تا {format_price(high)} تومان"
+
+def format_search_filters(filters: dict) -> str:
+    platform = filters.get('platform')
+    sub = filters.get('sub')
+    if platform and sub:
+        platform_text = config.PLATFORM_CONFIG[platform][sub]
+    elif platform:
+        platform_text = {"ps": "پلی استیشن", "xbox": "ایکس باکس", "pc": "پی سی"}[platform]
+    else:
+        platform_text = "همه"
+    price = filters.get('price')
+    return (
+        "🔎 جستجوی آگهی‌ها\n\n"
+        f"🎮 پلتفرم: {platform_text}\n"
+        f"💵 قیمت: {describe_price_range(price) if price is not None else 'همه'}\n"
+        f"🏅 دیویژن: {filters['division'].title() if filters.get('division') else 'همه'}\n"
+        f"🌐 وب اپ: {config.WEB_APP_TYPES.get(filters.get('web'), 'همه')}\n"
+        f"📧 ایمیل: {config.EMAIL_TYPES.get(filters.get('email'), 'همه')}\n\n"
+        "فیلترها را انتخاب کنید و «نمایش نتایج» را بزنید."
+    )
+
+def search_filter_menu() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("🎮 پلتفرم", callback_data="search_f|platform"),
+         InlineKeyboardButton("💵 بازه قیمت", callback_data="search_f|price")],
+        [InlineKeyboardButton("🏅 دیویژن", callback_data="search_f|division"),
+         InlineKeyboardButton("🌐 وب اپ", callback_data="search_f|web"),
+         InlineKeyboardButton("📧 ایمیل", callback_data="search_f|email")],
+        [InlineKeyboardButton("🔍 نمایش نتایج", callback_data="search_run")],
+        [InlineKeyboardButton("🔤 جستجوی نام بازیکن", callback_data="search_players")],
+        [InlineKeyboardButton("♻️ پاک کردن فیلترها", callback_data="search_reset")],
+    ])
+
+def search_options_menu(field: str, filters: dict) -> InlineKeyboardMarkup:
+    if field == "platform":
+        options = [("پلی استیشن", "ps"), ("ایکس باکس", "xbox"), ("پی سی", "pc")]
+    elif field == "sub":
+        options = [(name, key) for key, name in config.PLATFORM_CONFIG[filters['platform']].items()]
+    elif field == "price":
+        options = [(describe_price_range(i), str(i)) for i in range(len(config.SEARCH_PRICE_RANGES))]
+    elif field == "division":
+        options = [(value.title(), value) for value in DIVISION_FILTERS]
+    elif field == "web":
+        options = [(name, key) for key, name in config.WEB_APP_TYPES.items()]
+    else:
+        options = [(name, key) for key, name in config.EMAIL_TYPES.items()]
+    rows = [[InlineKeyboardButton(label, callback_data=f"search_set|{field}|{value}")]
+            for label, value in options]
+    rows.append([InlineKeyboardButton("همه", callback_data=f"search_set|{field}|")])
+    rows.append([InlineKeyboardButton("↩️ برگشت", callback_data="search_menu")])
+    return InlineKeyboardMarkup(rows)
+
+def format_search_results(rows) -> tuple:
+    """(متن، کیبورد) برای ردیف‌های SEARCH_COLUMNS"""
+    lines = ["🔎 نتایج جستجو:\n"]
+    keyboard = []
+    for listing_id, price, platform_main, platform_sub, division, web_app, email_type in rows:
+        platform_text = config.PLATFORM_CONFIG.get(platform_main or "", {}).get(platform_sub or "", "-")
+        price_text = f"💵 {format_price(price)} تومان" if price is not None else "💵 -"
+        lines.append(
+            f"#{listing_id} | {platform_text} | {price_text}"
+            + (f" | 🏅 {division.title()}" if division else "")
+        )
+        keyboard.append([InlineKeyboardButton(f"👁 آگهی {listing_id}", callback_data=f"search_view|{listing_id}")])
+    return "\n".join(lines), keyboard
+
+def search_query_filters(filters: dict) -> dict:
+    """فیلترهای ذخیره‌شده (کلید دکمه‌ها) -> آرگومان‌های db.build_search_query"""
+    query_filters = {}
+    if filters.get('platform'):
+        query_filters['platform_main'] = filters['platform']
+        if filters.get('sub'):
+            query_filters['platform_sub'] = filters['sub']
+    if filters.get('price') is not None:
+        low, high = config.SEARCH_PRICE_RANGES[filters['price']]
+        query_filters['min_price'] = low
+        query_filters['max_price'] = high
+    if filters.get('division'):
+        query_filters['division'] = filters['division']
+    if filters.get('web'):
+        query_filters['web_app'] = config.WEB_APP_TYPES[filters['web']]
+    if filters.get('email'):
+        query_filters['email_type'] = config.EMAIL_TYPES[filters['email']]
+    return query_filters
+
+async def show_search_page(query, context: ContextTypes.DEFAULT_TYPE, after=None):
+    filters = context.user_data.setdefault('buyer_search', {})
+    page_size = config.SEARCH_PAGE_SIZE
+    # یک ردیف اضافه فقط برای دانستن وجود صفحه بعد
+    rows = await listing_repo.search(after=after, limit=page_size + 1, **search_query_filters(filters))
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+   
+    if not rows:
+        await query.edit_message_text(
+            "هیچ آگهی با این فیلترها پیدا نشد." if after is None else "آگهی دیگری وجود ندارد.",
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔧 فیلترها", callback_data="search_menu")]])
+        )
+        return
+   
+    text, keyboard = format_search_results(rows)
+    nav = [InlineKeyboardButton("🔧 فیلترها", callback_data="search_menu")]
+    if has_next:
+        last_id, last_price = rows[-1][0], rows[-1][1]
+        nav.append(InlineKeyboardButton("▶️ صفحه بعد", callback_data=f"search_page|{last_price}|{last_id}"))
+    keyboard.append(nav)
+    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+
+@callback_router.exact("search_menu")
+async def cb_search_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    filters = context.user_data.setdefault('buyer_search', {})
+    await query.edit_message_text(format_search_filters(filters), reply_markup=search_filter_menu())
+
+@callback_router.exact("search_reset")
+async def cb_search_reset(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    context.user_data['buyer_search'] = {}
+    await query.edit_message_text(format_search_filters({}), reply_markup=search_filter_menu())
+
+@callback_router.prefix("search_f|")
+async def cb_search_field(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    field = query.data.split("|", 1)[1]
+    filters = context.user_data.setdefault('buyer_search', {})
+    await query.edit_message_text("یک گزینه را انتخاب کنید:", reply_markup=search_options_menu(field, filters))
+
+@callback_router.prefix("search_set|")
+async def cb_search_set(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    _, field, value = query.data.split("|", 2)
+    filters = context.user_data.setdefault('buyer_search', {})
+   
+    if field == "platform":
+        filters.pop('sub', None)
+        if value in config.PLATFORM_CONFIG:
+            filters['platform'] = value
+            await query.edit_message_text("زیرپلتفرم را انتخاب کنید:", reply_markup=search_options_menu("sub", filters))
+            return
+        filters.pop('platform', None)
+    elif field == "sub":
+        if value in config.PLATFORM_CONFIG.get(filters.get('platform'), {}):
+            filters['sub'] = value
+        else:
+            filters.pop('sub', None)
+    elif field == "price":
+        if value.isdigit() and int(value) < len(config.SEARCH_PRICE_RANGES):
+            filters['price'] = int(value)
+        else:
+            filters.pop('price', None)
+    elif field == "division":
+        if value in DIVISION_FILTERS:
+            filters['division'] = value
+        else:
+            filters.pop('division', None)
+    elif field == "web":
+        if value in config.WEB_APP_TYPES:
+            filters['web'] = value
+        else:
+            filters.pop('web', None)
+    elif field == "email":
+        if value in config.EMAIL_TYPES:
+            filters['email'] = value
+        else:
+            filters.pop('email', None)
+   
+    await query.edit_message_text(format_search_filters(filters), reply_markup=search_filter_menu())
+
+@callback_router.exact("search_players")
+async def cb_search_players(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    context.user_data['player_search_pending'] = True
+    await query.edit_message_text(
+        "🔤 نام بازیکن را بفرستید (فارسی یا انگلیسی، حداقل 3 حرف).\n"
+        "مثال: امباپه یا Mbappe",
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("↩️ برگشت", callback_data="search_menu")]])
+    )
+
+async def handle_player_search_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
+    """نتایج FTS برای نام بازیکن وارد شده (رتبه‌بندی bm25)"""
+    rows = await listing_repo.search_players(text, limit=config.SEARCH_PAGE_SIZE * 2)
+    if not rows:
+        await update.message.reply_text(
+            "هیچ آگهی فعالی با این نام پیدا نشد.",
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔧 فیلترها", callback_data="search_menu")]])
+        )
+        return
+    result_text, keyboard = format_search_results(rows)
+    keyboard.append([InlineKeyboardButton("🔧 فیلترها", callback_data="search_menu")])
+    await update.message.reply_text(result_text, reply_markup=InlineKeyboardMarkup(keyboard))
+
+@callback_router.exact("search_run")
+async def cb_search_run(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    await show_search_page(query, context)
+
+@callback_router.prefix("search_page|")
+async def cb_search_page(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    try:
+        _, price, listing_id = query.data.split("|")
+        after = (int(price), int(listing_id))
+    except ValueError:
+        await query.edit_message_text("صفحه نامعتبر است.")
+        return
+    await show_search_page(query, context, after=after)
+
+@callback_router.prefix("search_view|")
+async def cb_search_view(update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    try:
+        listing_id = int(query.data.split("|", 1)[1])
+    except ValueError:
+        await query.edit_message_text("شناسه آگهی نامعتبر است.")
+        return
+   
+    listing = await listing_repo.get(listing_id)
+    if not listing or listing["status"] != "active":
+        await query.edit_message_text("این آگهی دیگر فعال نیست.")
+        return
+   
+    form_data = parse_form_data(listing["data_json"]) or {}
+   
+    await query.edit_message_text(
+        f"📋 آگهی {listing_id}\n\n" + generate_temp_form_text(form_data),
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔍 برگشت به نتایج", callback_data="search_run")]
+        ])
+    )
+
+async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+   
+    handler = callback_router.resolve(query.data or "")
+    if handler is None:
+        await query.edit_message_text("دکمه شناخته نشد.")
+        return
+    await handler(update, context, query)
+
+# مرحله نشست -> هندلر ورودی متنی آن مرحله
+STEP_TEXT_HANDLERS = {
+    STEP_EAPLAY_DAYS: handle_eaplay_days_input,
+    STEP_CHARS: handle_field_input,
+    STEP_PLAYER_VALUE: handle_field_input,
+    STEP_NUMBER: handle_field_input,
+    STEP_DIVISION: handle_field_input,
+    STEP_PHOTOS: handle_photo_upload_message,
+    STEP_FREE_TEXT: handle_field_input,
+}
+
+async def text_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    user_id = user.id
+    text = (update.message.text or "").strip()
+   
+    # فرم دستی (وضعیت در user_data) مقدم است
+    manual_state = context.user_data.get('manual_form')
+    if manual_state and manual_state.get('step') == 'awaiting_form':
+        if await handle_manual_form_text(update, context, manual_state, text):
+            return
+   
+    # نام بازیکن برای جستجوی خریدار (دکمه‌های منو جستجو را لغو می‌کنند)
+    if context.user_data.pop('player_search_pending', False) and text not in MENU_COMMANDS:
+        await handle_player_search_text(update, context, text)
+        return
+   
+    # یک بار خواندن نشست و پرش مستقیم به هندلر مرحله فعلی
+    session = await get_session(user_id)
+    if session is not None:
+        step_handler = STEP_TEXT_HANDLERS.get(session.step)
+        if step_handler is not None:
+            await step_handler(update, context, session, text)
+            return
+   
+    if text == "/start" or text == "🔄 استارت مجدد":
+        await start_command(update, context)
+        return
+    
+    if text == "🔎 جستجوی آگهی":
+        filters = context.user_data.setdefault('buyer_search', {})
+        await update.message.reply_text(format_search_filters(filters), reply_markup=search_filter_menu())
+        return
+   
+    if text == "📖 راهنما":
+        await update.message.reply_text(GUIDE_TEXT, reply_markup=main_menu)
+        return
+   
+    if text == "💰 فروش اکانت":
+        member = await is_member_of_channel(context.bot, user_id)
+        if not member:
+            join_button = InlineKeyboardButton(text="پیوستن به کانال رنک1", url=f"https://t.me/{CHANNEL_USERNAME.lstrip('@')}")
+            i_joined_button = InlineKeyboardButton(text="✅ من عضو شدم (بررسی مجدد)", callback_data="check_join")
+            keyboard_not_member = InlineKeyboardMarkup([[join_button], [i_joined_button]])
+            await update.message.reply_text("لطفاً ابتدا در کانال رنک 1 عضو شوید.", reply_markup=keyboard_not_member)
+            return
+       
+        if str(user_id) not in [ADMIN_USER_ID, SPECIAL_TESTER_ID]:
+            u = await user_repo.get(user_id)
+            if u and u.get("free_used"):
+                await update.message.reply_text(
+                    "❌ شما قبلاً یک آگهی رایگان ثبت کرده‌اید.",
+                    reply_markup=main_menu
+                )
+                return
+       
+        msg = (
+            "💎 کاربر گرامی، لطفاً روش فروش خود را انتخاب کنید:\n\n"
+            "📝 **فرم دستی**: پر کردن فرم متنی ساده\n"
+            "🤖 **ربات**: پر کردن فرم پیشرفته با راهنمای گام به گام"
+        )
+        await update.message.reply_text(msg, reply_markup=sale_method_selection_buttons, parse_mode="Markdown")
+        return
+   
+    if text == "📂 اکانت‌های من":
+        u = await user_repo.get(user_id)
+        txt = "📁 وضعیت شما:\n"
+        txt += f"آگهی رایگان ثبت کرده‌اید: {'✅' if u and u.get('free_used') else '❌'}\n\n"
+        
+        listings = await listing_repo.for_user(user_id)
+        if listings:
+            txt += "📂 آگهی‌های فعال شما:\n"
+            keyboard = []
+            for listing in listings:
+                txt += f"آگهی ID {listing['id']}\n"
+                keyboard.append([InlineKeyboardButton(f"✏️ ویرایش آگهی {listing['id']}", callback_data=f"edit_listing|{listing['id']}")])
+            reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else main_menu
+        else:
+            txt += "هیچ آگهی فعالی ندارید."
+            reply_markup = main_menu
+        
+        await update.message.reply_text(txt, reply_markup=reply_markup)
+        return
+   
+    await update.message.reply_text("لطفا از منو انتخاب کنید.", reply_markup=main_menu)
+
+# =========================
+# هندلر عکس‌ها
+# =========================
+async def photo_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    user_id = user.id
+   
+    if await handle_manual_photos(update, context):
+        return
+   
+    session = await get_session(user_id)
+    if session and session.step == STEP_PHOTOS:
+        if not update.message.photo:
+            if update.message.document:
+                await update.message.reply_text(
+                    "❌ فقط فایل‌های عکس مجاز هستند!\n\n"
+                    "لطفا فقط عکس ارسال کنید (فرمت‌های مجاز: JPG, JPEG, PNG, WEBP)",
+                    reply_markup=back_to_form_menu
+                )
+            return
+       
+        photo = update.message.photo[-1]
+        file_id = photo.file_id
+       
+        session.photos.append(file_id)
+       
+        current_count = len(session.photos)
+        max_photos = config.PRICE_CONFIG["max_photos"]
+       
+        if current_count >= max_photos:
+            session.form['team_photos'] = session.photos
+            session.reset_input()
+           
+            await update.message.reply_text(
+                f"✅ {current_count} عکس با موفقیت ثبت شد.\n\n"
+                f"به فرم اصلی برگشتید.",
+                reply_markup=sale_menu
+            )
+        else:
+            remaining = max_photos - current_count
+            await update.message.reply_text(
+                f"✅ عکس {current_count} ثبت شد.\n\n"
+                f"📸 می‌توانید {remaining} عکس دیگر ارسال کنید.\n"
+                f"یا برای بازگشت به فرم از دکمه زیر استفاده کنید:",
+                reply_markup=photos_done_menu
+            )
+        return
+
+# =========================
+# هندلر فایل‌های مستند
+# =========================
+async def document_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    user_id = user.id
+   
+    session = await get_session(user_id)
+    if session and session.step == STEP_PHOTOS:
+        await update.message.reply_text(
+            "❌ فقط فایل‌های عکس مجاز هستند!\n\n"
+            "لطفا فقط عکس ارسال کنید (فرمت‌های مجاز: JPG, JPEG, PNG, WEBP)\n\n"
+            "فایل‌های دیگر مانند PDF, ZIP, MP4 و... پذیرفته نمی‌شوند.",
+            reply_markup=back_to_form_menu
+        )
+        return
+   
+    await update.message.reply_text(
+        "❌ این نوع فایل پشتیبانی نمی‌شود.\n\n"
+        "لطفا فقط از گزینه‌های منو استفاده کنید.",
+        reply_markup=main_menu
+    )
+
+# =========================
+# Callback برای دکمه‌های ادمین
+# =========================
+REJECTION_REASONS = (
+    "📋 دلایل احتمالی:\n"
+    "• اطلاعات ناقص یا نادرست\n"
+    "• عکس‌های نامناسب\n"
+    "• مغایرت با قوانین کانال\n\n"
+    "🔧 لطفاً اطلاعات را بررسی کرده و مجدداً ثبت کنید.\n"
+    "📞 برای اطلاعات بیشتر با پشتیبانی تماس بگیرید."
+)
+
+def listing_kind(data_json: str) -> str:
+    form_data = parse_form_data(data_json) or {}
+    return "فرم دستی" if form_data.get('submission_type') == 'manual' else "رایگان"
+
+async def approve_listing(query, listing_id: int):
+    result = await channel_publisher.submit(listing_id)
+    if result == QUEUED:
+        await query.edit_message_text(f"✅ آگهی #{listing_id} تأیید شد و در صف انتشار کانال قرار گرفت.")
+    else:
+        await query.edit_message_text(f"ℹ️ آگهی #{listing_id} قبلاً بررسی شده است.")
+
+async def reject_listing(context: ContextTypes.DEFAULT_TYPE, query, listing_id: int):
+    listing = await listing_repo.reject(listing_id)
+    if listing is None:
+        await query.edit_message_text(f"ℹ️ آگهی #{listing_id} قبلاً بررسی شده است.")
+        return
+    kind = listing_kind(listing['data_json'])
+    try:
+        await context.bot.send_message(
+            listing['user_id'],
+            f"❌ متأسفانه آگهی {kind} شما توسط ادمین رد شد.\n\n" + REJECTION_REASONS,
+            rate_limit_args=PRIORITY_ADMIN
+        )
+    except Exception:
+        logger.warning("ارسال پیام رد به کاربر با خطا مواجه شد.")
+    await query.edit_message_text(f"❌ آگهی {kind} #{listing_id} رد شد و کاربر مطلع گردید.")
+
+async def pending_page(after_id: int = 0):
+    """یک صفحه از صف بررسی: (متن، کیبورد)"""
+    page_size = config.PENDING_PAGE_SIZE
+    rows = await listing_repo.pending(after_id, page_size + 1)
+    total = await listing_repo.count_pending()
+    if not rows:
+        return "✅ آگهی در انتظار بررسی وجود ندارد.", None
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    lines = [f"🗂 صف بررسی ({total} آگهی در انتظار):\n"]
+    buttons = []
+    for listing_id, user_id, created_at, data_json in rows:
+        kind = listing_kind(data_json)
+        lines.append(f"#{listing_id} - {kind} - کاربر {user_id} - {(created_at or '')[:16].replace('T', ' ')}")
+        buttons.append([InlineKeyboardButton(f"🔍 بررسی #{listing_id}", callback_data=f"admin_review|{listing_id}")])
+    if has_next:
+        buttons.append([InlineKeyboardButton("صفحه بعد ▶️", callback_data=f"admin_pending|{rows[-1][0]}")])
+    return "\n".join(lines), InlineKeyboardMarkup(buttons)
+
+async def pending_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """صف آگهی‌های در انتظار بررسی (فقط ادمین)"""
+    if str(update.effective_user.id) != ADMIN_USER_ID:
+        return
+    text, keyboard = await pending_page()
+    await update.message.reply_text(text, reply_markup=keyboard)
+
+async def admin_callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    if str(query.from_user.id) != ADMIN_USER_ID:
+        return
+    data = query.data or ""
+    parts = data.split("|")
+    action = parts[0] if parts else None
+    if len(parts) != 2 or not parts[1].isdigit():
+        await query.edit_message_text("دستور ناشناخته برای ادمین.")
+        return
+    target = int(parts[1])
+
+    # دکمه‌های قدیمی (قبل از شناسه آگهی) فقط user_id دارند: آخرین آگهی pending همان کاربر
+    if action in ("admin_approve_free", "admin_approve_manual", "admin_reject_free", "admin_reject_manual"):
+        listing_id = await listing_repo.latest_pending_id(target)
+        if listing_id is None:
+            await query.edit_message_text("ℹ️ آگهی در انتظار بررسی برای این کاربر وجود ندارد.")
+            return
+        action, target = action.rsplit("_", 1)[0], listing_id
+
+    if action == "admin_approve":
+        await approve_listing(query, target)
+        return
+
+    if action == "admin_reject":
+        await reject_listing(context, query, target)
+        return
+
+    if action == "admin_pending":
+        text, keyboard = await pending_page(target)
+        await query.edit_message_text(text, reply_markup=keyboard)
+        return
+
+    if action == "admin_review":
+        listing = await listing_repo.get(target)
+        if not listing or listing['status'] != 'pending':
+            await query.edit_message_text(f"ℹ️ آگهی #{target} دیگر در انتظار بررسی نیست.")
+            return
+        form_data = parse_form_data(listing['data_json'])
+        if form_data is None:
+            await query.edit_message_text(f"⚠️ اطلاعات آگهی #{target} قابل خواندن نیست.")
+            return
+        await deliver_to_admin(context, render_admin_review(target, listing['user_id'], form_data),
+                               admin_review_buttons(target), form_data.get('team_photos'))
+        return
+
+    await query.edit_message_text("دستور ناشناخته برای ادمین.")
+
+# =========================
+# صف پیام‌های خروجی (rate limiter برنامه)
+# =========================
+outbound_queue = OutboundQueue(
+    global_rate=config.OUTBOUND_GLOBAL_RATE,
+    chat_rate=config.OUTBOUND_CHAT_RATE,
+    chat_burst=config.OUTBOUND_CHAT_BURST,
+    group_rate=config.OUTBOUND_GROUP_PER_MINUTE / 60,
+    max_in_flight=config.OUTBOUND_MAX_IN_FLIGHT,
+    max_retries=config.OUTBOUND_MAX_RETRIES,
+)
+
+# =========================
+# پردازش همزمان آپدیت‌ها (ترتیب هر کاربر حفظ می‌شود تا SaleSession همزمان تغییر نکند)
+# =========================
+update_processor = PerUserUpdateProcessor(
+    max_concurrent=config.MAX_CONCURRENT_UPDATES,
+    max_pending=config.MAX_PENDING_UPDATES,
+)
+
+# =========================
+# انتشار آگهی در کانال
+# =========================
+def render_channel_post(listing_id: int, form_data: dict) -> str:
+    """متن پست کانال؛ فرم دستی همان متن کاربر است"""
+    if form_data.get('submission_type') == 'manual':
+        body = form_data.get('form_text', '')
+    else:
+        body = FORM.render_channel(form_data)
+    return f"🔥 آگهی فروش اکانت #{listing_id}\n\n{body}\n\n📢 {CHANNEL_USERNAME}"
+
+def channel_post_link(message_id: int) -> str:
+    return f"https://t.me/{CHANNEL_USERNAME.lstrip('@')}/{message_id}"
+
+channel_publisher: Optional[ChannelPublisher] = None
+
+def make_channel_publisher(bot) -> ChannelPublisher:
+    async def post(listing: dict) -> int:
+        form_data = parse_form_data(listing['data_json'])
+        if form_data is None:
+            # ChannelPublisher آگهی را به صف بررسی برمی‌گرداند و بقیه دسته را ادامه می‌دهد
+            raise ValueError(f"data_json آگهی {listing['id']} قابل خواندن نیست")
+        return await send_album(bot, CHANNEL_USERNAME, render_channel_post(listing['id'], form_data),
+                                form_data.get('team_photos') or [], priority=PRIORITY_BROADCAST)
+
+    async def notify_owner(listing: dict, message_id: int):
+        await bot.send_message(
+            chat_id=listing['user_id'],
+            text=(f"🎉 آگهی شما توسط ادمین تأیید شد!\n\n"
+                  f"✅ اکنون آگهی شما در کانال فعال شده و به مدت {config.PRICE_CONFIG['listing_expiry_days']} روز "
+                  f"نمایش داده خواهد شد.\n🔗 {channel_post_link(message_id)}\n"
+                  "با تشکر از انتخاب شما! 💎"),
+            rate_limit_args=PRIORITY_ADMIN,
+        )
+
+    return ChannelPublisher(
+        listing_repo.approve, post, listing_repo.mark_published, listing_repo.release_publish,
+        on_published=notify_owner,
+    )
+
+# =========================
+# انقضای آگهی‌ها
+# =========================
+expiry_sweeper: Optional[ExpirySweeper] = None
+
+def make_expiry_sweeper(bot) -> ExpirySweeper:
+    async def notify_owner(user_id: int, listing_ids: list):
+        ids = "، ".join(f"#{listing_id}" for listing_id in listing_ids)
+        await bot.send_message(
+            chat_id=user_id,
+            text=(f"⌛ مهلت {config.PRICE_CONFIG['listing_expiry_days']} روزه آگهی {ids} شما به پایان رسید "
+                  "و آگهی غیرفعال شد.\n\n"
+                  "💰 برای فروش دوباره، از منوی اصلی «فروش اکانت» را بزنید."),
+            rate_limit_args=PRIORITY_BROADCAST,
+        )
+
+    return ExpirySweeper(
+        listing_repo.expire_due, notify_owner,
+        batch_size=config.EXPIRY_SWEEP_BATCH_SIZE,
+        max_batches=config.EXPIRY_SWEEP_MAX_BATCHES,
+        notify_rate=config.EXPIRY_NOTIFY_RATE,
+    )
+
+async def expiry_sweep_job(context: ContextTypes.DEFAULT_TYPE):
+    """منقضی کردن آگهی‌های فعال سررسیده و اطلاع به صاحبان آن‌ها"""
+    try:
+        report = await expiry_sweeper.sweep()
+    except Exception as e:
+        logger.error(f"خطا در منقضی کردن آگهی‌ها: {e}")
+        return
+    if report and (report.expired or report.backlog):
+        logger.info("expiry sweep: %s", report)
+
+# =========================
+# بارگذاری دوباره تنظیمات (CONFIG_FILE) بدون ری‌استارت
+# =========================
+# config_reload فقط وقتی CONFIG_FILE تعریف شده import می‌شود (شروع سرد)
+def apply_config_snapshot(snapshot):
+    """bind دوباره اشیای مشتق از تنظیمات (config.* و مدل قیمت را config_reload جایگزین کرده است)"""
+    global FORM, sale_menu, back_to_form_menu, GUIDE_TEXT, SALE_RULES_TEXT
+    FORM = snapshot.form
+    sale_menu = FORM.menu
+    back_to_form_menu = FORM.back_menu
+    GUIDE_TEXT = snapshot.texts["guide"]
+    SALE_RULES_TEXT = snapshot.texts["sale_rules"]
+
+config_reloader = None
+if config.CONFIG_FILE:
+    from config_reload import ConfigReloader
+    config_reloader = ConfigReloader(config.CONFIG_FILE, on_apply=apply_config_snapshot)
+
+async def config_reload_job(context: ContextTypes.DEFAULT_TYPE):
+    """بارگذاری فایل تنظیمات در صورت تغییر"""
+    await config_reloader.check()
+
+async def reload_config_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """بارگذاری دوباره فایل تنظیمات (فقط ادمین)"""
+    if str(update.effective_user.id) != ADMIN_USER_ID:
+        return
+    if config_reloader is None:
+        await update.message.reply_text("❌ فایل تنظیمات (CONFIG_FILE) تعریف نشده است.")
+        return
+    from config_reload import ConfigError
+    try:
+        await config_reloader.reload()
+    except (ConfigError, OSError) as e:
+        logger.error("reload_config: %s", e)
+        await update.message.reply_text(f"❌ تنظیمات بارگذاری نشد و تنظیمات فعلی حفظ شد:\n{e}")
+        return
+    logger.info("تنظیمات از %s بارگذاری شد.", config_reloader.path)
+    await update.message.reply_text(f"✅ تنظیمات از {config_reloader.path} بارگذاری شد.")
+
+# =========================
+# اجرای بات
+# =========================
+async def on_startup(app):
+    """بازیابی فرم‌های نیمه‌کاره از دیتابیس و زمان‌بندی ذخیره دوره‌ای"""
+    since = time.time() - state_store.ttl
+    await run_db(lambda: state_store.restore(
+        row for row in iter_conversation_states(since) if row[0] == sale_sessions.namespace
+    ))
+    logger.info("وضعیت %d فرم نیمه‌کاره بازیابی شد.", len(state_store))
+    app.job_queue.run_repeating(flush_state_job, interval=config.STATE_FLUSH_INTERVAL, first=config.STATE_FLUSH_INTERVAL)
+    global expiry_sweeper, channel_publisher
+    expiry_sweeper = make_expiry_sweeper(app.bot)
+    channel_publisher = make_channel_publisher(app.bot)
+    await channel_publisher.start(resume=await listing_repo.unfinished_publish())
+    app.job_queue.run_repeating(expiry_sweep_job, interval=config.EXPIRY_SWEEP_INTERVAL, first=10)
+    if config_reloader is not None:
+        # خطای فایل در شروع ربات را متوقف نمی‌کند؛ تنظیمات config.py می‌ماند
+        await config_reloader.check()
+        if config.CONFIG_RELOAD_INTERVAL > 0:
+            app.job_queue.run_repeating(config_reload_job, interval=config.CONFIG_RELOAD_INTERVAL,
+                                        first=config.CONFIG_RELOAD_INTERVAL)
+
+# =========================
+# آمار داخلی (فقط ادمین)
+# =========================
+def collect_stats() -> dict:
+    stats = {
+        "membership_cache": membership_cache.stats(),
+        "outbound": outbound_queue.stats(),
+        "updates": update_processor.stats(),
+        "price_estimates": get_price_model().estimates.stats(),
+    }
+    if expiry_sweeper is not None:
+        stats["expiry"] = expiry_sweeper.stats()
+    if channel_publisher is not None:
+        stats["publish"] = channel_publisher.stats()
+    if config_reloader is not None:
+        stats["config"] = config_reloader.stats()
+    return stats
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if str(update.effective_user.id) != ADMIN_USER_ID:
+        return
+    lines = []
+    for name, values in collect_stats().items():
+        lines.append(f"📊 {name}")
+        for key, value in values.items():
+            lines.append(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+    await update.message.reply_text("\n".join(lines))
+
+async def reprice_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """قیمت‌گذاری دوباره همه آگهی‌های فعال با ضرایب فعلی (فقط ادمین)"""
+    if str(update.effective_user.id) != ADMIN_USER_ID:
+        return
+    await update.message.reply_text("⏳ قیمت‌گذاری دوباره آگهی‌های فعال شروع شد...")
+    from reprice import reprice_listings_async
+    report = await reprice_listings_async()
+    logger.info("reprice: %s", report)
+    await update.message.reply_text(f"✅ {report}")
+
+async def on_stop(app):
+    """توقف انتشار کانال بعد از Application.stop و قبل از shutdown، وقتی bot و صف خروجی هنوز کار می‌کنند"""
+    if channel_publisher is not None:
+        await channel_publisher.stop(config.PUBLISH_STOP_TIMEOUT)
+
+async def on_shutdown(app):
+    """ذخیره وضعیت فرم‌ها، بستن executor و اتصال‌های دیتابیس هنگام خاموش شدن"""
+    upserts, deletes = state_store.drain()
+    save_conversation_states(upserts, deletes)
+    logger.info("stats: %s", collect_stats())
+    shutdown_executor()
+    close_pool()
+
+def build_application():
+    """ساخت Application با همه هندلرها (بدون اجرا)؛ main و آزمون بار end-to-end از آن استفاده می‌کنند"""
+    builder = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .base_url(config.BOT_API_BASE_URL)
+        .rate_limiter(outbound_queue)
+        .concurrent_updates(update_processor)
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+    )
+    if config.BOT_MODE == "webhook":
+        # کلاینت getUpdates در webhook استفاده نمی‌شود؛ فقط در صورت نیاز ساخته می‌شود
+        from telegram.request import HTTPXRequest
+        from webhook import LazyRequest
+        builder = builder.get_updates_request(LazyRequest(HTTPXRequest))
+    app = builder.build()
+   
+    app.add_handler(CommandHandler("start", start_command))
+    app.add_handler(CommandHandler("stats", stats_command))
+    app.add_handler(CommandHandler("reprice", reprice_command))
+    app.add_handler(CommandHandler("reload_config", reload_config_command))
+    app.add_handler(CommandHandler("pending", pending_command))
+    app.add_handler(CallbackQueryHandler(admin_callback_handler, pattern=r"^admin_"))
+   
+    app.add_handler(CallbackQueryHandler(handle_main_sale_callbacks, pattern=r"^(manual_form|bot_form)$"))
+   
+    app.add_handler(CallbackQueryHandler(handle_manual_form_callbacks, pattern=r"^manual_"))
+   
+    app.add_handler(CallbackQueryHandler(callback_query_handler))
+    app.add_handler(MessageHandler(filters.PHOTO, photo_handler))
+    app.add_handler(MessageHandler(filters.Document.ALL, document_handler))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_message_handler))
+    return app
+
+def main():
+    init_db()
+    app = build_application()
+
+    if config.BOT_MODE == "webhook":
+        import asyncio
+        import secrets
+        from webhook import run_webhook
+        if not config.WEBHOOK_URL:
+            raise ValueError("❌ برای حالت webhook باید WEBHOOK_URL تعریف شود!")
+        asyncio.run(run_webhook(
+            app, url=config.WEBHOOK_URL, path=config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET or secrets.token_urlsafe(32),
+            host=config.WEBHOOK_LISTEN, port=config.WEBHOOK_PORT,
+            max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+        ))
+        return
+
+    logger.info("Bot started (polling).")
+    app.run_polling()
+
+if __name__ == "__main__":
+    main()
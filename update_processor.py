@@ -0,0 +1,114 @@
+# update_processor.py
+# پردازش همزمان آپدیت‌ها با حفظ ترتیب برای هر کاربر: آپدیت‌های کاربران مختلف موازی اجرا می‌شوند،
+# ولی آپدیت‌های یک کاربر (کلیک‌های پشت سر هم روی یک فرم) یکی‌یکی و به ترتیب رسیدن
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class _Lane:
+    __slots__ = ("lock", "waiting")
+
+    def __init__(self):
+        # asyncio.Lock به ترتیب FIFO واگذار می‌شود، پس ترتیب آپدیت‌های کاربر حفظ می‌شود
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """آپدیت‌ها را با کلید user_id سریال و بین کاربران موازی اجرا می‌کند.
+
+    - max_concurrent: حداکثر هندلر در حال اجرا (مثلاً منتظر get_chat_member یا send_photo).
+    - max_pending: سقف کل آپدیت‌های پذیرفته‌شده (در حال اجرا + منتظر)؛ سمافور PTB
+      همین عدد است تا آپدیت‌های منتظر قفل یک کاربر جای اجرای کاربران دیگر را نگیرند.
+    - آپدیت بدون کاربر (مثلاً پست کانال) بدون قفل اجرا می‌شود.
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_pending: int = 1024, latency_samples: int = 1000):
+        super().__init__(max(max_pending, max_concurrent))
+        self.max_concurrent = max(1, max_concurrent)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lanes: Dict[Any, _Lane] = {}
+        self.running = 0
+        self.waiting = 0
+        self.processed = 0
+        self.failed = 0
+        self.max_lane_depth = 0
+        self._wait_times: Deque[float] = deque(maxlen=latency_samples)
+
+    async def initialize(self) -> None:
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+
+    async def shutdown(self) -> None:
+        self._lanes.clear()
+
+    @staticmethod
+    def key(update: object):
+        if isinstance(update, Update):
+            if update.effective_user is not None:
+                return update.effective_user.id
+            if update.effective_chat is not None:
+                return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if self._slots is None:
+            await self.initialize()
+        user_key = self.key(update)
+        if user_key is None:
+            await self._run(coroutine, time.monotonic())
+            return
+
+        lane = self._lanes.get(user_key)
+        if lane is None:
+            lane = self._lanes[user_key] = _Lane()
+        lane.waiting += 1
+        self.waiting += 1
+        self.max_lane_depth = max(self.max_lane_depth, lane.waiting)
+        arrived = time.monotonic()
+        try:
+            try:
+                await lane.lock.acquire()
+            finally:
+                lane.waiting -= 1
+                self.waiting -= 1
+            try:
+                await self._run(coroutine, arrived)
+            finally:
+                lane.lock.release()
+        finally:
+            # تا وقتی آپدیتی منتظر است lane نگه داشته می‌شود؛ بعد حذف تا dict بزرگ نشود
+            if lane.waiting == 0 and not lane.lock.locked():
+                self._lanes.pop(user_key, None)
+
+    async def _run(self, coroutine: Awaitable[Any], arrived: float):
+        async with self._slots:
+            self._wait_times.append(time.monotonic() - arrived)
+            self.running += 1
+            try:
+                await coroutine
+                self.processed += 1
+            except Exception:
+                # Application خطای هندلر را خودش به error handler می‌دهد؛ اینجا فقط شمارش
+                self.failed += 1
+                raise
+            finally:
+                self.running -= 1
+
+    def stats(self) -> dict:
+        ordered = sorted(self._wait_times)
+        pct = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000 if ordered else 0.0
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "users": len(self._lanes),
+            "processed": self.processed,
+            "failed": self.failed,
+            "max_lane_depth": self.max_lane_depth,
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+        }
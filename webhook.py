@@ -0,0 +1,222 @@
+# webhook.py
+# حالت webhook: سرور HTTP غیرهمزمان سبک (asyncio خالص، بدون Flask/tornado) روی همان حلقه ربات
+# مسیرها: POST <path> آپدیت‌های Telegram با بررسی secret token، GET /healthz و GET /readyz
+import asyncio
+import hmac
+import json
+import logging
+import signal
+import time
+from typing import Callable, Optional
+
+from telegram.request import BaseRequest
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class WebhookServer:
+    """سرور HTTP/1.1 با keep-alive برای دریافت آپدیت‌ها.
+
+    آپدیت بعد از بررسی secret و JSON فقط به on_update داده می‌شود (مثلاً put در
+    update_queue) و پاسخ 200 بلافاصله برمی‌گردد؛ پردازش هندلرها منتظر HTTP نمی‌ماند.
+    /healthz زنده بودن پروسه و /readyz آماده بودن ربات (ready()) را گزارش می‌کند.
+    """
+
+    def __init__(self, path: str, secret_token: str, on_update: Callable[[dict], None],
+                 ready: Callable[[], bool] = lambda: True, host: str = "0.0.0.0", port: int = 8080):
+        self.path = path
+        self.secret_token = secret_token.encode()
+        self.on_update = on_update
+        self.ready = ready
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        # اتصال‌های keep-alive باز (writer -> task)؛ در stop بسته می‌شوند تا منتظر Telegram نماند
+        self._connections: dict = {}
+        self.requests = 0
+        self.updates = 0
+        self.rejected = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("webhook server listening on %s:%d%s", self.host, self.port, self.path)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            tasks = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, _, header_block = head.decode("latin-1").partition("\r\n")
+                method, _, rest = request_line.partition(" ")
+                target = rest.rpartition(" ")[0] or rest
+                headers = {}
+                for line in header_block.split("\r\n"):
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                if "transfer-encoding" in headers:
+                    # بدنه chunked پشتیبانی نمی‌شود (Telegram همیشه Content-Length می‌فرستد)؛ اتصال
+                    # بسته می‌شود تا بایت‌های بدنه به عنوان درخواست بعدی خوانده نشوند
+                    self.requests += 1
+                    await self._respond(writer, 411, close=True)
+                    return
+
+                body = b""
+                length = headers.get("content-length")
+                if length is not None:
+                    if not length.isdigit() or int(length) > MAX_BODY_BYTES:
+                        await self._respond(writer, 413, close=True)
+                        return
+                    body = await reader.readexactly(int(length))
+
+                status, payload = self._route(method, target.split("?", 1)[0], headers, body, length is not None)
+                # 411: طول بدنه معلوم نیست، پس ادامه اتصال امن نیست
+                keep_alive = headers.get("connection", "").lower() != "close" and status != 411
+                await self._respond(writer, status, payload, close=not keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    def _route(self, method: str, path: str, headers: dict, body: bytes, has_length: bool):
+        self.requests += 1
+        if path == self.path:
+            if method != "POST":
+                return 405, b""
+            if not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self.secret_token):
+                self.rejected += 1
+                return 403, b""
+            if not has_length:
+                return 411, b""
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return 400, b""
+            if not isinstance(data, dict):
+                return 400, b""
+            try:
+                self.on_update(data)
+            except Exception as e:
+                logger.warning(f"آپدیت نامعتبر از webhook رد شد: {e}")
+                return 400, b""
+            self.updates += 1
+            return 200, b""
+        if path == "/healthz":
+            return 200, b"ok"
+        if path == "/readyz":
+            return (200, b"ready") if self.ready() else (503, b"starting")
+        return 404, b""
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes = b"", close: bool = False):
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Content-Type: text/plain\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "updates": self.updates, "rejected": self.rejected}
+
+
+class LazyRequest(BaseRequest):
+    """BaseRequest که درخواست واقعی (مثلاً HTTPXRequest با SSL context خودش) را در اولین ارسال می‌سازد.
+
+    در webhook، getUpdates هرگز فرستاده نمی‌شود؛ با این کلاس ساخت کلاینت httpx دوم و
+    بارگذاری گواهی‌های آن از شروع سرد حذف می‌شود.
+    """
+
+    def __init__(self, factory: Callable[[], BaseRequest]):
+        self._factory = factory
+        self._request: Optional[BaseRequest] = None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        if self._request is not None:
+            await self._request.shutdown()
+
+    async def do_request(self, *args, **kwargs):
+        if self._request is None:
+            self._request = self._factory()
+            await self._request.initialize()
+        return await self._request.do_request(*args, **kwargs)
+
+
+async def run_webhook(application, url: str, path: str, secret_token: str, host: str, port: int,
+                      max_connections: int = 40):
+    """چرخه عمر Application مثل run_polling (post_init، start، post_stop، post_shutdown)،
+    با WebhookServer به جای حلقه long-poll."""
+    from telegram import Update
+
+    started_at = time.monotonic()
+    server = WebhookServer(
+        path, secret_token,
+        on_update=lambda data: application.update_queue.put_nowait(Update.de_json(data, application.bot)),
+        ready=lambda: application.running,
+        host=host, port=port,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    # سرور زودتر بالا می‌آید تا health check پلتفرم در زمان راه‌اندازی رد نشود (readyz تا start برابر 503)
+    await server.start()
+    try:
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        # پردازش قبل از set_webhook شروع می‌شود: آپدیت‌هایی که Telegram به webhook قبلی (همین
+        # آدرس و secret ثابت) فرستاده یک رفت‌وبرگشت زودتر جواب می‌گیرند
+        await application.start()
+        await application.bot.set_webhook(
+            url=url.rstrip("/") + path,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=max_connections,
+        )
+        logger.info("Bot started (webhook) in %.2fs.", time.monotonic() - started_at)
+        await stop.wait()
+    finally:
+        await server.stop()
+        if application.running:
+            await application.stop()
+            # post_stop قبل از shutdown: bot و صف خروجی برای کامل کردن انتشار کانال هنوز کار می‌کنند
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        logger.info("webhook stats: %s", server.stats())